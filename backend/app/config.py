@@ -13,14 +13,95 @@ class Settings(BaseSettings):
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     EMBEDDINGS_DIR: Path = BASE_DIR / "embeddings_output"
     DATA_DIR: Path = BASE_DIR / "data"
+    # Full FastText .bin, or a reduced model directory built by app.services.model_provider
+    FASTTEXT_MODEL_PATH: Path = BASE_DIR / "app" / "models" / "cc.en.300.bin"
     
     # Service settings
     LIBRE_TRANSLATE_URL: str = "http://localhost:5000"
     OLLAMA_URL: str = "http://localhost:11434"
+    LLM_MODEL: str = "llama3.1"
+    LLM_TIMEOUT: float = 120.0  # seconds per Ollama request
+    
+    # Conversation sessions: recent messages in RAM, full log in SQLite
+    SESSION_DB_URL: str = "sqlite:///" + str(BASE_DIR / "sessions.db")
+    SESSION_MAX_MESSAGES: int = 20  # ring buffer size per session
+    SESSION_HISTORY_MESSAGES: int = 5  # messages included in the prompt
+    SESSION_MAX_IN_MEMORY: int = 10000  # least recently used sessions beyond this are evicted
+    SESSION_FLUSH_INTERVAL: float = 1.0  # seconds between write-behind flushes
+    
+    # Prompt size: older turns are folded into a rolling summary once they no longer
+    # fit in the prompt, and context plus history are trimmed to a token budget
+    HISTORY_SUMMARY: bool = True
+    HISTORY_RECENT_MESSAGES: int = 2  # kept verbatim next to the summary
+    HISTORY_SUMMARY_TOKENS: int = 200  # longest summary the LLM may write
+    PROMPT_TOKEN_BUDGET: int = 2048  # whole prompt, instructions and question included
+    PROMPT_HISTORY_SHARE: float = 0.3  # most of the budget history may take from context
+    
+    # Translation: sentences are cached in RAM and SQLite, uncached ones sent in concurrent batches
+    TRANSLATION_BACKEND: str = "google"  # "stub" translates offline, for tests and load runs
+    TRANSLATION_CACHE: bool = True
+    TRANSLATION_CACHE_DB_URL: str = "sqlite:///" + str(BASE_DIR / "translations.db")
+    TRANSLATION_CACHE_SIZE: int = 10000  # sentences kept in RAM
+    TRANSLATION_CACHE_MAX_ROWS: int = 200000  # sentences kept on disk
+    TRANSLATION_POOL_SIZE: int = 4  # translator instances (and requests in flight) per language pair
+    TRANSLATION_CONCURRENCY: int = 8  # batches in flight across all pairs
+    TRANSLATION_BATCH_CHARS: int = 4500  # Google rejects requests over 5000 characters
+    LANGDETECT_SEED: int = 0  # seed of the Hindi/Marathi fallback, so detection is repeatable
+    
+    # Speech recognition: a bounded pool of workers reusing recognizers
+    ASR_WORKERS: int = 4
+    ASR_MAX_QUEUE: int = 16  # uploads waiting for a worker beyond this get a 503
+    ASR_POOL_MODE: str = "thread"  # "process" gives each worker its own process and model copy
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # larger /api/upload files get a 413, checked as they arrive
+    
+    # Live speech over WebSocket (/api/speech/stream)
+    SPEECH_STREAM_MAX_SECONDS: float = 60.0  # audio after this is ignored and the transcript finalized
+    
+    # Text to speech: synthesized sentence by sentence, short sentences cached in RAM
+    TTS_BACKEND: str = "gtts"  # "offline" plays a tone instead, for tests and load runs
+    TTS_CACHE: bool = True
+    TTS_CONCURRENCY: int = 4  # sentences synthesized at once
+    TTS_CACHE_BYTES: int = 32 * 1024 * 1024  # audio kept for repeated sentences
+    TTS_CACHE_MAX_CHARS: int = 200  # longer sentences are rarely repeated and are not cached
+    
+    # Blocking pipeline steps (translation, retrieval) run on a bounded thread pool
+    PIPELINE_THREADS: int = 16
     
     # RAG settings
     TOP_K_RESULTS: int = 3
     CHUNK_SIZE: int = 512
+
+    # Vector index settings ("flat" for exact search, "ivf" for approximate)
+    VECTOR_INDEX: str = "flat"
+    IVF_NLIST: int = 0  # 0 picks roughly sqrt(number of chunks)
+    IVF_NPROBE: int = 8
+    MAX_BATCH_QUERIES: int = 256
+    MAX_TOP_K: int = 100  # largest top_k a search request may ask for
+
+    # Retrieval settings ("vector", "bm25", or "hybrid" to fuse both rankings)
+    RETRIEVAL_MODE: str = "hybrid"
+    HYBRID_CANDIDATES: int = 50  # candidates taken from each ranking before fusion
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_BM25_WEIGHT: float = 1.0
+    RRF_K: int = 60
+    QUERY_INTENT_FILTERS: bool = True  # infer company/category/plan filters from the prompt
+    
+    # Semantic response cache: reuse answers to near-duplicate questions
+    RESPONSE_CACHE: bool = True
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: float = 3600.0  # seconds
+    # Cosine similarity between query embeddings; None calibrates it at startup
+    # from the labelled duplicate and near-miss questions in RESPONSE_CACHE_PAIRS
+    RESPONSE_CACHE_THRESHOLD: Optional[float] = None
+    RESPONSE_CACHE_PAIRS: Path = BASE_DIR / "app" / "data" / "response_cache_pairs.json"
+    
+    # Index hot-reload settings
+    HOT_RELOAD: bool = True
+    HOT_RELOAD_DEBOUNCE: float = 2.0
+    ADMIN_TOKEN: Optional[str] = None  # required in X-Admin-Token for admin endpoints when set
+    
+    # Per-stage latency histograms, served at /api/metrics in Prometheus format
+    TRACING: bool = True
     
     # Logging
     LOG_LEVEL: str = "INFO"
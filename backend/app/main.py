@@ -1,16 +1,34 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.schemas import AudioResponse, TextResponse, QueryRequest  
-from app.services.rag_service import RAGService
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.websockets import WebSocketState
+from app.models.schemas import (
+    AudioResponse, TextResponse, QueryRequest, BatchSearchRequest, BatchSearchResponse, SpeechStreamStart
+)
+from app.services.rag_service import RAGService, Retrieval
+from app.services.response_cache import SemanticResponseCache, calibrate_threshold, load_pairs
+from app.services.session_store import DEFAULT_SESSION, SessionKey, session_key
+from app.services.corpus_store import CATEGORICAL_FIELDS
+from app.services.index_reloader import IndexReloader
 from app.services.llm_service import LlamaService
+from app.services.recognizer_pool import PoolSaturated
 from app.services.speech_service import SpeechService
 from app.services.translation_service import TranslationService
+from app.utils.audio import container_format
 from app.utils.helpers import handle_error, timer_decorator, validate_language_code
+from app.utils.concurrency import get_executor, run_blocking, shutdown_executor
+from app.utils.responses import audio_headers, multipart_stream, negotiate, new_boundary
+from app.utils.streaming import sse_event, translate_sentences
+from app.utils.tracing import TracingMiddleware, stage, tracer
+from app.utils.uploads import AudioUpload, UploadError
 from app.config import settings
 from app.services.booking_system import process_booking
 import logging
 import base64
+import json
+import time
+from typing import Optional
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -25,48 +43,110 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Language of raw audio /api/upload answers
+    expose_headers=["X-Detected-Language", "Server-Timing"],
 )
+# Per-request stage timings; added last so it wraps CORS and times whole responses
+app.add_middleware(TracingMiddleware, tracer=tracer)
 
 # Initialize services
 translation_service = TranslationService()
 rag_service = RAGService()
 llm_service = LlamaService()
 speech_service = SpeechService()
+index_reloader = IndexReloader(
+    rag_service, rag_service.embeddings_dir, debounce=settings.HOT_RELOAD_DEBOUNCE
+)
+
+def response_cache_threshold() -> float:
+    """RESPONSE_CACHE_THRESHOLD, or one calibrated for the loaded model on the labelled question pairs"""
+    if settings.RESPONSE_CACHE_THRESHOLD is not None:
+        return settings.RESPONSE_CACHE_THRESHOLD
+    threshold, _ = calibrate_threshold(load_pairs(settings.RESPONSE_CACHE_PAIRS), rag_service.searcher.embed_query)
+    return threshold
+
+response_cache = SemanticResponseCache(
+    dim=rag_service.searcher.store.dim,
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    threshold=response_cache_threshold()
+) if settings.RESPONSE_CACHE else None
 
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
 logger = logging.getLogger(__name__)
+
+# Enough of an upload to identify its container and read a WAV header
+UPLOAD_SNIFF_BYTES = 4096
+
+@app.on_event("startup")
+async def start_index_watcher():
+    get_executor()
+    if settings.HOT_RELOAD:
+        index_reloader.start()
+
+@app.on_event("shutdown")
+async def stop_index_watcher():
+    index_reloader.stop()
+    shutdown_executor()
+    # Flush conversation messages still waiting for the write-behind queue
+    llm_service.sessions.close()
+    translation_service.close()
+    speech_service.shutdown()
     
-@app.post("/api/upload", response_model=AudioResponse)
+@app.post("/api/upload", response_model=AudioResponse, openapi_extra={
+    # The body is read by AudioUpload rather than declared as File/Form parameters
+    "requestBody": {"required": True, "content": {
+        "multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {
+                "file": {"type": "string", "format": "binary"},
+                "user_id": {"type": "string"},
+                "session_id": {"type": "string"}
+            }
+        }},
+        "audio/*": {"schema": {"type": "string", "format": "binary"}}
+    }}
+})
 @handle_error
 @timer_decorator
-async def process_audio_upload(
-    file: UploadFile = File(...)
-):
-    """Process audio upload from frontend"""
-    logger.info(f"Received audio upload: {file.filename}")
-    
-    # Validate file type
-    valid_audio_types = ['audio/mpeg', 'audio/mp3', 'audio/wav']
-    if file.content_type not in valid_audio_types:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type. Only MP3/WAV files are accepted."
-        )
+async def process_audio_upload(request: Request, accept: Optional[str] = Header(None)):
+    """
+    Process audio upload from frontend.
+    The audio is multipart/form-data (`file`, optional `user_id` and
+    `session_id`) or the raw file with those fields in the query string. It is
+    checked by its first bytes and transcribed while it is still arriving.
+    The answer is JSON with base64 audio by default; `Accept: audio/mpeg` (the
+    TTS backend's type) returns the audio itself with only the detected
+    language in a header, and `Accept: multipart/mixed` returns a JSON part
+    with the question and answer text followed by the audio part. Both stream sentence clips as they are
+    synthesized when the backend allows it.
+    """
+    upload = AudioUpload(request, settings.UPLOAD_MAX_BYTES)
     
     try:
-        # Read audio content
-        audio_content = await file.read()
-        file_size = len(audio_content)
+        # Oversized or unrecognized uploads are turned away before the rest is read
+        upload.check_length()
+        head = await upload.head(UPLOAD_SNIFF_BYTES)
+        audio_format = container_format(head)
+        if audio_format == 'unknown':
+            raise UploadError(
+                415, "Invalid file type. Upload WAV, MP3, WebM, Ogg, MP4 or FLAC audio."
+            )
+        logger.info(f"Receiving {audio_format} audio upload: {upload.filename}")
         
-        # Basic file size validation (e.g., max 10MB)
-        if file_size > 10 * 1024 * 1024:  # 10MB
+        # Convert speech to text, decoding as the upload arrives
+        try:
+            # Includes waiting for the rest of the upload, which recognition overlaps
+            with stage("asr"):
+                transcript = await speech_service.transcribe_upload(upload.chunks())
+        except PoolSaturated:
             raise HTTPException(
-                status_code=400,
-                detail="File size too large. Maximum size is 10MB."
+                status_code=503,
+                detail="Speech recognition is busy. Please retry shortly.",
+                headers={"Retry-After": "1"}
             )
-        
-        # Convert speech to text
-        transcript = await speech_service.speech_to_text(audio_content)
+        user_id, session_id = upload.fields.get("user_id"), upload.fields.get("session_id")
         if not transcript:
             raise HTTPException(
                 status_code=400,
@@ -75,27 +155,45 @@ async def process_audio_upload(
         logger.info(f"Transcribed text: {transcript[:100]}...")
         
         # Detect language
-        source_lang = translation_service.detect_language(transcript)
+        with stage("detect_language"):
+            source_lang = await run_blocking(translation_service.detect_language, transcript)
         if not validate_language_code(source_lang):
             raise HTTPException(
                 status_code=400,
                 detail=f"Language {source_lang} is not supported"
             )
         
-        # Process query
-        english_prompt = translation_service.translate_to_english(
-            transcript, source_lang
-        )
-        context = rag_service.get_relevant_context(english_prompt)
-        english_response = await llm_service.generate_response(english_prompt, context)
-        final_response = translation_service.translate_from_english(
-            english_response, source_lang
-        )
+        # Process query; blocking steps run on the pipeline thread pool
+        with stage("translate_to_english"):
+            english_prompt = await run_blocking(
+                translation_service.translate_to_english, transcript, source_lang
+            )
+        with stage("retrieve"):
+            retrieval = await run_blocking(rag_service.retrieve, english_prompt)
+        with stage("generate"):
+            english_response = await generate_answer(
+                english_prompt, retrieval, session=session_key(user_id, session_id)
+            )
+        with stage("translate_from_english"):
+            final_response = await run_blocking(
+                translation_service.translate_from_english, english_response, source_lang
+            )
+        
+        tts = speech_service.tts
+        representation = negotiate(accept, ["application/json", tts.media_type, "multipart/mixed"])
+        if representation != "application/json":
+            metadata = {
+                "question": transcript,
+                "llm_response": final_response,
+                "detected_language": source_lang
+            }
+            return await binary_audio_response(representation, metadata, final_response, source_lang)
         
         # Convert response to speech (raw bytes)
-        audio_response = await speech_service.text_to_speech(
-            final_response, source_lang
-        )
+        with stage("tts"):
+            audio_response = await speech_service.text_to_speech(
+                final_response, source_lang
+            )
         
         if not audio_response:
             raise HTTPException(
@@ -115,6 +213,8 @@ async def process_audio_upload(
         
     except HTTPException:
         raise
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error(f"Error processing audio: {str(e)}")
         raise HTTPException(
@@ -122,6 +222,54 @@ async def process_audio_upload(
             detail=f"Error processing audio: {str(e)}"
         )
     
+async def binary_audio_response(representation: str, metadata: dict, text: str, lang: str) -> StreamingResponse:
+    """
+    Spoken answer as raw audio or multipart/mixed, without base64 or JSON encoding of the audio
+    Args:
+        representation (str): The TTS media type or "multipart/mixed"
+        metadata (dict): question, llm_response and detected_language
+        text (str): Text to speak
+        lang (str): Language code
+    """
+    tts = speech_service.tts
+    if tts.backend.streamable:
+        clips = tts.stream(text, lang)
+    else:
+        async def whole_file():
+            yield await tts.text_to_speech(text, lang)
+        clips = whole_file()
+    
+    # Wait for the first clip, so a synthesis failure is still an HTTP error
+    try:
+        # Later clips are synthesized while earlier ones are sent
+        with stage("tts_first_clip"):
+            first = await clips.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    if not first:
+        await clips.aclose()
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to generate audio response"
+        )
+    
+    async def audio():
+        yield first
+        async for clip in clips:
+            yield clip
+    
+    headers = {"Vary": "Accept"}
+    if representation == "multipart/mixed":
+        boundary = new_boundary()
+        return StreamingResponse(
+            multipart_stream(metadata, tts.media_type, audio(), boundary),
+            media_type=f"multipart/mixed; boundary={boundary}",
+            headers=headers
+        )
+    return StreamingResponse(
+        audio(), media_type=tts.media_type, headers={**headers, **audio_headers(metadata)}
+    )
+
 @app.post("/api/query", response_model=TextResponse)
 @handle_error
 @timer_decorator
@@ -134,46 +282,408 @@ async def process_text_query(request: QueryRequest):
         )
     
     logger.info(f"Received text query: {request.prompt[:100]}...")
+    check_filters(request.filters)
     
-    if "book" in request.prompt.lower():
-        # If the prompt is exactly "yes" or "no", treat it as a confirmation response.
-        if request.prompt.lower().strip() in ["yes", "no"]:
-            # Call the booking function with the confirmation provided
-            booking_response = process_booking(request.prompt, confirmation=request.prompt.lower().strip())
-        else:
-            # Initial booking request – no confirmation yet.
-            booking_response = process_booking(request.prompt)
+    booking_response = booking_reply(request.prompt)
+    if booking_response is not None:
         return TextResponse(
             response=booking_response,
             detected_language="en"  # Adjust as needed if you want to detect/translate the language
         )
 
-    # Detect language
-    source_lang = translation_service.detect_language(request.prompt)
-    
-    # Translate to English if needed
-    english_prompt = translation_service.translate_to_english(
-        request.prompt, source_lang
-    )
-    
-    # Get relevant context using RAG
-    context = rag_service.get_relevant_context(english_prompt)
+    # Detect language, translate to English if needed and retrieve context
+    source_lang, english_prompt, retrieval = await prepare_query(request.prompt, request.filters)
     
-    # Generate response using Llama
-    english_response = await llm_service.generate_response(
-        english_prompt, context
-    )
+    # Generate response using Llama, unless a near-duplicate question was answered recently
+    with stage("generate"):
+        english_response = await generate_answer(
+            english_prompt, retrieval, session_key(request.user_id, request.session_id)
+        )
     
     # Translate response back if needed
-    final_response = translation_service.translate_from_english(
-        english_response, source_lang
-    )
+    with stage("translate_from_english"):
+        final_response = await run_blocking(
+            translation_service.translate_from_english, english_response, source_lang
+        )
     
     return TextResponse(
         response=final_response,
         detected_language=source_lang
     )
 
+def booking_reply(prompt: str) -> Optional[str]:
+    """The booking flow's reply, or None if the prompt is not about a booking"""
+    if "book" not in prompt.lower():
+        return None
+    with stage("booking"):
+        # If the prompt is exactly "yes" or "no", treat it as a confirmation response.
+        if prompt.lower().strip() in ["yes", "no"]:
+            # Call the booking function with the confirmation provided
+            return process_booking(prompt, confirmation=prompt.lower().strip())
+        # Initial booking request – no confirmation yet.
+        return process_booking(prompt)
+
+def answer_scope(retrieval: Retrieval) -> str:
+    """Cached answers are only shared between questions answered from the same chunks and filters"""
+    return SemanticResponseCache.scope(filters=retrieval.filters, chunks=retrieval.chunk_ids)
+
+async def uses_response_cache(session: SessionKey) -> bool:
+    """
+    Whether answers in this session may be read from and written to the response cache.
+    Answers shaped by a session's history or summary can carry the user's name
+    or policy details, so they are neither served from nor shared through it.
+    """
+    if response_cache is None:
+        return False
+    # An evicted session is reloaded from the database, so this may block
+    return not await run_blocking(llm_service.sessions.has_history, session)
+
+async def cached_answer(question: str, retrieval: Retrieval,
+                        session: SessionKey = DEFAULT_SESSION) -> Optional[str]:
+    """A cached English answer to a near-duplicate question, recorded in the session history"""
+    answer = response_cache.get(retrieval.embedding, answer_scope(retrieval), retrieval.generation)
+    if answer is not None:
+        await llm_service.remember(question, answer, session)
+    return answer
+
+def cache_answer(retrieval: Retrieval, answer: str):
+    if answer:
+        response_cache.put(retrieval.embedding, answer, answer_scope(retrieval), retrieval.generation)
+
+async def generate_answer(question: str, retrieval: Retrieval, session: SessionKey = DEFAULT_SESSION) -> str:
+    """English answer from the response cache, or from the LLM (which is then cached)"""
+    cacheable = await uses_response_cache(session)
+    answer = await cached_answer(question, retrieval, session) if cacheable else None
+    if answer is None:
+        answer = await llm_service.generate_response(question, retrieval.chunks, session)
+        if cacheable:
+            cache_answer(retrieval, answer)
+    return answer
+
+async def english_tokens(question: str, retrieval: Retrieval, session: SessionKey = DEFAULT_SESSION):
+    """Stream the English answer: the cached one in a single piece, else the LLM's tokens"""
+    cacheable = await uses_response_cache(session)
+    answer = await cached_answer(question, retrieval, session) if cacheable else None
+    if answer is not None:
+        yield answer
+        return
+    parts = []
+    async for token in llm_service.stream_response(question, retrieval.chunks, session):
+        parts.append(token)
+        yield token
+    if cacheable:
+        cache_answer(retrieval, "".join(parts))
+
+async def prepare_query(prompt: str, filters: Optional[dict] = None):
+    """
+    Detect the prompt's language, translate it to English and retrieve context
+    Returns:
+        Tuple[str, str, Retrieval]: Source language, English prompt, retrieval
+    """
+    with stage("detect_language"):
+        source_lang = await run_blocking(translation_service.detect_language, prompt)
+    with stage("translate_to_english"):
+        english_prompt = await run_blocking(
+            translation_service.translate_to_english, prompt, source_lang
+        )
+    with stage("retrieve"):
+        retrieval = await run_blocking(
+            rag_service.retrieve, english_prompt, filters=filters
+        )
+    return source_lang, english_prompt, retrieval
+
+async def booking_events(reply: str, speak: bool = False):
+    yield "meta", {"detected_language": "en"}
+    yield "delta", {"text": reply}
+    if speak:
+        # Booking replies repeat often, so their sentences usually come from the phrase cache
+        speaker = speech_service.tts.speaker("en")
+        speaker.feed(reply)
+        async for clip in speaker.finish():
+            yield "audio", clip
+    yield "done", {"response": reply, "detected_language": "en"}
+
+async def answer_events(english_prompt: str, retrieval: Retrieval, source_lang: str,
+                        session: SessionKey = DEFAULT_SESSION, speak: bool = False):
+    """
+    Events for one answer as (name, data): `meta`, then `delta` events as text
+    arrives, then `done` with the full response (or `error`).
+    English answers are relayed token by token, other languages a sentence at
+    a time, translated while the LLM keeps generating.
+    With `speak`, each finished sentence is also synthesized and sent as an
+    `audio` event (`index`, `text`, `media_type`, `audio` bytes) in order.
+    """
+    yield "meta", {"detected_language": source_lang}
+    parts = []
+    speaker = speech_service.tts.speaker(source_lang) if speak else None
+    started = time.perf_counter()
+    try:
+        pieces = english_tokens(english_prompt, retrieval, session)
+        if source_lang != 'en':
+            pieces = translate_sentences(
+                pieces,
+                lambda sentence: run_blocking(
+                    translation_service.translate_from_english, sentence, source_lang
+                )
+            )
+        async for text in pieces:
+            if not parts:
+                # What the user waits for before anything appears
+                tracer.observe("first_delta", time.perf_counter() - started)
+            parts.append(text)
+            yield "delta", {"text": text}
+            if speaker is not None:
+                speaker.feed(text)
+                for clip in speaker.ready():
+                    yield "audio", clip
+        if speaker is not None:
+            async for clip in speaker.finish():
+                yield "audio", clip
+        
+        tracer.observe("answer_stream", time.perf_counter() - started)
+        yield "done", {"response": "".join(parts), "detected_language": source_lang}
+    
+    except Exception as e:
+        logger.error(f"Error streaming response: {str(e)}")
+        yield "error", {"detail": str(e)}
+    finally:
+        if speaker is not None:
+            speaker.cancel()
+
+async def relay_answer(events):
+    """Format answer events as server-sent events; audio is base64 encoded"""
+    async for event, data in events:
+        if event == "audio":
+            data = {**data, "audio": base64.b64encode(data["audio"]).decode("ascii")}
+        yield sse_event(event, data)
+
+@app.post("/api/query/stream")
+@handle_error
+async def stream_text_query(request: QueryRequest):
+    """Process a text query, streaming the answer as server-sent events"""
+    if not request.prompt:
+        raise HTTPException(
+            status_code=400,
+            detail="Text prompt is required"
+        )
+    
+    logger.info(f"Received streaming text query: {request.prompt[:100]}...")
+    check_filters(request.filters)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    
+    booking_response = booking_reply(request.prompt)
+    if booking_response is not None:
+        return StreamingResponse(
+            relay_answer(booking_events(booking_response, request.speak)),
+            media_type="text/event-stream", headers=headers
+        )
+    
+    # Everything before generation runs up front, so failures still return an HTTP error
+    source_lang, english_prompt, retrieval = await prepare_query(request.prompt, request.filters)
+    
+    return StreamingResponse(
+        relay_answer(answer_events(
+            english_prompt, retrieval, source_lang,
+            session_key(request.user_id, request.session_id), request.speak
+        )),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+def is_open(websocket: WebSocket) -> bool:
+    """Neither side has closed the socket yet"""
+    return (websocket.client_state == WebSocketState.CONNECTED
+            and websocket.application_state == WebSocketState.CONNECTED)
+
+@app.websocket("/api/speech/stream")
+async def stream_speech(websocket: WebSocket):
+    """
+    Live speech recognition, then the answer, over one WebSocket.
+    
+    Client: an optional `{"type": "start", "format": "pcm16" | "webm" | "ogg",
+    "sample_rate": 8000 | 16000 | 44100 | 48000, "user_id": str, "session_id": str,
+    "speak": bool}` text message, binary audio frames while the user speaks,
+    then `{"type": "end"}`. An invalid control message closes the socket with 1003.
+    Server: `partial` and `segment` events during speech, `transcript` once the
+    audio ends, then the answer as `meta`, `delta`... and `done` (or `error`).
+    With `speak`, each spoken sentence is an `audio` message followed by a
+    binary frame with the clip.
+    """
+    await websocket.accept()
+    config = SpeechStreamStart()
+    recognition = None
+    
+    async def send(event: str, data: dict):
+        if event == "audio":
+            data = dict(data)
+            audio = data.pop("audio")
+            await websocket.send_json({"type": event, **data, "bytes": len(audio)})
+            await websocket.send_bytes(audio)
+            return
+        await websocket.send_json({"type": event, **data})
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                    if not isinstance(control, dict):
+                        raise ValueError("Control messages are JSON objects")
+                    if control.get("type") == "start" and recognition is None:
+                        config = SpeechStreamStart.model_validate(control)
+                except ValueError:
+                    # Includes pydantic's ValidationError; 1003 is "unsupported data"
+                    await websocket.close(code=1003, reason="Invalid control message")
+                    return
+                if control.get("type") == "end":
+                    break
+                continue
+            
+            if recognition is None:
+                try:
+                    recognition = speech_service.open_stream(config.format, config.sample_rate)
+                except PoolSaturated:
+                    # 1013: try again later
+                    await websocket.close(code=1013, reason="Speech recognition is busy")
+                    return
+            for event in await recognition.feed(message.get("bytes") or b""):
+                await send(event.pop("type"), event)
+            if recognition.audio_seconds > settings.SPEECH_STREAM_MAX_SECONDS:
+                # Long recordings are cut off rather than held open indefinitely
+                break
+        
+        # Time from the end of speech to the final transcript
+        with stage("asr_finish"):
+            transcript = await recognition.finish() if recognition else ""
+        await send("transcript", {"text": transcript})
+        if not transcript:
+            await send("error", {"detail": "Could not transcribe audio. Please ensure clear audio quality."})
+            return
+        logger.info(f"Streamed transcript: {transcript[:100]}...")
+        
+        # Retrieval starts as soon as the final transcript is known
+        booking_response = booking_reply(transcript)
+        if booking_response is not None:
+            events = booking_events(booking_response, config.speak)
+        else:
+            source_lang, english_prompt, retrieval = await prepare_query(transcript)
+            events = answer_events(
+                english_prompt, retrieval, source_lang,
+                session=session_key(config.user_id, config.session_id),
+                speak=config.speak
+            )
+        async for event, data in events:
+            await send(event, data)
+    
+    except WebSocketDisconnect:
+        logger.info("Speech stream closed by the client")
+    except Exception as e:
+        logger.error(f"Error in speech stream: {str(e)}")
+        if is_open(websocket):
+            await send("error", {"detail": str(e)})
+    finally:
+        if recognition is not None:
+            recognition.close()
+        if is_open(websocket):
+            await websocket.close()
+
+@app.post("/api/search/batch", response_model=BatchSearchResponse)
+@handle_error
+@timer_decorator
+async def search_batch(request: BatchSearchRequest):
+    """Retrieve the top chunks for many English queries in one scan"""
+    # Query count and top_k are bounded by BatchSearchRequest
+    check_filters(request.filters)
+    
+    top_k = request.top_k or settings.TOP_K_RESULTS
+    results = await run_blocking(
+        rag_service.search_batch, request.queries, top_k=top_k, filters=request.filters
+    )
+    return BatchSearchResponse(results=results)
+
+def check_filters(filters: Optional[dict]):
+    unknown = set(filters or {}) - set(CATEGORICAL_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown filter fields {sorted(unknown)}. Allowed: {list(CATEGORICAL_FIELDS)}"
+        )
+
+def check_admin_token(token: Optional[str]):
+    if settings.ADMIN_TOKEN and token != settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin token"
+        )
+
+@app.post("/api/admin/reload")
+async def reload_index(x_admin_token: Optional[str] = Header(None)):
+    """Rebuild the search index from embeddings_output in the background"""
+    check_admin_token(x_admin_token)
+    started = index_reloader.request_reload()
+    return {"started": started, **index_reloader.status()}
+
+@app.get("/api/admin/index")
+async def index_status(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    return index_reloader.status()
+
+@app.get("/api/admin/cache")
+async def cache_status(x_admin_token: Optional[str] = Header(None)):
+    """Response cache size and hit-rate counters"""
+    check_admin_token(x_admin_token)
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+@app.delete("/api/admin/cache")
+async def clear_cache(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    if response_cache is not None:
+        response_cache.clear()
+    return {"cleared": response_cache is not None}
+
+@app.get("/api/admin/sessions")
+async def session_status(x_admin_token: Optional[str] = Header(None)):
+    """Resident sessions, write-behind queue depth and eviction counters"""
+    check_admin_token(x_admin_token)
+    return llm_service.sessions.stats()
+
+@app.get("/api/admin/translation")
+async def translation_status(x_admin_token: Optional[str] = Header(None)):
+    """Translation backend calls and sentence cache hit rates"""
+    check_admin_token(x_admin_token)
+    return translation_service.stats()
+
+@app.get("/api/admin/speech")
+async def speech_status(x_admin_token: Optional[str] = Header(None)):
+    """Recognizer pool load (in-flight and queued uploads, rejections, wait, processing time) and TTS cache counters"""
+    check_admin_token(x_admin_token)
+    return speech_service.stats()
+
+@app.get("/api/admin/prompt")
+async def prompt_status(x_admin_token: Optional[str] = Header(None)):
+    """Prompt tokens sent, tokens saved by summaries and the budget, summary counters"""
+    check_admin_token(x_admin_token)
+    return llm_service.prompt_stats()
+
+def pipeline_gauges() -> dict:
+    pool = speech_service.pool
+    return {
+        "rag_asr_in_flight": ("Uploads being transcribed or waiting for a recognizer", pool.in_flight),
+        "rag_asr_queue_depth": ("Uploads waiting for a recognizer worker", pool.queue_depth),
+    }
+
+tracer.register_gauges(pipeline_gauges)
+
+@app.get("/api/metrics")
+async def metrics():
+    """Per-stage and per-route latency histograms in Prometheus text format"""
+    return PlainTextResponse(tracer.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/health")
 async def health_check():
     return {
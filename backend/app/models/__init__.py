@@ -1,2 +1,2 @@
 # app/models/__init__.py
-from .schemas import QueryRequest, TextResponse, AudioResponse
\ No newline at end of file
+from .schemas import QueryRequest, TextResponse, AudioResponse, BatchSearchRequest, BatchSearchResponse
\ No newline at end of file
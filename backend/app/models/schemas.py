@@ -1,9 +1,25 @@
 # app/models/schemas.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Union
+from app.config import settings
+
+# Metadata filters: field (company, category, file_name) -> one value or a list of values
+SearchFilters = Dict[str, Union[str, List[str]]]
 
 class QueryRequest(BaseModel):
     prompt: Optional[str] = None
+    filters: Optional[SearchFilters] = None
+    user_id: Optional[str] = Field(None, max_length=128)
+    session_id: Optional[str] = Field(None, max_length=128)
+    speak: bool = False  # /api/query/stream: also send the answer as audio, a sentence at a time
+
+class SpeechStreamStart(BaseModel):
+    """The optional `start` message of /api/speech/stream"""
+    format: Literal["pcm16", "webm", "ogg"] = "pcm16"
+    sample_rate: Literal[8000, 16000, 44100, 48000] = 16000  # of raw PCM; compressed audio is resampled
+    user_id: Optional[str] = Field(None, max_length=128)
+    session_id: Optional[str] = Field(None, max_length=128)
+    speak: bool = False
 
 class TextResponse(BaseModel):
     response: str
@@ -13,4 +29,19 @@ class AudioResponse(BaseModel):
     audio_content: bytes
     detected_language: str
     question: Optional[str] = None
-    llm_response: Optional[str] = None
\ No newline at end of file
+    llm_response: Optional[str] = None
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=settings.MAX_BATCH_QUERIES)
+    top_k: Optional[int] = Field(None, ge=1, le=settings.MAX_TOP_K)
+    filters: Optional[SearchFilters] = None
+
+class SearchResult(BaseModel):
+    similarity: float
+    text: str
+    company: str
+    category: str
+    file_name: str
+
+class BatchSearchResponse(BaseModel):
+    results: List[List[SearchResult]]
\ No newline at end of file
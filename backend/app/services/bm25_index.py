@@ -0,0 +1,178 @@
+# app/services/bm25_index.py
+from collections import Counter
+from pathlib import Path
+import logging
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_FILE = 'bm25.npz'
+
+# Alphanumeric runs, so UIN codes like 512N266V02 stay a single token
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset(
+    'a an and are as at be by do for from how i in is it me my of on or the this to what '
+    'when where which who why will with you your about tell'.split()
+)
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def bm25_path(store_path) -> Path:
+    # Kept inside the corpus directory, so rewriting the corpus also drops a stale index
+    return Path(store_path) / BM25_FILE
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk texts, stored as a CSR inverted index:
+    term -> (doc ids, term frequencies), with per-document lengths.
+    """
+
+    def __init__(self, vocabulary: dict, offsets, doc_ids, term_freqs, doc_lengths,
+                 k1: float = 1.5, b: float = 0.75, fingerprint: str = ''):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        # Fingerprint of the corpus the index was built from (CorpusStore.fingerprint)
+        self.fingerprint = fingerprint
+
+        n = len(doc_lengths)
+        doc_freqs = np.diff(offsets)
+        self.idf = np.log(1 + (n - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = doc_lengths.mean() if n else 0.0
+        # Length normalisation per document, precomputed once
+        self.norms = (k1 * (1 - b + b * doc_lengths / avg_length)).astype(np.float32) if n else doc_lengths
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, texts, **kwargs) -> "BM25Index":
+        """Build from an iterable of chunk texts, in corpus row order"""
+        vocabulary = {}
+        term_ids, doc_ids, term_freqs, doc_lengths = [], [], [], []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, freq in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(doc_id)
+                term_freqs.append(freq)
+
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind='stable')
+        counts = np.bincount(term_ids, minlength=len(vocabulary))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(
+            vocabulary,
+            offsets,
+            np.asarray(doc_ids, dtype=np.int32)[order],
+            np.asarray(term_freqs, dtype=np.float32)[order],
+            np.asarray(doc_lengths, dtype=np.float32),
+            **kwargs
+        )
+
+    def scores(self, query: str):
+        """
+        BM25 scores for every document matching at least one query term
+        Returns:
+            tuple: (doc ids, scores); empty when no term is in the vocabulary
+        """
+        term_ids = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not term_ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        ids, partial = [], []
+        for t in term_ids:
+            docs = self.doc_ids[self.offsets[t]:self.offsets[t + 1]]
+            tf = self.term_freqs[self.offsets[t]:self.offsets[t + 1]]
+            ids.append(docs)
+            partial.append(self.idf[t] * tf * (self.k1 + 1) / (tf + self.norms[docs]))
+        matched, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        totals = np.zeros(len(matched), dtype=np.float32)
+        np.add.at(totals, inverse, np.concatenate(partial))
+        return matched, totals
+
+    def search(self, query: str, top_k: int = 3, rows=None):
+        """
+        Args:
+            query (str): Query text
+            top_k (int): Number of results to return
+            rows (np.ndarray): Optional sorted doc ids to restrict the search to
+        Returns:
+            tuple: (scores, doc ids), best first
+        """
+        ids, scores = self.scores(query)
+        if rows is not None:
+            keep = np.isin(ids, rows, assume_unique=True)
+            ids, scores = ids[keep], scores[keep]
+        if len(ids) > top_k:
+            best = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            best = np.arange(len(ids))
+        best = best[np.argsort(scores[best])[::-1]]
+        return scores[best], ids[best].astype(np.int64)
+
+    def save(self, path):
+        # Terms are newline-joined UTF-8 in id order; a fixed-width string array would pad to the longest term
+        terms = '\n'.join(sorted(self.vocabulary, key=self.vocabulary.get)).encode('utf-8')
+        np.savez(path, terms=np.frombuffer(terms, dtype=np.uint8), offsets=self.offsets,
+                 doc_ids=self.doc_ids, term_freqs=self.term_freqs, doc_lengths=self.doc_lengths,
+                 fingerprint=self.fingerprint)
+
+    @classmethod
+    def load(cls, path, **kwargs) -> "BM25Index":
+        with np.load(path) as arrays:
+            terms = arrays['terms'].tobytes().decode('utf-8').split('\n') if arrays['terms'].size else []
+            vocabulary = {term: i for i, term in enumerate(terms)}
+            fingerprint = str(arrays['fingerprint']) if 'fingerprint' in arrays.files else ''
+            return cls(vocabulary, arrays['offsets'], arrays['doc_ids'], arrays['term_freqs'],
+                       arrays['doc_lengths'], fingerprint=fingerprint, **kwargs)
+
+
+def build_bm25(store) -> BM25Index:
+    return BM25Index.build((store.text(i) for i in range(len(store))), fingerprint=store.fingerprint)
+
+
+def load_bm25(store) -> BM25Index:
+    """
+    Load the BM25 index saved with the corpus, rebuilding from the chunk texts
+    if it is missing or was built for another corpus
+    """
+    path = bm25_path(store.path)
+    if path.exists():
+        index = BM25Index.load(path)
+        # Same row count is not enough: a re-ingest can replace every chunk
+        if len(index) == len(store) and index.fingerprint == store.fingerprint:
+            return index
+        logger.warning(
+            f"BM25 index at {path} is stale ({len(index)} docs, fingerprint {index.fingerprint}), rebuilding"
+        )
+    else:
+        logger.info(f"No BM25 index at {path}, building from corpus texts")
+    return build_bm25(store)
+
+
+def reciprocal_rank_fusion(rankings, weights=None, k: int = 60) -> dict:
+    """
+    Fuse ranked id lists: score(id) = sum(weight / (k + rank))
+    Args:
+        rankings (list): Lists of ids, best first
+        weights (list): Optional weight per ranking
+        k (int): Damping constant; larger values flatten rank differences
+    Returns:
+        dict: id -> fused score
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, idx in enumerate(ranking):
+            fused[int(idx)] = fused.get(int(idx), 0.0) + weight / (k + rank + 1)
+    return fused
@@ -0,0 +1,363 @@
+# app/services/corpus_store.py
+"""
+Binary on-disk corpus format shared by the ingestion pipeline and the searcher.
+
+A corpus directory holds:
+    vectors.npy        float32 (n x dim), rows normalized to unit length
+    texts.bin          UTF-8 chunk texts, concatenated
+    text_offsets.npy   int64 (n + 1) byte offsets into texts.bin
+    <field>_codes.npy  integer codes for each categorical field
+    chunk_idx.npy      int32 chunk position within its PDF
+    source_codes.npy   int32 code of each row's source PDF (its ingestion manifest key)
+    corpus.json        row count, dimension, vector fingerprint and the dictionaries
+                       for each field and for the sources
+
+Everything is opened memory-mapped, so every worker process reading the same
+corpus shares one copy in the page cache. Each write goes to a new versioned
+directory next to it (corpus.v<timestamp>), and `corpus` is a symlink that is
+swapped to the new version with a single os.replace, so the path always
+exists and readers never see a partial or missing corpus.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .vector_index import normalize_rows, vector_fingerprint
+
+CORPUS_DIRNAME = 'corpus'
+HEADER_FILE = 'corpus.json'
+FORMAT_VERSION = 1
+CATEGORICAL_FIELDS = ('company', 'category', 'file_name')
+
+logger = logging.getLogger(__name__)
+
+
+def corpus_path(embeddings_dir) -> Path:
+    return Path(embeddings_dir) / CORPUS_DIRNAME
+
+
+def corpus_versions(path) -> list:
+    """Versioned directories written for the corpus at `path`, oldest first"""
+    path = Path(path)
+    return sorted(path.parent.glob(f'{path.name}.v*'), key=lambda p: p.name)
+
+
+class CorpusStore:
+    """Read-only view over a corpus: vectors, texts and categorical metadata"""
+
+    def __init__(self, vectors, text_offsets, text_blob, codes, values, chunk_idx, path=None, fingerprint=None,
+                 source_codes=None, sources=None):
+        self.vectors = vectors
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob
+        self.codes = codes
+        self.values = values
+        self.chunk_idx = chunk_idx
+        # None for legacy files and corpora written before sources were recorded
+        self.source_codes = source_codes
+        self.sources = sources
+        self.path = path
+        self._fingerprint = fingerprint
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def fingerprint(self) -> str:
+        """`vector_fingerprint` of the vectors; persisted indexes are checked against it"""
+        if self._fingerprint is None:
+            # Legacy files and corpora written before the header carried it
+            self._fingerprint = vector_fingerprint(self.vectors)
+        return self._fingerprint
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def text(self, idx: int) -> str:
+        start, end = self.text_offsets[idx], self.text_offsets[idx + 1]
+        return bytes(self.text_blob[start:end]).decode('utf-8')
+
+    def field(self, name: str, idx: int) -> str:
+        return self.values[name][self.codes[name][idx]]
+
+    def source(self, idx: int) -> str:
+        """Source PDF of a row, '' when unknown"""
+        if self.sources is None:
+            return ''
+        return self.sources[self.source_codes[idx]]
+
+    def record(self, idx: int) -> dict:
+        """All metadata for one row, in the layout of metadata.csv"""
+        record = {name: self.field(name, idx) for name in CATEGORICAL_FIELDS}
+        record['chunk_idx'] = int(self.chunk_idx[idx])
+        record['text'] = self.text(idx)
+        return record
+
+    @classmethod
+    def open(cls, path) -> "CorpusStore":
+        """Memory-map a corpus directory written by CorpusWriter"""
+        # Pin the current version, so every file comes from the same write
+        path = Path(path).resolve()
+        with open(path / HEADER_FILE) as f:
+            header = json.load(f)
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported corpus format version {header.get('version')} at {path}")
+
+        # np.asarray drops the memmap subclass (and its per-operation overhead) without copying
+        def load(name):
+            return np.asarray(np.load(path / name, mmap_mode='r'))
+
+        if header['count'] and os.path.getsize(path / 'texts.bin'):
+            text_blob = np.asarray(np.memmap(path / 'texts.bin', dtype=np.uint8, mode='r'))
+        else:
+            text_blob = np.empty(0, dtype=np.uint8)
+        return cls(
+            vectors=load('vectors.npy'),
+            text_offsets=load('text_offsets.npy'),
+            text_blob=text_blob,
+            codes={name: load(f'{name}_codes.npy') for name in CATEGORICAL_FIELDS},
+            values=header['values'],
+            chunk_idx=load('chunk_idx.npy'),
+            path=path,
+            fingerprint=header.get('fingerprint'),
+            source_codes=load('source_codes.npy') if 'sources' in header else None,
+            sources=header.get('sources')
+        )
+
+    @classmethod
+    def from_legacy(cls, embeddings_dir) -> "CorpusStore":
+        """Build an in-memory store from embeddings.npy + metadata.csv"""
+        embeddings_dir = Path(embeddings_dir)
+        embeddings = np.load(embeddings_dir / 'embeddings.npy')
+        metadata = pd.read_csv(embeddings_dir / 'metadata.csv')
+
+        encoded = [t.encode('utf-8') for t in metadata['text'].fillna('').astype(str)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(t) for t in encoded])
+        codes, values = {}, {}
+        for name in CATEGORICAL_FIELDS:
+            column = pd.Categorical(metadata[name].astype(str))
+            codes[name] = column.codes.astype(np.int16)
+            values[name] = list(column.categories)
+        return cls(
+            vectors=normalize_rows(embeddings),
+            text_offsets=offsets,
+            text_blob=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            codes=codes,
+            values=values,
+            chunk_idx=metadata['chunk_idx'].to_numpy(dtype=np.int32),
+            path=embeddings_dir
+        )
+
+
+def open_corpus(embeddings_dir) -> CorpusStore:
+    """
+    Open the binary corpus if present, falling back to the legacy npy + csv
+    files only when no binary corpus was ever written
+    Raises:
+        FileNotFoundError: When a binary corpus exists but cannot be read
+    """
+    path = corpus_path(embeddings_dir)
+    if (path / HEADER_FILE).exists():
+        return CorpusStore.open(path)
+    if os.path.lexists(path) or corpus_versions(path):
+        # Loading the legacy files here would silently serve stale data
+        raise FileNotFoundError(f"Binary corpus at {path} is incomplete")
+    logger.warning(f"No binary corpus at {path}, loading legacy embeddings.npy + metadata.csv")
+    return CorpusStore.from_legacy(embeddings_dir)
+
+
+class CorpusWriter:
+    """
+    Append-only writer for a corpus directory.
+    Every column is streamed to a raw file as rows arrive, so memory stays
+    flat however large the corpus grows. finish() converts the raw files to
+    .npy arrays, and close() then atomically replaces any existing corpus at
+    `path`; indexes can be built from the finished store in between.
+    """
+    # Raw column files and their on-disk dtype while writing
+    COLUMNS = {
+        'text_offsets': np.int64,
+        'chunk_idx': np.int32,
+        'source_codes': np.int32,
+        **{f'{name}_codes': np.int32 for name in CATEGORICAL_FIELDS},
+    }
+    COPY_BLOCK = 65536
+
+    def __init__(self, path, dim: int):
+        self.path = Path(path)
+        self.dim = dim
+        self.tmp_path = self.path.with_name(f'{self.path.name}.tmp-{os.getpid()}')
+        if self.tmp_path.exists():
+            shutil.rmtree(self.tmp_path)
+        self.tmp_path.mkdir(parents=True)
+
+        self._vectors = open(self.tmp_path / 'vectors.raw', 'wb')
+        self._texts = open(self.tmp_path / 'texts.bin', 'wb')
+        self._columns = {name: open(self.tmp_path / f'{name}.raw', 'wb') for name in self.COLUMNS}
+        self._columns['text_offsets'].write(np.zeros(1, dtype=np.int64).tobytes())
+        self._text_size = 0
+        self._lookup = {name: {} for name in CATEGORICAL_FIELDS}
+        self._sources = {}
+        self._digest = hashlib.sha1()
+        self._finished = False
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, vector: np.ndarray, record: dict):
+        """Add one row; `record` holds text, chunk_idx, the categorical fields and optionally its source"""
+        self.append_many(np.asarray(vector).reshape(1, -1), [record])
+
+    def append_many(self, vectors: np.ndarray, records: list):
+        vectors = normalize_rows(np.asarray(vectors).reshape(-1, self.dim))
+        if len(vectors) != len(records):
+            raise ValueError("Number of vectors and records must match")
+        data = vectors.tobytes()
+        self._vectors.write(data)
+        # Row-major float32 bytes, so this matches vector_fingerprint of the finished corpus
+        self._digest.update(data)
+
+        encoded = [str(record['text']).encode('utf-8') for record in records]
+        self._texts.write(b''.join(encoded))
+        offsets = self._text_size + np.cumsum([len(t) for t in encoded], dtype=np.int64)
+        if len(offsets):
+            self._text_size = int(offsets[-1])
+        self._columns['text_offsets'].write(offsets.tobytes())
+        self._columns['chunk_idx'].write(
+            np.array([int(record.get('chunk_idx', 0)) for record in records], dtype=np.int32).tobytes()
+        )
+        for name in CATEGORICAL_FIELDS:
+            lookup = self._lookup[name]
+            codes = [lookup.setdefault(str(record[name]), len(lookup)) for record in records]
+            self._columns[f'{name}_codes'].write(np.array(codes, dtype=np.int32).tobytes())
+        codes = [self._sources.setdefault(str(record.get('source', '')), len(self._sources)) for record in records]
+        self._columns['source_codes'].write(np.array(codes, dtype=np.int32).tobytes())
+        self.count += len(records)
+
+    def _close_files(self):
+        self._vectors.close()
+        self._texts.close()
+        for f in self._columns.values():
+            f.close()
+
+    def abort(self):
+        self._close_files()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def _finalize(self, raw_name, npy_name, dtype, shape, out_dtype=None):
+        """Copy a raw column into a .npy in blocks, keeping memory flat"""
+        raw_path = self.tmp_path / raw_name
+        out = np.lib.format.open_memmap(
+            self.tmp_path / npy_name, mode='w+', dtype=out_dtype or dtype, shape=shape
+        )
+        if shape[0]:
+            raw = np.memmap(raw_path, dtype=dtype, mode='r', shape=shape)
+            for start in range(0, shape[0], self.COPY_BLOCK):
+                out[start:start + self.COPY_BLOCK] = raw[start:start + self.COPY_BLOCK]
+            del raw
+        out.flush()
+        del out
+        raw_path.unlink()
+
+    def finish(self) -> CorpusStore:
+        """
+        Write the .npy arrays and header into the temporary directory
+        Returns:
+            CorpusStore: The new corpus, readable before close() swaps it in
+        """
+        if self._finished:
+            return CorpusStore.open(self.tmp_path)
+        self._close_files()
+
+        self._finalize('vectors.raw', 'vectors.npy', np.float32, (self.count, self.dim))
+        self._finalize('text_offsets.raw', 'text_offsets.npy', np.int64, (self.count + 1,))
+        self._finalize('chunk_idx.raw', 'chunk_idx.npy', np.int32, (self.count,))
+        self._finalize('source_codes.raw', 'source_codes.npy', np.int32, (self.count,))
+        for name in CATEGORICAL_FIELDS:
+            out_dtype = np.int16 if len(self._lookup[name]) <= np.iinfo(np.int16).max else np.int32
+            self._finalize(f'{name}_codes.raw', f'{name}_codes.npy', np.int32, (self.count,), out_dtype)
+
+        header = {
+            'version': FORMAT_VERSION,
+            'count': self.count,
+            'dim': self.dim,
+            'fingerprint': self._digest.hexdigest(),
+            'values': {name: list(self._lookup[name]) for name in CATEGORICAL_FIELDS},
+            'sources': list(self._sources),
+        }
+        with open(self.tmp_path / HEADER_FILE, 'w') as f:
+            json.dump(header, f)
+        self._finished = True
+        return CorpusStore.open(self.tmp_path)
+
+    def close(self):
+        self.finish()
+
+        version = self.path.with_name(f'{self.path.name}.v{time.time_ns()}')
+        os.rename(self.tmp_path, version)
+        self._swap_link(version)
+        # Readers that already opened an older version keep their memory maps
+        for old in corpus_versions(self.path):
+            if old != version:
+                shutil.rmtree(old, ignore_errors=True)
+        logger.info(f"Wrote corpus with {self.count} chunks to {version}")
+
+    def _swap_link(self, version: Path):
+        """Point the `path` symlink at `version` with one atomic os.replace"""
+        link = self.path.with_name(f'{self.path.name}.tmp-{os.getpid()}.link')
+        if os.path.lexists(link):
+            os.unlink(link)
+        # Relative, so the embeddings directory can be moved or mounted elsewhere
+        os.symlink(version.name, link)
+        if self.path.is_dir() and not self.path.is_symlink():
+            # A corpus written before versioned directories: move it aside once.
+            # open_corpus fails rather than falls back while `path` is missing.
+            os.rename(self.path, self.path.with_name(f'{self.path.name}.v0'))
+        os.replace(link, self.path)
+
+
+def copy_rows(store: CorpusStore, rows, writer: CorpusWriter, block: int = 4096):
+    """Stream the given rows of `store` into `writer`"""
+    for start in range(0, len(rows), block):
+        batch = rows[start:start + block]
+        writer.append_many(store.vectors[batch], [
+            {**store.record(idx), 'source': store.source(idx)} for idx in batch
+        ])
+
+
+def convert_legacy(embeddings_dir) -> Path:
+    """Convert embeddings.npy + metadata.csv in `embeddings_dir` into a binary corpus"""
+    store = CorpusStore.from_legacy(embeddings_dir)
+    path = corpus_path(embeddings_dir)
+    with CorpusWriter(path, store.dim) as writer:
+        copy_rows(store, np.arange(len(store)), writer)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert embeddings.npy + metadata.csv into a binary corpus.")
+    parser.add_argument("embeddings_dir", nargs='?', default='embeddings_output')
+    args = parser.parse_args()
+
+    path = convert_legacy(args.embeddings_dir)
+    store = CorpusStore.open(path)
+    print(f"Converted {len(store)} chunks ({store.dim} dims) to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
 # app/services/embedding_service.py
 import os
 from pathlib import Path
-import PyPDF2
-import fasttext
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
-import re
 import nltk
-from nltk.tokenize import sent_tokenize
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
+from app.config import settings
+from .model_provider import get_embedding_model
+from .ingestion import build_search_indexes, chunk_text, discover_pdfs, extract_pdf_text, preprocess_text
+from .ingestion import main as ingestion_main
+from .corpus_store import CATEGORICAL_FIELDS, CorpusWriter, corpus_path, open_corpus
+from .vector_index import FlatIndex, load_index, normalize_rows, search_subset
+from .bm25_index import load_bm25, reciprocal_rank_fusion
+from .facets import FacetIndex
+from .query_intent import QueryIntentExtractor
 nltk.download('punkt')
 nltk.download('punkt_tab')
 
@@ -18,185 +22,261 @@ class PDFEmbeddingGenerator:
     def __init__(self, base_dir, chunk_size=512):
         self.base_dir = Path(base_dir)
         self.chunk_size = chunk_size
-        self.companies = ['LIC', 'Maxlife']
-        self.categories = ['Health Plans', 'Insurance Plans', 'Pension Plans']
         
-        # Update model path to match EmbeddingSearcher
-        base_dir = Path(__file__).resolve().parent.parent  # This gets us to 'app' directory
-        model_path = base_dir / 'models' / 'cc.en.300.bin'
-        self.model = fasttext.load_model(str(model_path))
+        # Shared with EmbeddingSearcher, loaded once per process
+        self.model = get_embedding_model()
         
     def preprocess_text(self, text):
         """Clean and preprocess text"""
-        # Remove special characters and extra whitespace
-        text = re.sub(r'[^\w\s.]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return preprocess_text(text)
     
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from PDF file"""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in reader.pages:
-                    text += page.extract_text() + ' '
-                return self.preprocess_text(text)
-        except Exception as e:
-            print(f"Error processing {pdf_path}: {str(e)}")
-            return ''
+        text, _ = extract_pdf_text(pdf_path)
+        return text
     
     def chunk_text(self, text):
         """Split text into chunks using sentence boundaries"""
-        sentences = sent_tokenize(text)
-        chunks = []
-        current_chunk = ''
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= self.chunk_size:
-                current_chunk += sentence + ' '
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + ' '
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-            
-        return chunks
+        return chunk_text(text, self.chunk_size)
     
     def generate_embedding(self, text):
         """Generate FastText embedding for a text chunk"""
         return self.model.get_sentence_vector(text)
     
     def process_all_pdfs(self):
-        """Process all PDFs and generate embeddings"""
-        data = []
-        
-        for company in self.companies:
-            for category in self.categories:
-                folder_path = self.base_dir / company / category
-                if not folder_path.exists():
-                    continue
-                
-                pdf_files = list(folder_path.glob('*.pdf'))
-                for pdf_file in tqdm(pdf_files, desc=f"Processing {company}/{category}"):
-                    # Extract text from PDF
-                    text = self.extract_text_from_pdf(pdf_file)
-                    if not text:
-                        continue
-                    
-                    # Split into chunks
-                    chunks = self.chunk_text(text)
-                    
-                    # Generate embeddings for each chunk
-                    for chunk_idx, chunk in enumerate(chunks):
-                        embedding = self.generate_embedding(chunk)
-                        data.append({
-                            'company': company,
-                            'category': category,
-                            'file_name': pdf_file.name,
-                            'chunk_idx': chunk_idx,
-                            'text': chunk,
-                            'embedding': embedding
-                        })
-        
-        return pd.DataFrame(data)
+        """
+        Process every PDF under base_dir/<company>/<category> and generate embeddings
+        Yields:
+            dict: One record per chunk, including its 'embedding'
+        """
+        for source in tqdm(discover_pdfs(self.base_dir), desc="Processing PDFs"):
+            # Extract text from PDF
+            text = self.extract_text_from_pdf(source.path)
+            if not text:
+                continue
+            
+            # Split into chunks and embed them one at a time
+            for chunk_idx, chunk in enumerate(self.chunk_text(text)):
+                yield {
+                    'company': source.company,
+                    'category': source.category,
+                    'file_name': source.path.name,
+                    'chunk_idx': chunk_idx,
+                    'text': chunk,
+                    'source': source.key,
+                    'embedding': self.generate_embedding(chunk)
+                }
     
-    def save_embeddings(self, df, output_dir):
-        """Save embeddings and metadata"""
+    def save_embeddings(self, records, output_dir, batch_size=256):
+        """
+        Stream embedded chunk records into a binary corpus plus the search index
+        Args:
+            records (iterable): Records from process_all_pdfs (a DataFrame is also accepted)
+            output_dir (Path): Embeddings directory
+            batch_size (int): Rows appended to the corpus per write
+        Returns:
+            int: Number of chunks written
+        """
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict('records')
         
-        # Save embeddings as numpy array
-        embeddings = np.stack(df['embedding'].values)
-        np.save(output_dir / 'embeddings.npy', embeddings)
-        
-        # Save metadata without embeddings column
-        metadata = df.drop('embedding', axis=1)
-        metadata.to_csv(output_dir / 'metadata.csv', index=False)
+        store_path = corpus_path(output_dir)
+        with CorpusWriter(store_path, self.model.get_dimension()) as writer:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    writer.append_many(np.stack([r['embedding'] for r in batch]), batch)
+                    batch = []
+            if batch:
+                writer.append_many(np.stack([r['embedding'] for r in batch]), batch)
+            build_search_indexes(writer.finish(), output_dir)
+            count = writer.count
+        return count
 
 class EmbeddingSearcher:
-    def __init__(self, embeddings_dir):
+    def __init__(self, embeddings_dir, model=None):
         self.embeddings_dir = Path(embeddings_dir)
         self.logger = logging.getLogger(__name__)
         
         try:
-            # Load embeddings and metadata
-            self.embeddings = np.load(self.embeddings_dir / 'embeddings.npy')
-            self.metadata = pd.read_csv(self.embeddings_dir / 'metadata.csv')
+            # Memory-map the corpus so worker processes share one copy
+            self.store = open_corpus(self.embeddings_dir)
+            self.index = self._load_index()
+            self.bm25 = load_bm25(self.store)
+            self.facets = FacetIndex(self.store)
+            self.intent = QueryIntentExtractor(self.store.values)
             
-            # Update model path to point to app/models
-            base_dir = Path(__file__).resolve().parent.parent  # This gets us to 'app' directory
-            model_path = base_dir / 'models' / 'cc.en.300.bin'
-            
-            if not model_path.exists():
-                self.logger.error(f"FastText model not found at {model_path}")
-                raise FileNotFoundError(f"FastText model not found at {model_path}")
-                
-            self.model = fasttext.load_model(str(model_path))
+            self.model = model if model is not None else get_embedding_model()
             
         except Exception as e:
             self.logger.error(f"Error initializing EmbeddingSearcher: {str(e)}")
             raise
 
+    def _load_index(self):
+        # Corpus vectors are already normalized, so the flat index wraps them without copying
+        if settings.VECTOR_INDEX == FlatIndex.kind:
+            return FlatIndex(self.store.vectors, normalized=True)
+        return load_index(
+            self.embeddings_dir,
+            settings.VECTOR_INDEX,
+            embeddings=self.store.vectors,
+            fingerprint=self.store.fingerprint,
+            nlist=settings.IVF_NLIST,
+            nprobe=settings.IVF_NPROBE
+        )
+
+    def __len__(self):
+        return len(self.store)
+
+    def _result(self, score: float, idx: int) -> dict:
+        result = {'id': int(idx), 'similarity': float(score), 'text': self.store.text(idx)}
+        for field in CATEGORICAL_FIELDS:
+            result[field] = self.store.field(field, idx)
+        return result
+
+    def extract_filters(self, query: str) -> dict:
+        """Filters implied by the query, e.g. {'company': ['LIC'], 'category': ['Pension Plans']}"""
+        return self.intent.extract(query)
+
+    def _vector_search(self, query_embedding: np.ndarray, top_k: int, rows=None):
+        if rows is None:
+            return self.index.search(query_embedding, top_k)
+        scores, ids = search_subset(self.store.vectors, query_embedding.reshape(1, -1), rows, top_k)
+        return scores[0], ids[0]
+
+    def _ranked(self, query: str, query_embedding: np.ndarray, top_k: int, mode: str,
+                vector_hits=None, rows=None) -> list:
+        """
+        Rank chunks for one query under the given retrieval mode
+        Args:
+            query (str): Query text, used by BM25
+            query_embedding (np.ndarray): Normalized query vector
+            top_k (int): Number of results to return
+            mode (str): "vector", "bm25" or "hybrid"
+            vector_hits (tuple): Precomputed (scores, ids) vector candidates, e.g. from a batch search
+            rows (np.ndarray): Row ids allowed by the metadata filters, None for all rows
+        Returns:
+            list: Top k results; 'similarity' is always the cosine similarity,
+                  'score' the fused rank score in hybrid mode
+        """
+        if mode == 'vector':
+            scores, ids = vector_hits or self._vector_search(query_embedding, top_k, rows)
+            return [self._result(score, idx) for score, idx in zip(scores[:top_k], ids[:top_k])]
+
+        candidates = max(top_k, settings.HYBRID_CANDIDATES)
+        _, lexical_ids = self.bm25.search(query, candidates, rows=rows)
+        if mode == 'bm25':
+            ids = lexical_ids[:top_k]
+            fused = None
+        else:
+            _, vector_ids = vector_hits or self._vector_search(query_embedding, candidates, rows)
+            fused = reciprocal_rank_fusion(
+                [vector_ids, lexical_ids],
+                weights=[settings.HYBRID_VECTOR_WEIGHT, settings.HYBRID_BM25_WEIGHT],
+                k=settings.RRF_K
+            )
+            ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+        ids = np.asarray(ids, dtype=np.int64)
+        similarities = self.store.vectors[ids] @ query_embedding if len(ids) else []
+        results = []
+        for similarity, idx in zip(similarities, ids):
+            result = self._result(similarity, idx)
+            if fused is not None:
+                result['score'] = fused[int(idx)]
+            results.append(result)
+        return results
 
-    def search(self, query: str, top_k: int = 3) -> list:
+    def search_by_vector(self, query_embedding: np.ndarray, top_k: int = 3, filters: dict = None) -> list:
+        """
+        Search with an already computed query embedding
+        Args:
+            query_embedding (np.ndarray): Query vector, normalized here if needed
+            top_k (int): Number of results to return
+            filters (dict): Metadata filters, see FacetIndex
+        Returns:
+            list: Top k results with their metadata and similarity scores
+        """
+        query_embedding = normalize_rows(query_embedding)
+        scores, top_indices = self._vector_search(query_embedding, top_k, self.facets.rows(filters))
+        return [self._result(score, idx) for score, idx in zip(scores, top_indices)]
+
+    def embed_queries(self, queries: list) -> np.ndarray:
+        """Embed many queries into a (queries x dim) float32 matrix"""
+        return np.stack([self.model.get_sentence_vector(q) for q in queries]).astype(np.float32)
+
+    def search_batch(self, queries: list, top_k: int = 3, mode: str = None, filters: dict = None) -> list:
+        """
+        Search for many queries at once with a single matrix-matrix product
+        Args:
+            queries (list): Search queries
+            top_k (int): Number of results per query
+            mode (str): Retrieval mode, defaults to settings.RETRIEVAL_MODE
+            filters (dict): Metadata filters applied to every query, see FacetIndex
+        Returns:
+            list: One list of results per query, in input order
+        """
+        if not queries:
+            return []
+        mode = mode or settings.RETRIEVAL_MODE
+        try:
+            rows = self.facets.rows(filters)
+            # Nothing to score: skip embedding the queries
+            if not len(self.store) or (rows is not None and not len(rows)):
+                return [[] for _ in queries]
+            query_embeddings = normalize_rows(self.embed_queries(queries))
+            candidates = top_k if mode == 'vector' else max(top_k, settings.HYBRID_CANDIDATES)
+            if rows is None:
+                scores, top_indices = self.index.search_batch(query_embeddings, candidates)
+            else:
+                # Only the filtered slice is scored
+                scores, top_indices = search_subset(self.store.vectors, query_embeddings, rows, candidates)
+            return [
+                self._ranked(query, query_embedding, top_k, mode,
+                             vector_hits=(row_scores, row_indices), rows=rows)
+                for query, query_embedding, row_scores, row_indices
+                in zip(queries, query_embeddings, scores, top_indices)
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Error in batch similarity search: {str(e)}")
+            return [[] for _ in queries]
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Unit-length query embedding, as used by `search`"""
+        return normalize_rows(self.model.get_sentence_vector(query))
+
+    def search(self, query: str, top_k: int = 3, mode: str = None, filters: dict = None,
+               query_embedding: np.ndarray = None) -> list:
         """
         Search for most similar chunks to the query
         Args:
             query (str): Search query
             top_k (int): Number of results to return
+            mode (str): "vector", "bm25" or "hybrid"; defaults to settings.RETRIEVAL_MODE
+            filters (dict): Metadata filters, e.g. {'company': 'LIC', 'category': ['Pension Plans']}
+            query_embedding (np.ndarray): Output of `embed_query` for this query, if already computed
         Returns:
             list: Top k results with their metadata and similarity scores
         """
         try:
-            # Generate embedding for the query
-            query_embedding = self.model.get_sentence_vector(query)
-            
-            # Reshape for sklearn
-            query_embedding = query_embedding.reshape(1, -1)
-            
-            # Calculate cosine similarity
-            similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-            
-            # Get top k indices
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
-            
-            # Prepare results
-            results = []
-            for idx in top_indices:
-                result = {
-                    'similarity': float(similarities[idx]),
-                    'text': self.metadata.iloc[idx]['text'],
-                    'company': self.metadata.iloc[idx]['company'],
-                    'category': self.metadata.iloc[idx]['category'],
-                    'file_name': self.metadata.iloc[idx]['file_name']
-                }
-                results.append(result)
-            
-            return results
+            rows = self.facets.rows(filters)
+            if rows is not None and not len(rows):
+                return []
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            return self._ranked(query, query_embedding, top_k, mode or settings.RETRIEVAL_MODE, rows=rows)
             
         except Exception as e:
             self.logger.error(f"Error in similarity search: {str(e)}")
             return []
 
 def main():
-    # Set up paths
-    base_dir = Path('Hackathon')
-    output_dir = Path('../../embeddings_output')
-    
-    # Initialize generator
-    generator = PDFEmbeddingGenerator(base_dir)
-    
-    # Process PDFs and generate embeddings
-    df = generator.process_all_pdfs()
-    
-    # Save results
-    generator.save_embeddings(df, output_dir)
-    
-    print(f"Processed {len(df)} chunks from {df['file_name'].nunique()} PDFs")
-    print(f"Results saved to {output_dir}")
+    # Ingestion is parallel and incremental; see app/services/ingestion.py
+    ingestion_main()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+# app/services/facets.py
+import numpy as np
+from .corpus_store import CATEGORICAL_FIELDS
+
+
+class FacetIndex:
+    """
+    Precomputed row-id bitmaps for every value of the categorical fields, so a
+    filter resolves to the matching rows with a few bitwise operations instead
+    of a pass over the metadata.
+    Filters map a field to one value or a list of values; values of one field
+    are OR-ed, fields are AND-ed, and values match case-insensitively.
+    """
+
+    def __init__(self, store):
+        self.size = len(store)
+        self.bitmaps = {}
+        for name in CATEGORICAL_FIELDS:
+            codes = np.asarray(store.codes[name])
+            self.bitmaps[name] = {
+                value.lower(): np.packbits(codes == code)
+                for code, value in enumerate(store.values[name])
+            }
+
+    def values(self, name: str) -> list:
+        return list(self.bitmaps[name])
+
+    def bitmap(self, filters: dict):
+        """
+        Returns:
+            np.ndarray: Packed bitmap of the rows matching every filter, or None when there are no filters
+        """
+        combined = None
+        for name, wanted in (filters or {}).items():
+            if name not in self.bitmaps:
+                raise ValueError(f"Unknown filter field '{name}', expected one of {CATEGORICAL_FIELDS}")
+            if not wanted:
+                continue
+            if isinstance(wanted, str):
+                wanted = [wanted]
+            field_bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for value in wanted:
+                bits = self.bitmaps[name].get(str(value).lower())
+                if bits is not None:
+                    field_bits |= bits
+            combined = field_bits if combined is None else combined & field_bits
+        return combined
+
+    def rows(self, filters: dict):
+        """
+        Returns:
+            np.ndarray: Sorted ids of the rows matching every filter, or None when there are no filters
+        """
+        bits = self.bitmap(filters)
+        if bits is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
@@ -0,0 +1,127 @@
+# app/services/index_reloader.py
+import logging
+import threading
+import time
+from pathlib import Path
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from .embedding_service import EmbeddingSearcher
+
+
+class _EmbeddingsDirHandler(FileSystemEventHandler):
+    """Forward finished corpus/index writes to the reloader, ignoring in-progress temp dirs"""
+
+    def __init__(self, reloader):
+        self.reloader = reloader
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if any(p and '.tmp-' not in p for p in paths):
+            self.reloader.schedule_reload()
+
+
+class IndexReloader:
+    """
+    Rebuilds the searcher in a background thread when the embeddings directory
+    changes (or on request) and swaps it into the RAG service atomically.
+    Requests keep using the previous searcher until the new one is ready, so
+    readers are never blocked.
+    """
+
+    def __init__(self, rag_service, embeddings_dir, debounce: float = 2.0):
+        self.rag_service = rag_service
+        self.embeddings_dir = Path(embeddings_dir)
+        self.debounce = debounce
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._building = False
+        self._pending = False
+        self._observer = None
+        self.reloads = 0
+        self.last_reload = None
+        self.last_error = None
+
+    def start(self):
+        """Start watching the embeddings directory"""
+        if self._observer is not None:
+            return
+        self._observer = Observer()
+        self._observer.schedule(_EmbeddingsDirHandler(self), str(self.embeddings_dir), recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        self.logger.info(f"Watching {self.embeddings_dir} for index changes")
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def schedule_reload(self):
+        """Reload once the directory has been quiet for `debounce` seconds"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.request_reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def request_reload(self) -> bool:
+        """
+        Start a background rebuild now
+        Returns:
+            bool: False if a rebuild was already running (it will run again afterwards)
+        """
+        with self._lock:
+            self._timer = None
+            if self._building:
+                self._pending = True
+                return False
+            self._building = True
+        threading.Thread(target=self._rebuild_loop, name="index-reload", daemon=True).start()
+        return True
+
+    def _rebuild_loop(self):
+        while True:
+            self._rebuild()
+            with self._lock:
+                if not self._pending:
+                    self._building = False
+                    return
+                self._pending = False
+
+    def _rebuild(self):
+        start = time.perf_counter()
+        try:
+            # Reuse the already loaded embedding model; only the corpus and index are rebuilt
+            current = self.rag_service.searcher
+            searcher = EmbeddingSearcher(self.embeddings_dir, model=current.model)
+            self.rag_service.swap_searcher(searcher)
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_error = None
+            self.logger.info(
+                f"Swapped in index with {len(searcher)} chunks in {time.perf_counter() - start:.2f}s"
+            )
+        except Exception as e:
+            # Keep serving from the previous searcher
+            self.last_error = str(e)
+            self.logger.error(f"Index reload failed: {str(e)}")
+
+    def status(self) -> dict:
+        return {
+            'chunks': len(self.rag_service.searcher),
+            'generation': self.rag_service.generation,
+            'reloads': self.reloads,
+            'reloading': self._building,
+            'last_reload': self.last_reload,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,329 @@
+# app/services/ingestion.py
+"""
+Parallel, incremental PDF ingestion.
+
+PDFs are discovered as <data_dir>/.../<company>/<category>/*.pdf, text
+extraction and chunking run in a process pool, and a manifest of file hashes
+kept next to the corpus lets a re-run only re-process new or changed PDFs.
+Rows for unchanged PDFs are copied from the existing corpus.
+
+Every stage is a generator feeding a CorpusWriter, so peak memory does not
+grow with the number of PDFs ingested.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import itertools
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+import PyPDF2
+from nltk.tokenize import sent_tokenize
+from app.config import settings
+from .corpus_store import CorpusStore, CorpusWriter, copy_rows, corpus_path, HEADER_FILE
+from .vector_index import FlatIndex, build_index, index_path, save_index
+from .bm25_index import bm25_path, build_bm25
+
+MANIFEST_FILE = 'manifest.json'
+
+logger = logging.getLogger(__name__)
+
+
+class PdfSource(NamedTuple):
+    company: str
+    category: str
+    path: Path
+    key: str  # path relative to the data directory, used in the manifest
+
+
+def preprocess_text(text: str) -> str:
+    """Clean and preprocess text"""
+    # Remove special characters and extra whitespace
+    text = re.sub(r'[^\w\s.]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def extract_pdf_text(pdf_path):
+    """
+    Extract text from a PDF file
+    Returns:
+        tuple: (preprocessed text, page count); empty text if the PDF is unreadable
+    """
+    try:
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            pages = [page.extract_text() or '' for page in reader.pages]
+        return preprocess_text(' '.join(pages)), len(pages)
+    except Exception as e:
+        logger.error(f"Error processing {pdf_path}: {str(e)}")
+        return '', 0
+
+
+def chunk_text(text: str, chunk_size: int = 512) -> list:
+    """Split text into chunks using sentence boundaries"""
+    chunks = []
+    current = []
+    current_len = 0
+
+    for sentence in sent_tokenize(text):
+        if current and current_len + len(sentence) > chunk_size:
+            chunks.append(' '.join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def extract_and_chunk(path, chunk_size: int = 512) -> dict:
+    """Worker task: extract and chunk one PDF"""
+    text, pages = extract_pdf_text(path)
+    return {'pages': pages, 'chunks': chunk_text(text, chunk_size) if text else []}
+
+
+def discover_pdfs(data_dir) -> list:
+    """Every PDF under `data_dir`, labelled by its company and category folders"""
+    data_dir = Path(data_dir)
+    sources = []
+    for path in sorted(data_dir.rglob('*.pdf')):
+        parts = path.relative_to(data_dir).parts
+        if len(parts) < 3:
+            logger.warning(f"Skipping {path}: expected <company>/<category>/<file>.pdf")
+            continue
+        sources.append(PdfSource(parts[-3], parts[-2], path, path.relative_to(data_dir).as_posix()))
+    return sources
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir) -> dict:
+    path = Path(output_dir) / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest: dict):
+    path = Path(output_dir) / MANIFEST_FILE
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def embed_in_batches(records, model, batch_size: int = 256):
+    """
+    Embed a stream of chunk records a batch at a time
+    Yields:
+        tuple: (float32 matrix, list of records) with at most `batch_size` rows
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield np.stack([model.get_sentence_vector(r['text']) for r in batch]), batch
+            batch = []
+    if batch:
+        yield np.stack([model.get_sentence_vector(r['text']) for r in batch]), batch
+
+
+def build_search_indexes(store: CorpusStore, output_dir):
+    """
+    Write the BM25 index into the corpus directory and, unless the flat index
+    is used, the vector index next to it, tagged with the corpus fingerprint.
+    Called on the finished corpus before it is swapped in, so a reload never
+    pairs the new corpus with an index built for the old one.
+    """
+    build_bm25(store).save(bm25_path(store.path))
+    # The flat index is the corpus vectors themselves
+    if settings.VECTOR_INDEX == FlatIndex.kind:
+        return
+    index = build_index(
+        store.vectors,
+        settings.VECTOR_INDEX,
+        nlist=settings.IVF_NLIST,
+        nprobe=settings.IVF_NPROBE
+    )
+    save_index(index, index_path(output_dir, index.kind), fingerprint=store.fingerprint)
+
+
+def write_batches(batches, writer: CorpusWriter) -> int:
+    """Append embedded batches to a corpus writer, returning the row count"""
+    rows = 0
+    for vectors, records in batches:
+        writer.append_many(vectors, records)
+        rows += len(records)
+    return rows
+
+
+class IngestionPipeline:
+    """
+    extract -> chunk -> embed in batches -> append to a CorpusWriter, all as
+    generators, so only a bounded window of PDFs and one embedding batch are
+    held in memory at any time.
+    """
+
+    def __init__(self, data_dir=None, output_dir=None, chunk_size: int = None,
+                 workers: int = None, model=None, batch_size: int = 256):
+        self.data_dir = Path(data_dir or settings.DATA_DIR)
+        self.output_dir = Path(output_dir or settings.EMBEDDINGS_DIR)
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+        self._model = model
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def model(self):
+        # Only loaded once there is something to embed
+        if self._model is None:
+            from .model_provider import get_embedding_model
+            self._model = get_embedding_model()
+        return self._model
+
+    def extract(self, sources):
+        """
+        Extract and chunk PDFs in the process pool
+        Yields:
+            tuple: (source, {'pages': int, 'chunks': list}) as each PDF finishes
+        """
+        if not sources:
+            return
+        pending_sources = iter(sources)
+        # Keep only a small window of PDFs in flight so finished text cannot pile up
+        window = 2 * self.workers
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(sources))) as pool:
+            futures = {}
+            for source in itertools.islice(pending_sources, window):
+                futures[pool.submit(extract_and_chunk, source.path, self.chunk_size)] = source
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = futures.pop(future)
+                    next_source = next(pending_sources, None)
+                    if next_source is not None:
+                        futures[pool.submit(extract_and_chunk, next_source.path, self.chunk_size)] = next_source
+                    yield source, future.result()
+
+    def chunk_records(self, extracted, digests: dict, manifest: dict, stats: dict):
+        """
+        Flatten extracted PDFs into chunk records, updating the manifest as each file completes
+        Yields:
+            dict: company, category, file_name, chunk_idx and text of one chunk
+        """
+        for source, result in extracted:
+            chunks = result['chunks']
+            for idx, chunk in enumerate(chunks):
+                yield {
+                    'company': source.company,
+                    'category': source.category,
+                    'file_name': source.path.name,
+                    'chunk_idx': idx,
+                    'text': chunk,
+                    'source': source.key
+                }
+            manifest[source.key] = {
+                'sha256': digests[source.key],
+                'company': source.company,
+                'category': source.category,
+                'file_name': source.path.name,
+                'pages': result['pages'],
+                'chunks': len(chunks),
+            }
+            stats['chunks'] += len(chunks)
+            stats['pages'] += result['pages']
+
+    def plan(self, sources, manifest: dict, force: bool = False):
+        """Split sources into (unchanged, changed) using the manifest hashes"""
+        unchanged, changed = [], []
+        for source in sources:
+            digest = file_digest(source.path)
+            entry = manifest.get(source.key)
+            if not force and entry and entry['sha256'] == digest:
+                unchanged.append(source)
+            else:
+                changed.append((source, digest))
+        return unchanged, changed
+
+    def run(self, force: bool = False) -> dict:
+        """
+        Bring the corpus in `output_dir` up to date with the PDFs in `data_dir`
+        Args:
+            force (bool): Re-process every PDF regardless of the manifest
+        Returns:
+            dict: Counts of processed/kept/removed files, chunks and pages
+        """
+        start = time.perf_counter()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        store_path = corpus_path(self.output_dir)
+        has_store = (store_path / HEADER_FILE).exists()
+
+        sources = discover_pdfs(self.data_dir)
+        manifest = load_manifest(self.output_dir) if has_store else {}
+        if has_store and not force and CorpusStore.open(store_path).sources is None:
+            # Without per-row sources the rows of unchanged PDFs cannot be told apart
+            self.logger.info("Corpus does not record source files, re-processing every PDF")
+            force = True
+        unchanged, changed = self.plan(sources, manifest, force=force)
+        removed = set(manifest) - {s.key for s in sources}
+        stats = {'processed': len(changed), 'kept': len(unchanged), 'removed': len(removed),
+                 'chunks': 0, 'pages': 0}
+        if not changed and not removed:
+            self.logger.info("Corpus is up to date, nothing to ingest")
+            return stats
+
+        new_manifest = {s.key: manifest[s.key] for s in unchanged}
+        dim = self.model.get_dimension() if changed else CorpusStore.open(store_path).dim
+        with CorpusWriter(store_path, dim) as writer:
+            if unchanged:
+                self._copy_unchanged(CorpusStore.open(store_path), unchanged, writer)
+
+            digests = {s.key: d for s, d in changed}
+            extracted = self.extract([s for s, _ in changed])
+            records = self.chunk_records(extracted, digests, new_manifest, stats)
+            write_batches(embed_in_batches(records, self.model, self.batch_size), writer)
+            build_search_indexes(writer.finish(), self.output_dir)
+
+        save_manifest(self.output_dir, new_manifest)
+        stats['seconds'] = time.perf_counter() - start
+        self.logger.info(f"Ingestion finished: {stats}")
+        return stats
+
+    def _copy_unchanged(self, store: CorpusStore, unchanged, writer: CorpusWriter):
+        """Carry rows of unchanged PDFs over from the previous corpus, matched by manifest key"""
+        codes = {key: code for code, key in enumerate(store.sources)}
+        wanted = [codes[source.key] for source in unchanged if source.key in codes]
+        copy_rows(store, np.flatnonzero(np.isin(store.source_codes, wanted)), writer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest PDFs into the embeddings corpus.")
+    parser.add_argument("--data-dir", default=str(settings.DATA_DIR))
+    parser.add_argument("--output-dir", default=str(settings.EMBEDDINGS_DIR))
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-process every PDF")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+    stats = IngestionPipeline(args.data_dir, args.output_dir, workers=args.workers).run(force=args.force)
+    print(f"Processed {stats['processed']} PDFs ({stats['pages']} pages, {stats['chunks']} chunks), "
+          f"kept {stats['kept']}, removed {stats['removed']}")
+
+
+if __name__ == "__main__":
+    main()
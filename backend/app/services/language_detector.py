@@ -0,0 +1,123 @@
+# app/services/language_detector.py
+"""
+Language detection by Unicode script, with a statistical fallback.
+
+Most supported languages have a script of their own, so counting letters
+per script settles them in microseconds. Only a script shared by several
+supported languages (Devanagari: Hindi and Marathi) goes to langdetect, and
+then to a detector holding just those languages' profiles with a fixed
+seed, so the same text always gets the same answer.
+"""
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Tuple
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+
+# The Indic blocks are 128 code points each, so `ord(ch) >> 7` names the script
+SCRIPT_BLOCKS = {
+    0x0900 >> 7: 'devanagari',
+    0x0980 >> 7: 'bengali',
+    0x0A00 >> 7: 'gurmukhi',
+    0x0A80 >> 7: 'gujarati',
+    0x0B00 >> 7: 'oriya',
+    0x0B80 >> 7: 'tamil',
+    0x0C00 >> 7: 'telugu',
+    0x0C80 >> 7: 'kannada',
+    0x0D00 >> 7: 'malayalam',
+}
+# Basic Latin through Latin Extended-B
+LATIN_BLOCKS = range(0, (0x024F >> 7) + 1)
+
+SCRIPT_LANGUAGES = {
+    'latin': ('en',),
+    'devanagari': ('hi', 'mr'),
+    'bengali': ('bn',),
+    'gujarati': ('gu',),
+    'oriya': ('or',),
+    'tamil': ('ta',),
+    'telugu': ('te',),
+    'kannada': ('kn',),
+    'malayalam': ('ml',),
+}
+
+
+def dominant_script(text: str) -> str:
+    """
+    The script with the most letters; any Indic script wins over Latin, since
+    product names and numbers are often typed in Latin inside Indic sentences
+    Returns:
+        str: Script name, or None if the text has no letters of a known script
+    """
+    counts = Counter(ord(ch) >> 7 for ch in text if ch.isalpha())
+    indic = [(n, SCRIPT_BLOCKS[block]) for block, n in counts.items() if block in SCRIPT_BLOCKS]
+    if indic:
+        return max(indic)[1]
+    if any(block in LATIN_BLOCKS for block in counts):
+        return 'latin'
+    return None
+
+
+class LanguageDetector:
+    def __init__(self, supported: Iterable[str], default: str = 'en', seed: int = 0):
+        """
+        Args:
+            supported (Iterable[str]): Language codes that may be returned
+            default (str): Returned when no supported language matches
+            seed (int): Seed of the statistical fallback
+        """
+        self.supported = set(supported)
+        self.default = default
+        self.seed = seed
+        self.logger = logging.getLogger(__name__)
+        self._factories: Dict[Tuple[str, ...], DetectorFactory] = {}
+        self._lock = threading.Lock()
+        self.by_script = 0
+        self.by_model = 0
+        # Load the fallback profiles now rather than on the first ambiguous query
+        for script in SCRIPT_LANGUAGES:
+            if len(self.candidates(script)) > 1:
+                self._factory(self.candidates(script))
+
+    def candidates(self, script: str) -> Tuple[str, ...]:
+        return tuple(lang for lang in SCRIPT_LANGUAGES.get(script, ()) if lang in self.supported)
+
+    def detect(self, text: str) -> str:
+        """
+        Args:
+            text (str): Input text
+        Returns:
+            str: Supported language code, or the default
+        """
+        candidates = self.candidates(dominant_script(text))
+        if len(candidates) <= 1:
+            self.by_script += 1
+            return candidates[0] if candidates else self.default
+
+        self.by_model += 1
+        try:
+            detector = self._factory(candidates).create()
+            detector.append(text)
+            return detector.detect()
+        except Exception as e:
+            self.logger.warning(f"Statistical language detection failed, using {candidates[0]}: {str(e)}")
+            return candidates[0]
+
+    def _factory(self, languages: Tuple[str, ...]) -> DetectorFactory:
+        """A langdetect factory knowing only `languages`, loaded once"""
+        with self._lock:
+            factory = self._factories.get(languages)
+            if factory is None:
+                factory = DetectorFactory()
+                factory.seed = self.seed
+                profiles = []
+                for lang in languages:
+                    with open(os.path.join(PROFILES_DIRECTORY, lang), encoding='utf-8') as f:
+                        profiles.append(f.read())
+                factory.load_json_profile(profiles)
+                self._factories[languages] = factory
+            return factory
+
+    def stats(self) -> dict:
+        return {'by_script': self.by_script, 'by_model': self.by_model}
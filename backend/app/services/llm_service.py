@@ -1,166 +1,202 @@
 # app/services/llm_service.py
-import requests
-
-# class LlamaService:
-    
-        
-        
-#     async def generate_response(self, prompt: str, context: str) -> str:
-#         full_prompt = f"""Context: {context}\n\nQuestion: {prompt}\n\nAnswer:"""
-        
-#         response = requests.post(
-#             self.api_url,
-#             json={
-#                 "model": "llama2",
-#                 "prompt": full_prompt,
-#                 "stream": False
-#             }
-#         )
-#         return response.json()['response']
-    
-import os
+import asyncio
 import json
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import nest_asyncio
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 import logging
-import pickle
-import atexit
-from ollama import chat
+from typing import Dict, Sequence, Union
+from ollama import AsyncClient
 from ollama import ChatResponse
+from app.config import settings
+from app.utils.concurrency import run_blocking
+from .prompt_budget import PromptBudget, count_tokens
+from .session_store import DEFAULT_SESSION, SessionKey, SessionStore, is_anonymous
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Apply nest_asyncio if needed
-nest_asyncio.apply()
-
-app = FastAPI()
-
-# ----------------------------
-# Custom Conversation Memory
-# ----------------------------
-class SimpleMessage:
-    """
-    A simple message object to hold a role ('human' for user, 'ai' for assistant)
-    and its content.
-    """
-    def __init__(self, role: str, content: str):
-        self.type = role  # "human" for user messages, "ai" for assistant messages
-        self.content = content
+file_path = 'user_prompts.json'  # Ensure this is defined before usage
 
-class SimpleConversationBufferMemory:
-    """
-    A basic conversation memory that stores the last 'k' messages.
-    """
-    def __init__(self, k: int = 5, memory_key: str = 'chat_history'):
-        self.memory_key = memory_key
-        self.k = k
-        self.messages = []  # List to store SimpleMessage objects
+PROMPT_TEMPLATE = """
+    You are an assistant for answering questions based on the context provided.
+    Answer based on the context provided.
+    Do not mention the word context in the answer.
 
-    def load_memory_variables(self, inputs: dict):
-        """
-        Return the last 'k' messages stored in memory.
-        """
-        return {self.memory_key: self.messages[-self.k:]}
+    Context:
+    {context}
 
-    def save_context(self, inputs: dict, outputs: dict):
-        """
-        Save the user's question and the assistant's answer into memory.
-        """
-        user_input = inputs.get("input")
-        assistant_output = outputs.get("output")
-        if user_input:
-            self.messages.append(SimpleMessage("human", user_input))
-        if assistant_output:
-            self.messages.append(SimpleMessage("ai", assistant_output))
+    Conversation History:
+    {history}
 
+    User: {question}
 
-# ----------------------------
-# Global Variables and Storage
-# ----------------------------
-user_memories = {}
-memory_file_path = 'user_memories.pkl'
-file_path = 'user_prompts.json'  # Ensure this is defined before usage
+    Assistant:
+    """
 
-def load_user_memories():
-    global user_memories
-    if os.path.exists(memory_file_path):
-        with open(memory_file_path, 'rb') as f:
-            user_memories = pickle.load(f)
-            logging.info("User memories loaded from disk.")
-    else:
-        user_memories = {}
-        logging.info("No existing user memories found. Starting fresh.")
+SUMMARY_TEMPLATE = """Summarize this conversation between a user and an insurance assistant in a few sentences.
+Keep names, policies, amounts and anything the user asked to remember; drop pleasantries.
 
-def save_user_memories():
-    with open(memory_file_path, 'wb') as f:
-        pickle.dump(user_memories, f)
-        logging.info("User memories saved to disk.")
+Summary so far:
+{summary}
 
-# Load user memories at startup
-load_user_memories()
+New messages:
+{messages}
 
-# Save user memories on shutdown
-atexit.register(save_user_memories)
+Updated summary:"""
 
 # ----------------------------
 # Response Generation Function
 # ----------------------------
 
 class LlamaService:
-    async def generate_response(self, question: str, context: str) -> str:
-        """
-        Generate a response using Gemini's GenerativeModel with the relevant context and user memory.
-        """
-        user_id = "a"
-        # Retrieve or initialize user memory using our custom SimpleConversationBufferMemory
-        if user_id not in user_memories:
-            user_memories[user_id] = SimpleConversationBufferMemory(memory_key='chat_history', k=5)
-        
-        memory = user_memories[user_id]
-        
-        # Retrieve conversation history
-        chat_history = memory.load_memory_variables({"input": question})
-        messages = chat_history.get('chat_history', [])
-        
-        # Format the conversation history into a readable text block
-        history_text = ""
+    def __init__(self, host: str = None, model: str = None, sessions: SessionStore = None):
+        # The async client keeps one connection pool and never blocks the event loop
+        self.client = AsyncClient(host=host or settings.OLLAMA_URL, timeout=settings.LLM_TIMEOUT)
+        self.model = model or settings.LLM_MODEL
+        self.sessions = sessions or SessionStore()
+        self.budget = PromptBudget(settings.PROMPT_TOKEN_BUDGET, settings.PROMPT_HISTORY_SHARE)
+        self.logger = logging.getLogger(__name__)
+        self._summarizing: Dict[SessionKey, asyncio.Task] = {}
+        self.summaries = 0
+        self.summary_failures = 0
+        self.summaries_skipped = 0
+    
+    async def remember(self, question: str, answer: str, session: SessionKey = DEFAULT_SESSION):
+        """Record an exchange in the session history and schedule its summary"""
+        if is_anonymous(session):
+            return
+        # A session evicted from RAM is reloaded from the database, so this may block
+        await run_blocking(self.sessions.save_exchange, session, question, answer)
+        self.schedule_summary(session)
+    
+    @staticmethod
+    def _format_history(summary: str, messages: list) -> str:
+        history_text = f"Summary of earlier conversation: {summary}\n" if summary else ""
         for msg in messages:
             if msg.type == "human":
                 history_text += f"User: {msg.content}\n"
             elif msg.type == "ai":
                 history_text += f"Assistant: {msg.content}\n"
+        return history_text
+    
+    def _format(self, question: str, chunks: Sequence[str], summary: str = "", messages: list = ()) -> str:
+        return PROMPT_TEMPLATE.format(
+            context="\n".join(chunks), history=self._format_history(summary, messages), question=question
+        )
+    
+    def _prepare(self, question: str, context: Union[str, Sequence[str]],
+                 session: SessionKey = DEFAULT_SESSION) -> str:
+        """
+        Build the prompt for a question from the context and the session's conversation history,
+        trimmed to PROMPT_TOKEN_BUDGET
+        Args:
+            context (str | Sequence[str]): Context string, or retrieved chunks best first
+        Returns:
+            str: The prompt
+        """
+        chunks = [context] if isinstance(context, str) else list(context)
+        summary, summary_until, messages = self.sessions.snapshot(session)
+        last = settings.SESSION_HISTORY_MESSAGES
+        recent = messages[-last:] if last > 0 else []
         
-        # Retrieve relevant context from your vector store (or other source)
-        # Here, we're using a hard-coded example
-        # context = "Quark is the technical fest of BITS Goa. It will happen on 7th Feb."
-        logging.info(f"Retrieved context for user {user_id}: {context}")
+        if settings.HISTORY_SUMMARY and summary:
+            # Turns the summary covers are not repeated verbatim
+            history = [m for m in recent if m.created_at > summary_until]
+        else:
+            summary, history = "", recent
+        allocation = self.budget.allocate(count_tokens(self._format(question, [])), chunks, summary, history)
+        prompt = self._format(question, allocation.chunks, allocation.summary, allocation.messages)
         
-        # Construct the prompt using the context and conversation history
-        prompt = f"""
-    You are an assistant for answering questions based on the context provided.
-    Answer based on the context provided.
-    Do not mention the word context in the answer.
-
-    Context:
-    {context}
-
-    Conversation History:
-    {history_text}
-
-    User: {question}
-
-    Assistant:
-    """
-        print(prompt)
+        # What the prompt would have cost untrimmed: all context and the last turns verbatim
+        self.budget.record(count_tokens(prompt), count_tokens(self._format(question, chunks, "", recent)))
+        
+        self.logger.debug(f"Retrieved context for user {session.user_id}: {context}")
+        self.logger.debug(prompt)
+        return prompt
+    
+    def _history_overflows(self, pending: list) -> bool:
+        """
+        Whether the next prompt would drop some of the messages the summary does
+        not cover yet: more than SESSION_HISTORY_MESSAGES of them, or more tokens
+        than history's share of the budget
+        """
+        if len(pending) > settings.SESSION_HISTORY_MESSAGES:
+            return True
+        history_tokens = sum(count_tokens(m.content) for m in pending)
+        return history_tokens > self.budget.total_tokens * self.budget.history_share
+    
+    def schedule_summary(self, session: SessionKey = DEFAULT_SESSION):
+        """
+        Fold older turns into the session's rolling summary in the background,
+        once they no longer fit in the prompt.
+        Runs after a reply is recorded, so no request waits for it; at most one
+        summary per session is in flight.
+        """
+        if not settings.HISTORY_SUMMARY or session in self._summarizing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.update_summary(session))
+        self._summarizing[session] = task
+        task.add_done_callback(lambda _: self._summarizing.pop(session, None))
+    
+    async def update_summary(self, session: SessionKey = DEFAULT_SESSION):
+        """
+        Extend the rolling summary with the turns older than the last
+        HISTORY_RECENT_MESSAGES that it does not cover yet. The LLM is only
+        called when the prompt would otherwise drop some of them, not after
+        every reply.
+        Returns:
+            str: The new summary, or None if there was nothing to fold in
+        """
+        summary, summary_until, messages = await run_blocking(self.sessions.snapshot, session)
+        pending = [m for m in messages if m.created_at > summary_until]
+        fold = pending[:max(len(pending) - settings.HISTORY_RECENT_MESSAGES, 0)]
+        if not fold or not self._history_overflows(pending):
+            self.summaries_skipped += 1
+            return None
         
+        prompt = SUMMARY_TEMPLATE.format(summary=summary or "(none)", messages=self._format_history("", fold))
         try:
-            # Generate the response using ollama's chat function
-            response: ChatResponse = chat(model='llama3.1', messages=[
+            response: ChatResponse = await self.client.chat(
+                model=self.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                options={'num_predict': settings.HISTORY_SUMMARY_TOKENS},
+            )
+            new_summary = response['message']['content'].strip()
+            await run_blocking(self.sessions.set_summary, session, new_summary, fold[-1].created_at)
+        except Exception as e:
+            self.summary_failures += 1
+            self.logger.error(f"Error summarizing conversation for user {session.user_id}: {e}")
+            return None
+        
+        self.summaries += 1
+        return new_summary
+    
+    def prompt_stats(self) -> dict:
+        """Prompt tokens sent against the untrimmed baseline, and summary counters"""
+        return {
+            **self.budget.stats(),
+            # Summary LLM calls, on top of one call per answer
+            'summary_calls': self.summaries + self.summary_failures,
+            'summaries': self.summaries,
+            'summary_failures': self.summary_failures,
+            'summaries_skipped': self.summaries_skipped,
+            'summaries_in_flight': len(self._summarizing),
+        }
+    
+    async def generate_response(self, question: str, context: Union[str, Sequence[str]],
+                                session: SessionKey = DEFAULT_SESSION) -> str:
+        """
+        Generate a response with Llama using the relevant context and the session's history.
+        """
+        # A session evicted from RAM is reloaded from the database, so this may block
+        prompt = await run_blocking(self._prepare, question, context, session)
+        
+        try:
+            # Generate the response using ollama's async chat client
+            response: ChatResponse = await self.client.chat(model=self.model, messages=[
                 {
                     'role': 'user',
                     'content': prompt,
@@ -168,13 +204,41 @@ class LlamaService:
             ])
             answer = response['message']['content']
         except Exception as e:
-            logging.error(f"Error generating response with Llama: {e}")
+            self.logger.error(f"Error generating response with Llama: {e}")
             raise e
         
         # Update conversation memory with the latest interaction
-        memory.save_context({"input": question}, {"output": answer})
+        await self.remember(question, answer, session)
         
         return answer
+    
+    async def stream_response(self, question: str, context: Union[str, Sequence[str]], session: SessionKey = DEFAULT_SESSION):
+        """
+        Generate a response token by token, relaying Ollama's stream as it arrives.
+        The full answer is saved to the conversation memory once the stream ends.
+        Yields:
+            str: Text fragments of the answer
+        """
+        prompt = await run_blocking(self._prepare, question, context, session)
+        parts = []
+        
+        try:
+            stream = await self.client.chat(model=self.model, stream=True, messages=[
+                {
+                    'role': 'user',
+                    'content': prompt,
+                },
+            ])
+            async for chunk in stream:
+                content = chunk['message']['content']
+                if content:
+                    parts.append(content)
+                    yield content
+        except Exception as e:
+            self.logger.error(f"Error streaming response with Llama: {e}")
+            raise e
+        
+        await self.remember(question, "".join(parts), session)
 
 # ----------------------------
 # Data Loading and Saving
@@ -0,0 +1,214 @@
+# app/services/model_provider.py
+"""
+Process-wide access to the FastText sentence embedding model.
+
+`get_embedding_model()` loads the model once per process and hands the same
+instance to the PDF generator and the searcher. FASTTEXT_MODEL_PATH may point
+either at a full FastText `.bin` or at a reduced model directory built by
+`python -m app.services.model_provider`, which keeps only the vocabulary seen in
+the corpus (plus the most frequent words) and, optionally, the subword buckets
+as float16. The reduced arrays are memory-mapped, so all workers share them
+through the page cache; a full `.bin` is shared copy-on-write when the app is
+imported before forking (e.g. `gunicorn --preload`).
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# FastText splits sentences on ASCII whitespace only, unlike str.split()
+_WHITESPACE = re.compile(r'[ \t\n\v\f\r]+')
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def _fnv1a(data: bytes) -> int:
+    """FastText's 32-bit FNV-1a, including its sign extension of non-ASCII bytes"""
+    h = 2166136261
+    for byte in data:
+        h ^= byte if byte < 128 else byte | 0xFFFFFF00
+        h = (h * 16777619) & 0xFFFFFFFF
+    return h
+
+
+def subword_buckets(word: str, minn: int, maxn: int, bucket: int) -> list:
+    """Bucket ids of the character n-grams FastText uses for `word`"""
+    if bucket == 0 or maxn == 0:
+        return []
+    data = f'<{word}>'.encode('utf-8')
+    size = len(data)
+    buckets = []
+    for i in range(size):
+        if (data[i] & 0xC0) == 0x80:
+            continue
+        j, n = i, 1
+        while j < size and n <= maxn:
+            j += 1
+            while j < size and (data[j] & 0xC0) == 0x80:
+                j += 1
+            if n >= minn and not (n == 1 and (i == 0 or j == size)):
+                buckets.append(_fnv1a(data[i:j]) % bucket)
+            n += 1
+    return buckets
+
+
+class ReducedFastText:
+    """
+    Drop-in replacement for the parts of a FastText model the app uses.
+    Words in the reduced vocabulary use their exact precomputed vectors; any
+    other word is built from subword buckets when those were kept.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json') as f:
+            meta = json.load(f)
+        self.dim = meta['dim']
+        self.minn = meta['minn']
+        self.maxn = meta['maxn']
+        self.bucket = meta['bucket']
+        with open(self.path / 'words.txt', encoding='utf-8') as f:
+            self.word_ids = {line.rstrip('\n'): i for i, line in enumerate(f)}
+        self.word_vectors = np.asarray(np.load(self.path / 'word_vectors.npy', mmap_mode='r'))
+        buckets_path = self.path / 'buckets.npy'
+        self.buckets = np.asarray(np.load(buckets_path, mmap_mode='r')) if buckets_path.exists() else None
+
+    def get_dimension(self) -> int:
+        return self.dim
+
+    def get_word_vector(self, word: str) -> np.ndarray:
+        idx = self.word_ids.get(word)
+        if idx is not None:
+            return np.array(self.word_vectors[idx], dtype=np.float32)
+        if self.buckets is None:
+            return np.zeros(self.dim, dtype=np.float32)
+        rows = subword_buckets(word, self.minn, self.maxn, self.bucket)
+        if not rows:
+            return np.zeros(self.dim, dtype=np.float32)
+        return self.buckets[rows].astype(np.float32).mean(axis=0)
+
+    def get_sentence_vector(self, text: str) -> np.ndarray:
+        """Average of unit-length word vectors, as FastText does for unsupervised models"""
+        if text.find('\n') != -1:
+            raise ValueError("predict processes one line at a time (remove '\\n')")
+        total = np.zeros(self.dim, dtype=np.float32)
+        count = 0
+        for word in _WHITESPACE.split(text):
+            if not word:
+                continue
+            vector = self.get_word_vector(word)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                total += vector / norm
+                count += 1
+        return total / count if count else total
+
+
+def load_embedding_model(path=None):
+    """Load a full FastText `.bin` or a reduced model directory"""
+    path = Path(path or settings.FASTTEXT_MODEL_PATH)
+    if not path.exists():
+        logger.error(f"FastText model not found at {path}")
+        raise FileNotFoundError(f"FastText model not found at {path}")
+    if path.is_dir():
+        logger.info(f"Loading reduced FastText model from {path}")
+        return ReducedFastText(path)
+
+    import fasttext
+    logger.info(f"Loading FastText model from {path}")
+    return fasttext.load_model(str(path))
+
+
+def get_embedding_model():
+    """Return the process-wide embedding model, loading it on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_embedding_model()
+    return _model
+
+
+def preload_embedding_model():
+    """Load the model now, e.g. in a server master process before workers fork"""
+    get_embedding_model()
+
+
+def build_reduced_model(model, words, output_path, keep_buckets: bool = True,
+                        bucket_dtype=np.float16, block: int = 100000) -> Path:
+    """
+    Write a reduced model directory.
+    Args:
+        model: Loaded full FastText model
+        words (iterable): Vocabulary to keep exact vectors for
+        output_path (Path): Directory to write
+        keep_buckets (bool): Keep subword buckets so unseen words still get vectors
+        bucket_dtype: Storage type for the bucket matrix
+        block (int): Rows copied per step while writing buckets
+    """
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    args = model.f.getArgs()
+    words = sorted(set(words))
+
+    vectors = np.stack([model.get_word_vector(w) for w in words]).astype(np.float32)
+    np.save(output_path / 'word_vectors.npy', vectors)
+    with open(output_path / 'words.txt', 'w', encoding='utf-8') as f:
+        f.writelines(f'{w}\n' for w in words)
+
+    if keep_buckets and args.bucket:
+        # Zero-copy view of the input matrix; bucket rows follow the word rows
+        matrix = np.asarray(model.f.getInputMatrix())
+        nwords = matrix.shape[0] - args.bucket
+        buckets = np.lib.format.open_memmap(
+            output_path / 'buckets.npy', mode='w+', dtype=bucket_dtype, shape=(args.bucket, args.dim)
+        )
+        for start in range(0, args.bucket, block):
+            stop = min(start + block, args.bucket)
+            buckets[start:stop] = matrix[nwords + start:nwords + stop]
+        buckets.flush()
+        del buckets
+    elif (output_path / 'buckets.npy').exists():
+        (output_path / 'buckets.npy').unlink()
+
+    with open(output_path / 'meta.json', 'w') as f:
+        json.dump({'dim': args.dim, 'minn': args.minn, 'maxn': args.maxn,
+                   'bucket': args.bucket if keep_buckets else 0}, f)
+    return output_path
+
+
+def corpus_vocabulary(store) -> set:
+    """Every whitespace-separated token in the corpus chunk texts"""
+    vocabulary = set()
+    for idx in range(len(store)):
+        vocabulary.update(w for w in _WHITESPACE.split(store.text(idx)) if w)
+    return vocabulary
+
+
+def main():
+    from .corpus_store import open_corpus
+
+    parser = argparse.ArgumentParser(description="Build a reduced FastText model for the corpus vocabulary.")
+    parser.add_argument("--model", default=str(settings.FASTTEXT_MODEL_PATH), help="Full FastText .bin")
+    parser.add_argument("--output", required=True, help="Directory to write the reduced model to")
+    parser.add_argument("--top-words", type=int, default=50000,
+                        help="Also keep the N most frequent model words, for query terms outside the corpus")
+    parser.add_argument("--no-buckets", action="store_true", help="Drop subword buckets (unseen words map to zero)")
+    args = parser.parse_args()
+
+    model = load_embedding_model(args.model)
+    words = corpus_vocabulary(open_corpus(settings.EMBEDDINGS_DIR))
+    words.update(model.words[:args.top_words])
+    path = build_reduced_model(model, words, args.output, keep_buckets=not args.no_buckets)
+    print(f"Wrote reduced model with {len(words)} words to {path}")
+
+
+if __name__ == "__main__":
+    main()
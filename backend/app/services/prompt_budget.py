@@ -0,0 +1,143 @@
+# app/services/prompt_budget.py
+"""
+Token budget for LLM prompts.
+
+Token counts are estimated with a word/punctuation regex instead of the
+model's tokenizer: it needs no model files and runs in microseconds, and it
+slightly undercounts subword splits, so keep some headroom below the model's
+context window.
+
+`PromptBudget.allocate` splits a total budget between retrieved context and
+conversation history. Context chunks arrive best first and are kept in that
+order; history is the rolling summary of older turns plus the most recent
+messages, newest kept first. History may take up to `history_share` of the
+budget, and whatever one side leaves unused goes to the other.
+"""
+import re
+import threading
+from typing import List, NamedTuple, Sequence
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# A chunk cut to fewer tokens than this is dropped rather than truncated
+MIN_CHUNK_TOKENS = 32
+
+
+def count_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in `text`"""
+    return len(_TOKEN_RE.findall(text)) if text else 0
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` with at most `max_tokens` tokens"""
+    if max_tokens <= 0:
+        return ""
+    for i, match in enumerate(_TOKEN_RE.finditer(text)):
+        if i == max_tokens - 1:
+            return text[:match.end()]
+    return text
+
+
+class Allocation(NamedTuple):
+    chunks: List[str]
+    summary: str
+    messages: list  # session messages kept verbatim, oldest first
+    tokens: int  # estimated tokens of the kept context and history
+
+
+class PromptBudget:
+    def __init__(self, total_tokens: int, history_share: float = 0.3):
+        """
+        Args:
+            total_tokens (int): Budget for the whole prompt, instructions and question included
+            history_share (float): Fraction of the remaining budget history may claim
+        """
+        self.total_tokens = total_tokens
+        self.history_share = history_share
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.prompt_tokens = 0
+        self.baseline_tokens = 0
+        self.trimmed = 0
+        self.dropped_chunks = 0
+
+    def allocate(self, fixed_tokens: int, chunks: Sequence[str], summary: str, messages: list) -> Allocation:
+        """
+        Fit context and history into what the budget leaves after `fixed_tokens`
+
+        Args:
+            fixed_tokens (int): Tokens of the instructions and question, always sent
+            chunks (Sequence[str]): Context chunks, best first
+            summary (str): Rolling summary of older turns, may be empty
+            messages (list): Recent messages (with `.content`), oldest first
+        Returns:
+            Allocation: What to put in the prompt
+        """
+        available = max(self.total_tokens - fixed_tokens, 0)
+        chunk_tokens = [count_tokens(c) for c in chunks]
+        message_tokens = [count_tokens(m.content) for m in messages]
+        history_need = count_tokens(summary) + sum(message_tokens)
+
+        # History is capped at its share unless context leaves room to spare
+        history_cap = int(available * self.history_share)
+        context_cap = available - min(history_need, history_cap)
+        kept_chunks, context_used, truncated = [], 0, False
+        for chunk, tokens in zip(chunks, chunk_tokens):
+            room = context_cap - context_used
+            if tokens <= room:
+                kept_chunks.append(chunk)
+                context_used += tokens
+            elif room >= MIN_CHUNK_TOKENS:
+                kept_chunks.append(truncate_tokens(chunk, room))
+                context_used += room
+                truncated = True
+                break
+            else:
+                break
+
+        history_room = available - context_used
+        kept_messages, history_used = [], 0
+        # The newest turns matter most; the summary takes what is left
+        for message, tokens in zip(reversed(messages), reversed(message_tokens)):
+            if history_used + tokens > history_room:
+                break
+            kept_messages.append(message)
+            history_used += tokens
+        kept_messages.reverse()
+        kept_summary = truncate_tokens(summary, history_room - history_used) if summary else ""
+        history_used += count_tokens(kept_summary)
+
+        with self._lock:
+            self.dropped_chunks += len(chunks) - len(kept_chunks)
+            if (truncated or len(kept_chunks) < len(chunks)
+                    or len(kept_messages) < len(messages) or kept_summary != summary):
+                self.trimmed += 1
+        return Allocation(kept_chunks, kept_summary, kept_messages, context_used + history_used)
+
+    def record(self, prompt_tokens: int, baseline_tokens: int):
+        """
+        Count one prompt sent against what the untrimmed prompt would have cost
+
+        Args:
+            prompt_tokens (int): Tokens in the prompt actually sent
+            baseline_tokens (int): Tokens with all context and the last turns verbatim
+        """
+        with self._lock:
+            self.prompts += 1
+            self.prompt_tokens += prompt_tokens
+            self.baseline_tokens += baseline_tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            saved = max(self.baseline_tokens - self.prompt_tokens, 0)
+            return {
+                'budget_tokens': self.total_tokens,
+                'prompts': self.prompts,
+                'prompt_tokens': self.prompt_tokens,
+                'baseline_tokens': self.baseline_tokens,
+                'tokens_saved': saved,
+                'saved_ratio': saved / self.baseline_tokens if self.baseline_tokens else 0.0,
+                'avg_prompt_tokens': self.prompt_tokens / self.prompts if self.prompts else 0.0,
+                'trimmed_prompts': self.trimmed,
+                'dropped_chunks': self.dropped_chunks,
+            }
@@ -0,0 +1,104 @@
+# app/services/query_intent.py
+"""
+Lightweight query-intent extraction: turn mentions of an insurer, a plan
+category or a specific plan in the prompt into search filters.
+
+Plans are recognised from their brochure file names: any pair of adjacent
+name words (e.g. "jeevan umang", "saral pension") that occurs in exactly one
+file name, or a UIN such as 512N350V02 contained in the file name.
+"""
+import re
+from collections import defaultdict
+
+# Aliases per corpus value; the value itself (lowercased) always matches too
+COMPANY_ALIASES = {
+    'LIC': ('lic', 'life insurance corporation'),
+    'Maxlife': ('max life', 'maxlife'),
+}
+CATEGORY_ALIASES = {
+    'Health Plans': ('health', 'medical', 'hospital', 'hospitalisation', 'hospitalization', 'critical illness'),
+    'Pension Plans': ('pension', 'pensions', 'annuity', 'annuities', 'retirement'),
+    'Insurance Plans': ('term plan', 'term insurance', 'endowment', 'money back', 'whole life'),
+}
+
+_WORD = re.compile(r'[a-z0-9]+')
+_CAMEL = re.compile(r'(?<=[a-z])(?=[A-Z])')
+_UIN = re.compile(r'\d{3}[A-Z]\d{3}V\d{2}')
+# Words in brochure file names that do not identify a plan
+_FILE_NOISE = frozenset(
+    'lic lics max life maxlife new final sales brochure eng inch inches pdf web cut rd wxh '
+    'single page pages prospectus cc'.split()
+)
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(_WORD.findall(text.lower()))
+
+
+def _contains(text: str, phrase: str) -> bool:
+    return f' {phrase} ' in f' {text} '
+
+
+def _name_words(file_name: str) -> list:
+    stem = _UIN.sub(' ', file_name.rsplit('.pdf', 1)[0])
+    words = _WORD.findall(_CAMEL.sub(' ', stem).lower())
+    return [w for w in words if len(w) > 2 and w.isalpha() and w not in _FILE_NOISE]
+
+
+class QueryIntentExtractor:
+    """Maps prompts to `{field: [values]}` filters for the values present in the corpus"""
+
+    def __init__(self, values: dict):
+        """
+        Args:
+            values (dict): Field name -> corpus values, e.g. CorpusStore.values
+        """
+        self.companies = self._aliases(values.get('company', []), COMPANY_ALIASES)
+        self.categories = self._aliases(values.get('category', []), CATEGORY_ALIASES)
+        self.plan_phrases, self.uins = self._plan_names(values.get('file_name', []))
+
+    @staticmethod
+    def _aliases(corpus_values, aliases: dict) -> list:
+        pairs = []
+        for value in corpus_values:
+            for alias in {_normalize(value), *aliases.get(value, ())}:
+                pairs.append((alias, value))
+        return pairs
+
+    @staticmethod
+    def _plan_names(file_names):
+        files_by_phrase = defaultdict(set)
+        uins = {}
+        for file_name in file_names:
+            words = _name_words(file_name)
+            for pair in zip(words, words[1:]):
+                files_by_phrase[' '.join(pair)].add(file_name)
+            for uin in _UIN.findall(file_name):
+                uins[uin.lower()] = file_name
+        phrases = {phrase: files.pop() for phrase, files in files_by_phrase.items() if len(files) == 1}
+        return phrases, uins
+
+    def extract(self, prompt: str) -> dict:
+        """
+        Args:
+            prompt (str): English user prompt
+        Returns:
+            dict: Filters for EmbeddingSearcher.search; empty when nothing was recognised
+        """
+        text = _normalize(prompt)
+        filters = {}
+
+        files = {f for phrase, f in self.plan_phrases.items() if _contains(text, phrase)}
+        files.update(f for uin, f in self.uins.items() if _contains(text, uin))
+        if files:
+            # A named plan pins the brochure; company and category add nothing
+            filters['file_name'] = sorted(files)
+            return filters
+
+        companies = {value for alias, value in self.companies if _contains(text, alias)}
+        categories = {value for alias, value in self.categories if _contains(text, alias)}
+        if companies:
+            filters['company'] = sorted(companies)
+        if categories:
+            filters['category'] = sorted(categories)
+        return filters
@@ -1,15 +1,99 @@
 from pathlib import Path
 from .embedding_service import EmbeddingSearcher
-from typing import List
+from app.config import settings
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+
+class Retrieval(NamedTuple):
+    context: str
+    embedding: np.ndarray
+    generation: int  # index generation the context came from
+    chunks: List[str]  # the context's chunks, best first, for the prompt budget
+    chunk_ids: Tuple[int, ...]  # corpus rows of the chunks
+    filters: Optional[dict]  # filters the chunks were found under, explicit or inferred from the query
 
 class RAGService:
     def __init__(self):
-        # Use absolute path
-        base_dir = Path(__file__).resolve().parent.parent.parent
-        embeddings_dir = base_dir / 'embeddings_output'
-        self.searcher = EmbeddingSearcher(embeddings_dir)
+        self.embeddings_dir = Path(settings.EMBEDDINGS_DIR)
+        # (searcher, generation), replaced as one value so a reader never pairs
+        # one index's searcher with another's generation
+        self._active = (EmbeddingSearcher(self.embeddings_dir), 0)
+    
+    @property
+    def searcher(self) -> EmbeddingSearcher:
+        return self._active[0]
+    
+    @property
+    def generation(self) -> int:
+        return self._active[1]
+    
+    def swap_searcher(self, searcher: EmbeddingSearcher):
+        """
+        Replace the searcher used by new requests.
+        Attribute assignment is atomic, and every method reads the active
+        searcher once, so in-flight requests finish on the searcher they started with.
+        """
+        self._active = (searcher, self._active[1] + 1)
+    
+    def search(self, query: str, top_k: int = 5, filters: Optional[dict] = None,
+               searcher: EmbeddingSearcher = None, query_embedding=None) -> list:
+        """
+        Retrieve the top chunks for a query.
+        Explicit filters are applied as given. Without them, filters inferred
+        from the query (company, category, plan) are used when
+        QUERY_INTENT_FILTERS is on, and relaxed step by step if nothing matches.
+        """
+        results, _ = self._search(query, top_k, filters, searcher or self.searcher, query_embedding)
+        return results
     
-    def get_relevant_context(self, query: str, top_k: int = 5) -> str:
-        results = self.searcher.search(query, top_k=top_k)
+    def _search(self, query: str, top_k: int, filters: Optional[dict], searcher: EmbeddingSearcher,
+                query_embedding=None) -> Tuple[list, Optional[dict]]:
+        """`search`, also returning the filters that produced the results"""
+        if filters is not None or not settings.QUERY_INTENT_FILTERS:
+            return searcher.search(query, top_k=top_k, filters=filters, query_embedding=query_embedding), filters
+        
+        results, attempt = [], None
+        for attempt in self._relaxed(searcher.extract_filters(query)):
+            results = searcher.search(query, top_k=top_k, filters=attempt, query_embedding=query_embedding)
+            if results:
+                break
+        return results, attempt
+    
+    def retrieve(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> Retrieval:
+        """
+        `get_relevant_context` that also returns the query embedding, index
+        generation, chunk ids and applied filters, so callers (e.g. the
+        response cache) need not embed or search again
+        """
+        searcher, generation = self._active
+        embedding = searcher.embed_query(query)
+        results, applied = self._search(query, top_k, filters, searcher, query_embedding=embedding)
+        chunks = [r['text'] for r in results]
+        return Retrieval(
+            "\n".join(chunks), embedding, generation, chunks, tuple(r['id'] for r in results), applied
+        )
+    
+    @staticmethod
+    def _relaxed(filters: dict):
+        """The inferred filters, then company only, then no filters"""
+        yield filters
+        if 'company' in filters and len(filters) > 1:
+            yield {'company': filters['company']}
+        if filters:
+            yield None
+    
+    def get_relevant_context(self, query: str, top_k: int = 5, filters: Optional[dict] = None) -> str:
+        results = self.search(query, top_k=top_k, filters=filters)
         context = "\n".join([r['text'] for r in results])
-        return context
\ No newline at end of file
+        return context
+
+    def search_batch(self, queries: List[str], top_k: int = 5, filters: Optional[dict] = None) -> List[list]:
+        """Retrieve the top chunks for many queries with one batched scan"""
+        return self.searcher.search_batch(queries, top_k=top_k, filters=filters)
+
+    def get_relevant_contexts(self, queries: List[str], top_k: int = 5, filters: Optional[dict] = None) -> List[str]:
+        """Batched `get_relevant_context`, one context string per query"""
+        return [
+            "\n".join([r['text'] for r in results])
+            for results in self.search_batch(queries, top_k=top_k, filters=filters)
+        ]
\ No newline at end of file
@@ -0,0 +1,297 @@
+# app/services/recognizer_pool.py
+"""
+Bounded worker pool for Vosk transcription.
+
+Uploads run on a dedicated executor of ASR_WORKERS workers instead of the
+event loop's default thread pool, so a burst of uploads cannot starve
+translation, retrieval or other to_thread work. KaldiRecognizer objects are
+kept per sample rate and `Reset()` between requests instead of being rebuilt.
+Admission control turns requests away with PoolSaturated once ASR_MAX_QUEUE
+requests are already waiting for a worker. Streamed uploads and live
+WebSocket streams hold a recognizer from the pool for their whole length,
+so they are admitted the same way (`checkout` / `checkin`).
+
+In "process" mode each worker is a separate process with its own copy of
+the model, for CPU scaling beyond one interpreter; "thread" mode shares one
+model, which is enough when the recognizer releases the GIL (Vosk does).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Optional, Union
+from app.utils.audio import SAMPLE_WIDTH, pcm_stream
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the wait queue is full"""
+
+
+class VoskRecognizerFactory:
+    """
+    Builds KaldiRecognizers for a sample rate. Picklable for process mode:
+    a worker process loads its own model from `model_path` on first use.
+    """
+
+    def __init__(self, model_path: str, model=None):
+        self.model_path = model_path
+        self._model = model
+
+    def __getstate__(self):
+        return {'model_path': self.model_path, '_model': None}
+
+    def __call__(self, sample_rate: int):
+        from vosk import KaldiRecognizer, Model
+        if self._model is None:
+            self._model = Model(self.model_path)
+        return KaldiRecognizer(self._model, sample_rate)
+
+
+class RecognizerCache:
+    """Idle recognizers per sample rate, reset between uses"""
+
+    def __init__(self, factory: Callable[[int], object], limit: int, max_live: Optional[int] = None):
+        """
+        Args:
+            factory (Callable[[int], object]): Builds a recognizer for a sample rate
+            limit (int): Idle recognizers kept per sample rate
+            max_live (int): Recognizers checked out at once, None for no cap
+        """
+        self.factory = factory
+        self.limit = limit
+        self.max_live = max_live
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.live = 0
+
+    def acquire(self, sample_rate: int):
+        """
+        Raises:
+            PoolSaturated: When `max_live` recognizers are already checked out
+        """
+        with self._lock:
+            if self.max_live is not None and self.live >= self.max_live:
+                raise PoolSaturated(f"{self.live} recognizers already in use")
+            self.live += 1
+            idle = self._idle[sample_rate]
+            if idle:
+                return idle.pop()
+            self.created += 1
+        try:
+            return self.factory(sample_rate)
+        except BaseException:
+            with self._lock:
+                self.live -= 1
+            raise
+
+    def release(self, sample_rate: int, recognizer):
+        try:
+            recognizer.Reset()
+        except BaseException:
+            with self._lock:
+                self.live -= 1
+            raise
+        with self._lock:
+            self.live -= 1
+            idle = self._idle[sample_rate]
+            if len(idle) < self.limit:
+                idle.append(recognizer)
+
+
+def transcribe_audio(audio: bytes, cache: RecognizerCache) -> dict:
+    """
+    Decode audio and run it through a pooled recognizer
+    Returns:
+        dict: text, audio_seconds, decode_seconds, recognize_seconds and started (monotonic time)
+    """
+    started = time.monotonic()
+    sample_rate, chunks = pcm_stream(audio)
+    recognizer = cache.acquire(sample_rate)
+    results, pcm_bytes, recognize_seconds = [], 0, 0.0
+    try:
+        for data in chunks:
+            pcm_bytes += len(data)
+            step = time.perf_counter()
+            if recognizer.AcceptWaveform(data):
+                results.append(json.loads(recognizer.Result()).get("text", ""))
+            recognize_seconds += time.perf_counter() - step
+        step = time.perf_counter()
+        results.append(json.loads(recognizer.FinalResult()).get("text", ""))
+        recognize_seconds += time.perf_counter() - step
+    finally:
+        cache.release(sample_rate, recognizer)
+    total = time.monotonic() - started
+    return {
+        'text': " ".join(r for r in results if r).strip(),
+        'audio_seconds': pcm_bytes / (SAMPLE_WIDTH * sample_rate),
+        'decode_seconds': total - recognize_seconds,
+        'recognize_seconds': recognize_seconds,
+        'started': started,
+    }
+
+
+# Each worker process keeps its own recognizers
+_process_cache: Optional[RecognizerCache] = None
+
+
+def _init_process(factory):
+    global _process_cache
+    _process_cache = RecognizerCache(factory, limit=1)
+
+
+def _transcribe_in_process(audio: bytes) -> dict:
+    return transcribe_audio(audio, _process_cache)
+
+
+class RecognizerPool:
+    def __init__(self, factory: Callable[[int], object], workers: int, max_queue: int, mode: str = "thread"):
+        """
+        Args:
+            factory (Callable[[int], object]): Builds a recognizer for a sample rate
+            workers (int): Transcriptions running at once
+            max_queue (int): Requests allowed to wait for a worker before new ones are rejected
+            mode (str): "thread" or "process"
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown recognizer pool mode '{mode}', expected 'thread' or 'process'")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.mode = mode
+        self.logger = logging.getLogger(__name__)
+
+        # Streams keep recognizer state between frames, so they always run on threads.
+        # Every stream is admitted first, so this cap is only a backstop
+        self.cache = RecognizerCache(factory, limit=workers, max_live=workers + max_queue)
+        self.thread_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asr")
+        if mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(factory,))
+        else:
+            self._executor = self.thread_executor
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.recognize_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests admitted but still waiting for a worker"""
+        return max(self.in_flight - self.workers, 0)
+
+    def admit(self):
+        """
+        Count a transcription in; pair with `leave`
+        Raises:
+            PoolSaturated: When ASR_MAX_QUEUE requests are already waiting
+        """
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.queue_depth} transcriptions already waiting")
+            self.in_flight += 1
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def checkout(self, sample_rate: int):
+        """
+        Admit a stream and give it a recognizer; pair with `checkin`
+        Raises:
+            PoolSaturated: When ASR_MAX_QUEUE requests are already waiting
+        """
+        self.admit()
+        try:
+            return self.cache.acquire(sample_rate)
+        except BaseException:
+            self.leave(None)
+            raise
+
+    def checkin(self, sample_rate: int, recognizer, result: Optional[dict]):
+        """Return a stream's recognizer and count the stream out"""
+        try:
+            self.cache.release(sample_rate, recognizer)
+        finally:
+            self.leave(result)
+
+    def leave(self, result: Optional[dict], wait_seconds: float = 0.0):
+        """
+        Count a transcription out
+        Args:
+            result (dict): As returned by `transcribe_audio`, None if it failed
+            wait_seconds (float): Time spent waiting for a worker
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if result is None:
+                self.failed += 1
+                return
+            self.completed += 1
+            self.wait_seconds += wait_seconds
+            self.audio_seconds += result['audio_seconds']
+            self.decode_seconds += result['decode_seconds']
+            self.recognize_seconds += result['recognize_seconds']
+
+    async def transcribe(self, audio: Union[bytes, AsyncIterator[bytes]]) -> dict:
+        """
+        Transcribe on a pool worker
+        Args:
+            audio (bytes | AsyncIterator[bytes]): The file, or its pieces as they
+                arrive; pieces are only read once the request is admitted
+        Returns:
+            dict: See `transcribe_audio`
+        Raises:
+            PoolSaturated: When ASR_MAX_QUEUE requests are already waiting
+        """
+        self.admit()
+        enqueued = time.monotonic()
+        loop = asyncio.get_running_loop()
+        result = None
+        try:
+            if not isinstance(audio, bytes):
+                audio = b"".join([chunk async for chunk in audio])
+            if self.mode == "process":
+                result = await loop.run_in_executor(self._executor, _transcribe_in_process, audio)
+            else:
+                result = await loop.run_in_executor(self._executor, transcribe_audio, audio, self.cache)
+        finally:
+            self.leave(result, max(result['started'] - enqueued, 0.0) if result else 0.0)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            busy = self.decode_seconds + self.recognize_seconds
+            return {
+                'mode': self.mode,
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'failed': self.failed,
+                'recognizers_created': self.cache.created,
+                'recognizers_in_use': self.cache.live,
+                'avg_wait_seconds': self.wait_seconds / self.completed if self.completed else 0.0,
+                'audio_seconds': self.audio_seconds,
+                'decode_seconds': self.decode_seconds,
+                'recognize_seconds': self.recognize_seconds,
+                # Processing time per second of audio; below 1 is faster than real time
+                'real_time_factor': busy / self.audio_seconds if self.audio_seconds else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._executor is not self.thread_executor:
+            self.thread_executor.shutdown(wait=False, cancel_futures=True)
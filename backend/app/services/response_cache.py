@@ -0,0 +1,184 @@
+# app/services/response_cache.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Tuple
+import numpy as np
+
+
+def load_pairs(path) -> list:
+    """Labelled question pairs: [{"a": str, "b": str, "duplicate": bool}]"""
+    with open(Path(path), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def calibrate_threshold(pairs: list, embed: Callable[[str], np.ndarray], margin: float = 0.005,
+                        ceiling: float = 0.999) -> Tuple[float, dict]:
+    """
+    Pick the lowest similarity threshold that keeps every labelled near-miss
+    pair apart. Averaged word vectors put questions about different plans
+    very close together, so a fixed threshold is not safe across models.
+    Args:
+        pairs (list): Output of `load_pairs`
+        embed (Callable[[str], np.ndarray]): Unit-length embedding of a question
+        margin (float): Added to the most similar near-miss pair
+        ceiling (float): Highest threshold, so verbatim repeats still match
+    Returns:
+        tuple: (threshold, report with the closest near miss and the share of duplicates matched)
+    """
+    scores = [float(embed(pair['a']) @ embed(pair['b'])) for pair in pairs]
+    duplicates = [s for s, pair in zip(scores, pairs) if pair['duplicate']]
+    near_misses = [s for s, pair in zip(scores, pairs) if not pair['duplicate']]
+    threshold = min(max(near_misses, default=0.0) + margin, ceiling)
+    report = {
+        'pairs': len(pairs),
+        'closest_near_miss': max(near_misses, default=None),
+        'duplicate_recall': float(np.mean([s >= threshold for s in duplicates])) if duplicates else None,
+    }
+    logging.getLogger(__name__).info(f"Response cache threshold calibrated to {threshold:.4f}: {report}")
+    return threshold, report
+
+
+class SemanticResponseCache:
+    """
+    Caches LLM answers by query embedding, so a reworded question whose
+    embedding is within `threshold` cosine similarity of a cached one is
+    answered without another LLM call.
+
+    Embeddings live in one preallocated matrix, so a lookup is a single
+    matrix-vector product over at most `max_entries` rows. Entries are evicted
+    least-recently-used once the cache is full and expire after `ttl`
+    seconds. Everything is dropped when the index generation changes, i.e.
+    when a new corpus is swapped in.
+    """
+
+    def __init__(self, dim: int, max_entries: int = 1024, ttl: float = 3600.0,
+                 threshold: float = 0.95, clock=time.monotonic):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._active = np.zeros(max_entries, dtype=bool)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._scopes = np.full(max_entries, -1, dtype=np.int64)
+        self._responses = [None] * max_entries
+        self._scope_ids = {}
+        self._lru = OrderedDict()  # slot -> None, least recently used first
+        self._free = list(range(max_entries - 1, -1, -1))
+        self.generation = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def scope(**parts) -> str:
+        """Stable key for whatever besides the question shapes an answer, e.g. filters"""
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def _scope_id(self, scope: str) -> int:
+        return self._scope_ids.setdefault(scope, len(self._scope_ids))
+
+    def _release(self, slot: int):
+        self._active[slot] = False
+        self._responses[slot] = None
+        self._lru.pop(slot, None)
+        self._free.append(slot)
+
+    def _sync_generation(self, generation):
+        if generation != self.generation:
+            if self._lru:
+                self.invalidations += 1
+                self.logger.info(f"Index generation changed, dropping {len(self._lru)} cached responses")
+            self._clear()
+            self.generation = generation
+
+    def _clear(self):
+        for slot in list(self._lru):
+            self._release(slot)
+        self._scope_ids.clear()
+
+    def _best_match(self, embedding: np.ndarray, scope: str):
+        """Slot of the most similar live entry in `scope` above the threshold, or None"""
+        scope_id = self._scope_ids.get(scope)
+        if scope_id is None or not self._lru:
+            return None
+        expired = np.flatnonzero(self._active & (self._expires <= self.clock()))
+        for slot in expired:
+            self._release(int(slot))
+        self.expirations += len(expired)
+
+        scores = self._vectors @ embedding
+        scores[~self._active | (self._scopes != scope_id)] = -np.inf
+        slot = int(np.argmax(scores))
+        return slot if scores[slot] >= self.threshold else None
+
+    def get(self, embedding: np.ndarray, scope: str = '', generation=None):
+        """
+        Args:
+            embedding (np.ndarray): Unit-length query embedding
+            scope (str): Key from `scope()`; only entries with the same scope match
+            generation: Current index generation
+        Returns:
+            str: The cached response, or None on a miss
+        """
+        with self._lock:
+            self._sync_generation(generation)
+            slot = self._best_match(embedding, scope)
+            if slot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._lru.move_to_end(slot)
+            return self._responses[slot]
+
+    def put(self, embedding: np.ndarray, response: str, scope: str = '', generation=None):
+        """Cache a response, replacing a near-identical entry in the same scope if there is one"""
+        with self._lock:
+            self._sync_generation(generation)
+            slot = self._best_match(embedding, scope)
+            if slot is None:
+                if not self._free:
+                    oldest, _ = self._lru.popitem(last=False)
+                    self._release(oldest)
+                    self.evictions += 1
+                slot = self._free.pop()
+            self._vectors[slot] = embedding
+            self._active[slot] = True
+            self._expires[slot] = self.clock() + self.ttl
+            self._scopes[slot] = self._scope_id(scope)
+            self._responses[slot] = response
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self):
+        return len(self._lru)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._lru),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'generation': self.generation,
+            'threshold': self.threshold,
+        }
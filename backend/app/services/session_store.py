@@ -0,0 +1,291 @@
+# app/services/session_store.py
+"""
+Per-user conversation sessions.
+
+Each session keeps its most recent messages in a fixed-size ring buffer in
+RAM; only `max_sessions` sessions stay resident and the least recently used
+are evicted. Every message is also appended to SQLite through a write-behind
+queue that a background thread flushes in batches, so a crash loses at most
+one flush interval and requests never wait on disk. An evicted session is
+reloaded from the database the next time its user writes.
+
+Older turns can be folded into a rolling summary (see LlamaService); the
+summary covers every message up to its `summary_until` timestamp and is
+stored alongside the message log.
+
+Requests without a user or session id all map to DEFAULT_SESSION. Clients
+cannot tell each other apart there, so it keeps no history: nothing is
+recorded for it and it always reads as empty.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple, Tuple
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, Text, create_engine, event, select
+from app.config import settings
+
+metadata = MetaData()
+messages_table = Table(
+    'messages', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', String(128), nullable=False),
+    Column('session_id', String(128), nullable=False),
+    Column('role', String(16), nullable=False),
+    Column('content', Text, nullable=False),
+    Column('created_at', Float, nullable=False),
+    Index('ix_messages_session', 'user_id', 'session_id', 'id'),
+)
+summaries_table = Table(
+    'session_summaries', metadata,
+    Column('user_id', String(128), primary_key=True),
+    Column('session_id', String(128), primary_key=True),
+    Column('summary', Text, nullable=False),
+    Column('summary_until', Float, nullable=False),
+)
+
+
+class SessionKey(NamedTuple):
+    user_id: str
+    session_id: str
+
+
+DEFAULT_SESSION = SessionKey('anonymous', 'default')
+
+
+def session_key(user_id: str = None, session_id: str = None) -> SessionKey:
+    return SessionKey(user_id or DEFAULT_SESSION.user_id, session_id or DEFAULT_SESSION.session_id)
+
+
+def is_anonymous(key: SessionKey) -> bool:
+    """Whether `key` is the shared session of requests that sent no ids, which keeps no history"""
+    return key == DEFAULT_SESSION
+
+
+class Message:
+    """One conversation turn; role is 'human' for the user and 'ai' for the assistant"""
+    __slots__ = ('type', 'content', 'created_at')
+
+    def __init__(self, role: str, content: str, created_at: float = None):
+        self.type = role
+        self.content = content
+        self.created_at = created_at if created_at is not None else time.time()
+
+
+class Session:
+    """Ring buffer of a session's most recent messages, plus the summary of older ones"""
+    __slots__ = ('key', 'messages', 'last_access', 'summary', 'summary_until')
+
+    def __init__(self, key: SessionKey, max_messages: int, messages=(), summary: str = "",
+                 summary_until: float = 0.0):
+        self.key = key
+        self.messages = deque(messages, maxlen=max_messages)
+        self.last_access = time.monotonic()
+        self.summary = summary
+        self.summary_until = summary_until
+
+    def history(self, k: int) -> list:
+        """The last `k` messages, oldest first"""
+        if k <= 0:
+            return []
+        return list(self.messages)[-k:]
+
+
+class SessionStore:
+    def __init__(self, db_url: str = None, max_messages: int = None, max_sessions: int = None,
+                 flush_interval: float = None, flush_batch: int = 256):
+        """
+        Args:
+            db_url (str): SQLAlchemy URL of the message log
+            max_messages (int): Ring buffer size per session
+            max_sessions (int): Sessions kept in RAM before LRU eviction
+            flush_interval (float): Seconds between write-behind flushes
+            flush_batch (int): Pending messages that trigger an early flush
+        """
+        self.max_messages = max_messages or settings.SESSION_MAX_MESSAGES
+        self.max_sessions = max_sessions or settings.SESSION_MAX_IN_MEMORY
+        self.flush_interval = flush_interval if flush_interval is not None else settings.SESSION_FLUSH_INTERVAL
+        self.flush_batch = flush_batch
+        self.logger = logging.getLogger(__name__)
+
+        self.engine = create_engine(db_url or settings.SESSION_DB_URL)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._sqlite_pragmas)
+        metadata.create_all(self.engine)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._sessions = OrderedDict()  # SessionKey -> Session, least recently used first
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.evictions = 0
+        self.flushed = 0
+        self.flushes = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='session-flush', daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def _sqlite_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        # WAL lets several API workers read while one writes
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    def get(self, key: SessionKey) -> Session:
+        """The session for `key`, loading it from the database if it is not in RAM"""
+        if is_anonymous(key):
+            # Always empty, even if an older version logged anonymous messages
+            return Session(key, self.max_messages)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                session.last_access = time.monotonic()
+                return session
+
+        session = Session(key, self.max_messages, *self._load(key))
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep the first copy
+            existing = self._sessions.get(key)
+            if existing is not None:
+                self._sessions.move_to_end(key)
+                return existing
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return session
+
+    def history(self, key: SessionKey, k: int) -> list:
+        session = self.get(key)
+        with self._lock:
+            return session.history(k)
+
+    def has_history(self, key: SessionKey) -> bool:
+        """Whether the session has messages or a summary that would shape its next answer"""
+        session = self.get(key)
+        with self._lock:
+            return bool(session.messages or session.summary)
+
+    def snapshot(self, key: SessionKey) -> Tuple[str, float, list]:
+        """The session's summary, its watermark and a copy of its messages, oldest first"""
+        session = self.get(key)
+        with self._lock:
+            return session.summary, session.summary_until, list(session.messages)
+
+    def append(self, key: SessionKey, role: str, content: str):
+        """Add a message to the session and queue it for the database"""
+        if is_anonymous(key):
+            return
+        session = self.get(key)
+        with self._lock:
+            message = Message(role, content)
+            if session.messages and message.created_at <= session.messages[-1].created_at:
+                # Timestamps order messages against the summary watermark, so keep them strictly increasing
+                message.created_at = session.messages[-1].created_at + 1e-6
+            session.messages.append(message)
+            self._pending.append({
+                'user_id': key.user_id,
+                'session_id': key.session_id,
+                'role': role,
+                'content': content,
+                'created_at': message.created_at,
+            })
+            if len(self._pending) >= self.flush_batch:
+                self._wakeup.set()
+
+    def save_exchange(self, key: SessionKey, question: str, answer: str):
+        if question:
+            self.append(key, 'human', question)
+        if answer:
+            self.append(key, 'ai', answer)
+
+    def set_summary(self, key: SessionKey, summary: str, until: float):
+        """
+        Store the rolling summary of a session's messages up to `until`.
+        An older summary finishing late never replaces a newer one.
+        """
+        if is_anonymous(key):
+            return
+        session = self.get(key)
+        with self._lock:
+            if until <= session.summary_until:
+                return
+            session.summary, session.summary_until = summary, until
+        values = {'summary': summary, 'summary_until': until}
+        where = (summaries_table.c.user_id == key.user_id) & (summaries_table.c.session_id == key.session_id)
+        with self.engine.begin() as conn:
+            updated = conn.execute(
+                summaries_table.update().where(where, summaries_table.c.summary_until < until).values(**values)
+            ).rowcount
+            if not updated and conn.execute(select(summaries_table.c.summary_until).where(where)).first() is None:
+                conn.execute(summaries_table.insert().values(
+                    user_id=key.user_id, session_id=key.session_id, **values
+                ))
+
+    def _load(self, key: SessionKey) -> tuple:
+        # Pending writes must reach the database first, or a reload after eviction would miss them
+        self.flush()
+        query = (
+            select(messages_table.c.role, messages_table.c.content, messages_table.c.created_at)
+            .where(messages_table.c.user_id == key.user_id, messages_table.c.session_id == key.session_id)
+            .order_by(messages_table.c.id.desc())
+            .limit(self.max_messages)
+        )
+        summary_query = select(summaries_table.c.summary, summaries_table.c.summary_until).where(
+            summaries_table.c.user_id == key.user_id, summaries_table.c.session_id == key.session_id
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+            summary = conn.execute(summary_query).first()
+        messages = [Message(role, content, created_at) for role, content, created_at in reversed(rows)]
+        return (messages, *summary) if summary else (messages,)
+
+    def flush(self) -> int:
+        """Write all pending messages in one transaction, returning how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(messages_table.insert(), batch)
+            except Exception as e:
+                self.logger.error(f"Failed to persist {len(batch)} messages: {str(e)}")
+                with self._lock:
+                    self._pending[:0] = batch
+                return 0
+            self.flushed += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background writer and flush what is left"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self.engine.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'sessions_in_memory': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'pending_writes': len(self._pending),
+                'flushed': self.flushed,
+                'flushes': self.flushes,
+                'evictions': self.evictions,
+            }
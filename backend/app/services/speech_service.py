@@ -1,14 +1,151 @@
 import asyncio
-import tempfile
 import os
-import subprocess
 import json
-import wave
-from vosk import Model, KaldiRecognizer  # for Vosk usage
-from gtts import gTTS
+import threading
+import time
+from vosk import Model  # for Vosk usage
 import logging
 from pathlib import Path
 from pydantic import BaseModel  # needed for TextResponse
+from typing import AsyncIterator, Callable, List, Optional, Union
+from app.config import settings
+from app.utils.audio import (
+    SAMPLE_WIDTH, TARGET_RATE, FfmpegStreamDecoder, WavStreamDecoder,
+    container_format, parse_wav_header
+)
+from .recognizer_pool import PoolSaturated, RecognizerPool, VoskRecognizerFactory
+from .tts_service import TTSService
+
+class StreamingRecognition:
+    """
+    Recognition of audio that arrives while the user is still speaking.
+    Raw 16-bit PCM goes straight to the recognizer; other formats (WebM/Ogg
+    Opus) go through an incremental ffmpeg decoder first.
+    """
+    def __init__(self, recognizer, sample_rate: int, decoder=None,
+                 executor=None, release: Optional[Callable] = None, partials: bool = True):
+        """
+        Args:
+            recognizer: KaldiRecognizer for `sample_rate`
+            sample_rate (int): Rate of the PCM reaching the recognizer
+            decoder: FfmpegStreamDecoder or WavStreamDecoder for non-PCM input
+            executor: Where recognition runs; None for the loop's default executor
+            release (Callable): Called with the recognizer on close, e.g. to return it to a pool
+            partials (bool): Report changing hypotheses; uploads only need the final transcript
+        """
+        self.recognizer = recognizer
+        self.sample_rate = sample_rate
+        self.decoder = decoder
+        self.executor = executor
+        self.release = release
+        self.partials = partials
+        self.segments = []
+        self.partial = ""
+        self.pcm_bytes = 0
+        self.recognize_seconds = 0.0
+        self.finished = False
+        # Held while a feed/finish runs; close() leaves the release to that job
+        self._busy = threading.Lock()
+        self._closed = False
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.pcm_bytes / (SAMPLE_WIDTH * self.sample_rate)
+
+    @property
+    def result(self) -> Optional[dict]:
+        """Counters for `RecognizerPool.leave` once the transcript is final, None before"""
+        if not self.finished:
+            return None
+        return {
+            'audio_seconds': self.audio_seconds,
+            'decode_seconds': 0.0,  # overlaps with the audio arriving, and with recognition in ffmpeg
+            'recognize_seconds': self.recognize_seconds,
+        }
+
+    def _accept(self, pcm: bytes) -> List[dict]:
+        if not pcm:
+            return []
+        self.pcm_bytes += len(pcm)
+        start = time.perf_counter()
+        try:
+            return self._recognize(pcm)
+        finally:
+            self.recognize_seconds += time.perf_counter() - start
+
+    def _recognize(self, pcm: bytes) -> List[dict]:
+        if self.recognizer.AcceptWaveform(pcm):
+            # Vosk detected the end of an utterance
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            self.partial = ""
+            if text:
+                self.segments.append(text)
+                return [{"type": "segment", "text": text}]
+            return []
+        if not self.partials:
+            return []
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if partial and partial != self.partial:
+            self.partial = partial
+            return [{"type": "partial", "text": partial}]
+        return []
+
+    def _feed(self, data: bytes) -> List[dict]:
+        return self._accept(self.decoder.feed(data) if self.decoder else data)
+
+    def _finish(self) -> str:
+        if self.decoder:
+            self._accept(self.decoder.close())
+        start = time.perf_counter()
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        self.recognize_seconds += time.perf_counter() - start
+        if text:
+            self.segments.append(text)
+        self.finished = True
+        return " ".join(self.segments).strip()
+
+    def _guarded(self, work: Callable, *args):
+        # A cancelled feed keeps running on its executor thread, so the
+        # recognizer only goes back to the pool once that job is done with it
+        with self._busy:
+            try:
+                if self.recognizer is None:
+                    raise RuntimeError("Recognition is closed")
+                return work(*args)
+            finally:
+                if self._closed:
+                    self._release()
+
+    def _release(self):
+        recognizer, self.recognizer = self.recognizer, None
+        if self.release and recognizer is not None:
+            self.release(recognizer)
+
+    async def feed(self, data: bytes) -> List[dict]:
+        """
+        Recognize the next piece of audio
+        Returns:
+            List[dict]: `partial` events when the hypothesis changes, `segment` when an utterance ends
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._guarded, self._feed, data)
+
+    async def finish(self) -> str:
+        """Flush the recognizer and return the whole transcript"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._guarded, self._finish)
+
+    def close(self):
+        """
+        Stop decoding and hand the recognizer back. When a feed is still
+        running (its caller was cancelled) that feed releases it on exit.
+        """
+        self._closed = True
+        if self.decoder:
+            self.decoder.kill()
+        if self._busy.acquire(blocking=False):
+            try:
+                self._release()
+            finally:
+                self._busy.release()
 
 class SpeechService:
     def __init__(self):
@@ -19,87 +156,146 @@ class SpeechService:
             raise Exception(f"Vosk model path not found: {model_path}")
         self.model = Model(model_path)
         self.logger = logging.getLogger(__name__)
+        # Uploads and live streams share a bounded pool of reusable recognizers
+        self.pool = RecognizerPool(
+            VoskRecognizerFactory(model_path, self.model),
+            workers=settings.ASR_WORKERS,
+            max_queue=settings.ASR_MAX_QUEUE,
+            mode=settings.ASR_POOL_MODE
+        )
+        self.tts = TTSService()
 
-    async def speech_to_text(self, audio_content: bytes) -> str:
-        """Convert speech to text using Vosk. Expects an mp3 file in bytes."""
-        # Save incoming mp3 audio to a temporary file.
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_mp3:
-            temp_mp3.write(audio_content)
-            mp3_path = temp_mp3.name
-
-        # Create a temporary wav file path.
-        wav_path = mp3_path.rsplit(".", 1)[0] + ".wav"
+    async def speech_to_text(self, audio_content: Union[bytes, AsyncIterator[bytes]]) -> str:
+        """
+        Convert speech to text using Vosk. Accepts WAV or MP3 bytes, decoded in memory,
+        or their pieces, which are collected once the pool admits the request.
+        Raises:
+            PoolSaturated: When too many transcriptions are already waiting
+        """
         try:
-            # Convert mp3 to wav using ffmpeg (16kHz, mono).
-            # Note: The "-y" flag is placed right after "ffmpeg" to force overwrite.
-            command = [
-                "ffmpeg",
-                "-y",
-                "-i", mp3_path,
-                "-ar", "16000",
-                "-ac", "1",
-                "-f", "wav",
-                wav_path
-            ]
-            await asyncio.to_thread(subprocess.run, command, check=True)
-
-            # Run the blocking Vosk transcription on a separate thread.
-            transcription = await asyncio.to_thread(self._transcribe, wav_path)
-
-            # Optionally, print the transcription if non-empty.
+            # Decode and transcribe on the recognizer pool
+            result = await self.pool.transcribe(audio_content)
+            transcription = result['text']
+            self.logger.info(
+                f"Transcribed {result['audio_seconds']:.1f}s of audio "
+                f"(decode {result['decode_seconds']:.2f}s, recognize {result['recognize_seconds']:.2f}s)"
+            )
+
             if transcription:
-                print("Transcription:", transcription)
+                self.logger.debug(f"Transcription: {transcription}")
 
             return transcription
 
+        except PoolSaturated:
+            self.logger.warning("Speech recognition pool is saturated, rejecting upload")
+            raise
         except Exception as e:
             self.logger.error(f"Error in speech to text conversion: {str(e)}")
             raise
 
-        finally:
-            # Clean up temporary files.
-            if os.path.exists(mp3_path):
-                os.unlink(mp3_path)
-            if os.path.exists(wav_path):
-                os.unlink(wav_path)
-
-    def _transcribe(self, wav_path: str) -> str:
-        """Helper method to transcribe a wav file using Vosk."""
-        results = []
-        with wave.open(wav_path, "rb") as wf:
-            rec = KaldiRecognizer(self.model, wf.getframerate())
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
-                if rec.AcceptWaveform(data):
-                    res = json.loads(rec.Result())
-                    results.append(res.get("text", ""))
-            final_result = json.loads(rec.FinalResult())
-            results.append(final_result.get("text", ""))
-        transcription = " ".join(results).strip()
-        return transcription
-
-    async def text_to_speech(self, text: str, lang_code: str) -> bytes:
-        """Convert text to speech using gTTS and return an mp3 file in bytes."""
-        return await asyncio.to_thread(self._generate_tts, text, lang_code)
-
-    def _generate_tts(self, text: str, lang_code: str) -> bytes:
-        """Helper method to generate TTS audio and return its bytes."""
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-            temp_filename = temp_file.name
+    async def transcribe_upload(self, chunks: AsyncIterator[bytes]) -> str:
+        """
+        Transcribe an upload while it is still arriving: 16-bit PCM WAV goes to
+        the recognizer as its bytes come in, other formats through a streaming
+        ffmpeg decoder. Counts against the recognizer pool's admission limit.
+        In process mode the upload is collected once admitted and transcribed
+        whole on a worker process, since recognizer state cannot be shared with it.
+        Args:
+            chunks (AsyncIterator[bytes]): The file in order; the first piece must hold the WAV header
+        Raises:
+            PoolSaturated: When too many transcriptions are already waiting
+            AudioDecodeError: When the audio cannot be decoded
+        """
+        if self.pool.mode == "process":
+            return await self.speech_to_text(chunks)
+        recognition = None
+        started = time.perf_counter()
         try:
-            tts = gTTS(text=text, lang=lang_code)
-            tts.save(temp_filename)
-            with open(temp_filename, 'rb') as f:
-                audio_content = f.read()
-            return audio_content
+            async for chunk in chunks:
+                if recognition is None:
+                    recognition = self._open_upload(chunk)
+                await recognition.feed(chunk)
+            if recognition is None:
+                return ""
+            transcription = await recognition.finish()
+            self.logger.info(
+                f"Transcribed {recognition.audio_seconds:.1f}s of streamed audio in "
+                f"{time.perf_counter() - started:.2f}s (recognize {recognition.recognize_seconds:.2f}s)"
+            )
+            return transcription
+        except PoolSaturated:
+            self.logger.warning("Speech recognition pool is saturated, rejecting upload")
+            raise
         except Exception as e:
-            self.logger.error(f"Error in text to speech generation: {str(e)}")
+            self.logger.error(f"Error in speech to text conversion: {str(e)}")
             raise
         finally:
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
+            if recognition is not None:
+                recognition.close()
+
+    def _checkout(self, sample_rate: int, decoder_factory: Optional[Callable] = None,
+                  partials: bool = True) -> StreamingRecognition:
+        """
+        Recognition on a recognizer checked out of the pool, so it counts
+        against the same admission limit as every other transcription until
+        it is closed
+        Args:
+            sample_rate (int): Rate of the PCM reaching the recognizer
+            decoder_factory (Callable): Builds the decoder, once the stream is admitted
+            partials (bool): See StreamingRecognition
+        Raises:
+            PoolSaturated: When too many transcriptions are already waiting
+        """
+        recognizer = self.pool.checkout(sample_rate)
+        try:
+            decoder = decoder_factory() if decoder_factory else None
+        except BaseException:
+            self.pool.checkin(sample_rate, recognizer, None)
+            raise
+
+        def release(recognizer):
+            self.pool.checkin(sample_rate, recognizer, recognition.result)
+
+        recognition = StreamingRecognition(
+            recognizer, sample_rate, decoder,
+            executor=self.pool.thread_executor,
+            release=release,
+            partials=partials
+        )
+        return recognition
+
+    def _open_upload(self, head: bytes) -> StreamingRecognition:
+        """Recognition for an upload, picking the decoder from its first bytes"""
+        if container_format(head) == 'wav':
+            header = parse_wav_header(head)
+            if header is not None and header.format_tag == 1 and header.sample_width == SAMPLE_WIDTH:
+                return self._checkout(header.sample_rate, lambda: WavStreamDecoder(header), partials=False)
+        # MP3, WebM/Ogg from MediaRecorder, float WAV...
+        return self._checkout(TARGET_RATE, lambda: FfmpegStreamDecoder(TARGET_RATE), partials=False)
+
+    def stats(self) -> dict:
+        return {**self.pool.stats(), 'tts': self.tts.stats()}
+
+    def shutdown(self):
+        self.pool.shutdown()
+        self.tts.close()
+
+    def open_stream(self, audio_format: str = "pcm16", sample_rate: int = TARGET_RATE) -> StreamingRecognition:
+        """
+        Start recognizing a live recording
+        Args:
+            audio_format (str): "pcm16" for raw 16-bit mono PCM, anything else (e.g. "webm", "ogg") is decoded by ffmpeg
+            sample_rate (int): Sample rate of raw PCM
+        Raises:
+            PoolSaturated: When too many transcriptions are already waiting
+        """
+        if audio_format == "pcm16":
+            return self._checkout(sample_rate)
+        return self._checkout(TARGET_RATE, lambda: FfmpegStreamDecoder(TARGET_RATE))
+
+    async def text_to_speech(self, text: str, lang_code: str) -> bytes:
+        """Convert text to speech sentence by sentence and return one audio file in bytes."""
+        return await self.tts.text_to_speech(text, lang_code)
 
 class TextResponse(BaseModel):
     response: str
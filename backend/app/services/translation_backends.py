@@ -0,0 +1,108 @@
+# app/services/translation_backends.py
+"""
+Machine translation backends.
+
+A backend translates a batch of sentences for one language pair and may be
+called from several threads at once. `get_backend` picks one by name
+(TRANSLATION_BACKEND); register new ones in BACKENDS.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+from deep_translator import GoogleTranslator
+from app.config import settings
+
+# Joins a batch into one request; Google keeps line breaks in its output
+BATCH_SEPARATOR = "\n"
+
+
+class TranslationBackend:
+    name = "base"
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        """
+        Args:
+            texts (List[str]): Sentences to translate
+            source (str): Source language code
+            target (str): Target language code
+        Returns:
+            List[str]: One translation per input, in order
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(TranslationBackend):
+    """
+    deep_translator's GoogleTranslator, pooled per language pair.
+    A translator rewrites its request parameters on every call, so each
+    instance serves one thread at a time; the pool size bounds concurrent
+    requests per pair.
+    """
+    name = "google"
+
+    def __init__(self, pool_size: int = None):
+        self.pool_size = pool_size or settings.TRANSLATION_POOL_SIZE
+        self._pools: Dict[Tuple[str, str], queue.Queue] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _pool(self, source: str, target: str) -> queue.Queue:
+        with self._lock:
+            pool = self._pools.get((source, target))
+            if pool is None:
+                pool = queue.Queue()
+                for _ in range(self.pool_size):
+                    pool.put(GoogleTranslator(source=source, target=target))
+                self._pools[(source, target)] = pool
+            return pool
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        pool = self._pool(source, target)
+        translator = pool.get()
+        try:
+            joined = translator.translate(BATCH_SEPARATOR.join(texts))
+            parts = joined.split(BATCH_SEPARATOR) if joined else []
+            if len(parts) == len(texts):
+                return [p.strip() for p in parts]
+            # Sentences were merged or split across lines; fall back to one request each
+            self.logger.debug(f"Batch of {len(texts)} came back as {len(parts)} lines, retrying one by one")
+            return [translator.translate(text) for text in texts]
+        finally:
+            pool.put(translator)
+
+
+class StubBackend(TranslationBackend):
+    """
+    Offline stand-in for tests and load runs: tags each sentence with the
+    target language after an optional per-request delay
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.sentences = 0
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        with self._lock:
+            self.calls += 1
+            self.sentences += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [f"[{target}] {text}" for text in texts]
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def get_backend(name: str = None) -> TranslationBackend:
+    name = name or settings.TRANSLATION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,172 @@
+# app/services/translation_cache.py
+"""
+Sentence translation cache: an LRU in RAM in front of a SQLite table.
+
+Entries are keyed by (SHA-1 of the text, source, target), so the key size
+does not depend on sentence length. Lookups that miss RAM go to SQLite in
+one query per language pair, and the table is pruned to `max_rows` by last
+use, so translations survive restarts without growing without bound.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import Column, Float, Index, MetaData, String, Table, Text, create_engine, event, func, select
+from app.config import settings
+
+CacheKey = Tuple[str, str, str]  # (text hash, source, target)
+
+metadata = MetaData()
+translations_table = Table(
+    'translations', metadata,
+    Column('text_hash', String(40), primary_key=True),
+    Column('source', String(8), primary_key=True),
+    Column('target', String(8), primary_key=True),
+    Column('translation', Text, nullable=False),
+    Column('last_used', Float, nullable=False),
+    Index('ix_translations_last_used', 'last_used'),
+)
+
+
+def cache_key(text: str, source: str, target: str) -> CacheKey:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest(), source, target
+
+
+class TranslationCache:
+    def __init__(self, db_url: str = None, max_entries: int = None, max_rows: int = None):
+        """
+        Args:
+            db_url (str): SQLAlchemy URL of the persistent table
+            max_entries (int): Translations kept in RAM
+            max_rows (int): Translations kept on disk
+        """
+        self.max_entries = max_entries or settings.TRANSLATION_CACHE_SIZE
+        self.max_rows = max_rows or settings.TRANSLATION_CACHE_MAX_ROWS
+        self.logger = logging.getLogger(__name__)
+
+        self.engine = create_engine(db_url or settings.TRANSLATION_CACHE_DB_URL)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._sqlite_pragmas)
+        metadata.create_all(self.engine)
+        with self.engine.connect() as conn:
+            self._rows = conn.execute(select(func.count()).select_from(translations_table)).scalar()
+
+        self._lock = threading.Lock()
+        self._entries: Dict[CacheKey, str] = OrderedDict()  # least recently used first
+        self._touched: Dict[CacheKey, float] = {}  # RAM hits whose last_used is not on disk yet
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _sqlite_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    def _remember(self, key: CacheKey, translation: str):
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, str]:
+        """Cached translations for those of `keys` that have one"""
+        found, missing = {}, {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                translation = self._entries.get(key)
+                if translation is not None:
+                    self._entries.move_to_end(key)
+                    self._touched[key] = now
+                    found[key] = translation
+                else:
+                    missing.setdefault(key[1:], set()).add(key[0])
+            self.memory_hits += len(found)
+
+        loaded = {}
+        if missing:
+            with self.engine.connect() as conn:
+                for (source, target), hashes in missing.items():
+                    rows = conn.execute(
+                        select(translations_table.c.text_hash, translations_table.c.translation).where(
+                            translations_table.c.source == source,
+                            translations_table.c.target == target,
+                            translations_table.c.text_hash.in_(hashes),
+                        )
+                    )
+                    loaded.update(((text_hash, source, target), translation) for text_hash, translation in rows)
+        with self._lock:
+            for key, translation in loaded.items():
+                self._remember(key, translation)
+                self._touched[key] = now
+            self.disk_hits += len(loaded)
+            self.misses += sum(len(hashes) for hashes in missing.values()) - len(loaded)
+        found.update(loaded)
+        return found
+
+    def put_many(self, translations: Dict[CacheKey, str]):
+        """Store new translations in RAM and on disk, with the last-use times of recent hits"""
+        now = time.time()
+        with self._lock:
+            for key, translation in translations.items():
+                self._remember(key, translation)
+            touched, self._touched = self._touched, {}
+        rows = [
+            {'text_hash': h, 'source': s, 'target': t, 'translation': translation, 'last_used': now}
+            for (h, s, t), translation in translations.items()
+        ]
+        try:
+            with self.engine.begin() as conn:
+                self._write(conn, rows, touched)
+        except Exception as e:
+            # The cache is an optimization; a failed write only costs a re-translation later
+            self.logger.error(f"Failed to persist {len(rows)} translations: {str(e)}")
+
+    def _write(self, conn, rows: list, touched: Dict[CacheKey, float]):
+        table = translations_table
+        for (text_hash, source, target), last_used in touched.items():
+            conn.execute(table.update().where(
+                table.c.text_hash == text_hash, table.c.source == source, table.c.target == target
+            ).values(last_used=last_used))
+        replaced = 0
+        for row in rows:
+            replaced += conn.execute(table.delete().where(
+                table.c.text_hash == row['text_hash'], table.c.source == row['source'],
+                table.c.target == row['target']
+            )).rowcount
+        if rows:
+            conn.execute(table.insert(), rows)
+            # Rewritten keys do not add rows, so only count the new ones
+            self._rows += len(rows) - replaced
+        if self._rows > self.max_rows:
+            # Prune to 90% so the delete does not run on every insert
+            keep = int(self.max_rows * 0.9)
+            cutoff = conn.execute(
+                select(table.c.last_used).order_by(table.c.last_used.desc()).offset(keep).limit(1)
+            ).scalar()
+            if cutoff is not None:
+                conn.execute(table.delete().where(table.c.last_used <= cutoff))
+            self._rows = conn.execute(select(func.count()).select_from(table)).scalar()
+
+    def close(self):
+        """Write pending last-use times and release the database"""
+        self.put_many({})
+        self.engine.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries_in_memory': len(self._entries),
+                'max_entries': self.max_entries,
+                'rows_on_disk': self._rows,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
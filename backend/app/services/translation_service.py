@@ -1,20 +1,47 @@
 # app/services/translation_service.py
-from deep_translator import GoogleTranslator
-from langdetect import detect
 import logging
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from app.config import settings
+from app.utils.sentences import split_sentences
+from .language_detector import LanguageDetector
+from .translation_backends import TranslationBackend, get_backend
+from .translation_cache import TranslationCache, cache_key
 
 class TranslationService:
-    def __init__(self):
+    """
+    Translates sentence by sentence: each sentence is looked up in the
+    translation cache, and the ones not found are grouped into batches of up
+    to TRANSLATION_BATCH_CHARS that are sent to the backend concurrently.
+    A repeated answer, or one that shares sentences with an earlier answer,
+    costs only its new sentences.
+    """
+    def __init__(self, backend: TranslationBackend = None, cache: Optional[TranslationCache] = None):
+        """
+        Args:
+            backend (TranslationBackend): Defaults to TRANSLATION_BACKEND
+            cache (TranslationCache): Defaults to a cache at TRANSLATION_CACHE_DB_URL when TRANSLATION_CACHE is on
+        """
         self.logger = logging.getLogger(__name__)
         
         try:
-            # No initialization needed for deep_translator
-            self.logger.info("Translation service initialized successfully")
+            self.backend = backend or get_backend()
+            if cache is None and settings.TRANSLATION_CACHE:
+                cache = TranslationCache()
+            self.cache = cache
+            self.logger.info(f"Translation service initialized with the {self.backend.name} backend")
         except Exception as e:
             self.logger.error(f"Failed to initialize translation service: {str(e)}")
             raise
         
+        self._dispatch = ThreadPoolExecutor(
+            max_workers=settings.TRANSLATION_CONCURRENCY, thread_name_prefix="translate"
+        )
+        self._lock = threading.Lock()
+        self.backend_calls = 0
+        self.sentences_sent = 0
+        
         # Supported Indian languages with ISO 639-1 codes
         self.supported_languages = {
             'en': 'English',
@@ -28,6 +55,7 @@ class TranslationService:
             'bn': 'Bengali',
             'or': 'Odia'
         }
+        self.detector = LanguageDetector(self.supported_languages, default='en', seed=settings.LANGDETECT_SEED)
 
     def detect_language(self, text: str) -> str:
         """
@@ -38,13 +66,8 @@ class TranslationService:
             str: Language code (e.g., 'hi' for Hindi)
         """
         try:
-            detected_lang = detect(text)
-            
-            if detected_lang in self.supported_languages:
-                return detected_lang
-            
-            self.logger.warning(f"Detected unsupported language: {detected_lang}")
-            return 'en'
+            # Script ranges settle most languages; only Hindi/Marathi need the statistical model
+            return self.detector.detect(text)
             
         except Exception as e:
             self.logger.error(f"Language detection failed: {str(e)}")
@@ -63,8 +86,7 @@ class TranslationService:
             return text
             
         try:
-            translator = GoogleTranslator(source=source_lang, target='en')
-            return translator.translate(text)
+            return self.translate(text, source_lang, 'en')
             
         except Exception as e:
             self.logger.error(f"Translation to English failed: {str(e)}")
@@ -83,13 +105,105 @@ class TranslationService:
             return text
             
         try:
-            translator = GoogleTranslator(source='en', target=target_lang)
-            return translator.translate(text)
+            return self.translate(text, 'en', target_lang)
             
         except Exception as e:
             self.logger.error(f"Translation from English failed: {str(e)}")
             return text
 
+    def translate(self, text: str, source: str, target: str) -> str:
+        """
+        Translate text sentence by sentence, keeping its line breaks
+        Args:
+            text (str): Text to translate
+            source (str): Source language code
+            target (str): Target language code
+        Returns:
+            str: Translated text
+        """
+        if source == target or not text.strip():
+            return text
+        lines = [split_sentences(line) for line in text.split("\n")]
+        translated = self.translate_sentences([s for line in lines for s in line], source, target)
+        return "\n".join(" ".join(translated[s] for s in line) for line in lines)
+    
+    def translate_sentences(self, sentences: List[str], source: str, target: str) -> Dict[str, str]:
+        """
+        Translate sentences through the cache and the backend
+        Args:
+            sentences (List[str]): Sentences, duplicates allowed
+            source (str): Source language code
+            target (str): Target language code
+        Returns:
+            Dict[str, str]: Translation of every distinct sentence
+        """
+        keys = {sentence: cache_key(sentence, source, target) for sentence in dict.fromkeys(sentences)}
+        cached = self.cache.get_many(keys.values()) if self.cache is not None else {}
+        result = {sentence: cached[key] for sentence, key in keys.items() if key in cached}
+        uncached = [sentence for sentence in keys if sentence not in result]
+        if not uncached:
+            return result
+        
+        batches = self._batches(uncached)
+        if len(batches) == 1:
+            outputs = [self._send(batches[0], source, target)]
+        else:
+            outputs = list(self._dispatch.map(lambda batch: self._send(batch, source, target), batches))
+        
+        fresh = {}
+        for batch, output in zip(batches, outputs):
+            if output is None:
+                # Untranslated sentences are passed through and not cached
+                result.update((sentence, sentence) for sentence in batch)
+                continue
+            for sentence, translation in zip(batch, output):
+                result[sentence] = translation
+                fresh[keys[sentence]] = translation
+        if fresh and self.cache is not None:
+            self.cache.put_many(fresh)
+        return result
+    
+    @staticmethod
+    def _batches(sentences: List[str]) -> List[List[str]]:
+        """Group sentences into requests of at most TRANSLATION_BATCH_CHARS characters"""
+        batches, current, size = [], [], 0
+        for sentence in sentences:
+            if current and size + len(sentence) + 1 > settings.TRANSLATION_BATCH_CHARS:
+                batches.append(current)
+                current, size = [], 0
+            current.append(sentence)
+            size += len(sentence) + 1
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _send(self, batch: List[str], source: str, target: str) -> Optional[List[str]]:
+        with self._lock:
+            self.backend_calls += 1
+            self.sentences_sent += len(batch)
+        try:
+            return self.backend.translate_batch(batch, source, target)
+        except Exception as e:
+            self.logger.error(f"Translation of {len(batch)} sentences ({source}->{target}) failed: {str(e)}")
+            return None
+    
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'backend': self.backend.name,
+                'backend_calls': self.backend_calls,
+                'sentences_sent': self.sentences_sent,
+            }
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        stats['detection'] = self.detector.stats()
+        return stats
+    
+    def close(self):
+        self._dispatch.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
+
     def is_supported_language(self, lang_code: str) -> bool:
         """Check if language is supported"""
         return lang_code in self.supported_languages
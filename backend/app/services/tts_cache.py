@@ -0,0 +1,78 @@
+# app/services/tts_cache.py
+"""
+Audio cache for repeated sentences (greetings, booking confirmations,
+disclaimers). Clips are kept in RAM, least recently used evicted first,
+within a byte budget. Only sentences up to `max_chars` are cached: long
+sentences are rarely repeated word for word and would push out the short
+ones that are.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.config import settings
+
+PhraseKey = Tuple[str, str, str]  # (text hash, language, backend)
+
+
+def phrase_key(text: str, lang: str, backend: str) -> PhraseKey:
+    # Whitespace differences do not change the speech
+    normalized = " ".join(text.split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest(), lang, backend
+
+
+class PhraseCache:
+    def __init__(self, max_bytes: int = None, max_chars: int = None):
+        """
+        Args:
+            max_bytes (int): Total size of cached audio
+            max_chars (int): Longest sentence worth caching
+        """
+        self.max_bytes = max_bytes or settings.TTS_CACHE_BYTES
+        self.max_chars = max_chars or settings.TTS_CACHE_MAX_CHARS
+        self._lock = threading.Lock()
+        self._clips: Dict[PhraseKey, bytes] = OrderedDict()  # least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cacheable(self, text: str) -> bool:
+        return len(text) <= self.max_chars
+
+    def get(self, key: PhraseKey) -> Optional[bytes]:
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key: PhraseKey, clip: bytes):
+        if len(clip) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._clips.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._clips[key] = clip
+            self.size += len(clip)
+            while self.size > self.max_bytes:
+                _, evicted = self._clips.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._clips),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
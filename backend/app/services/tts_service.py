@@ -0,0 +1,172 @@
+# app/services/tts_service.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional
+from app.config import settings
+from app.utils.sentences import SentenceSplitter, split_sentences
+from .tts_backends import TTSBackend, get_backend
+from .tts_cache import PhraseCache, phrase_key
+
+class TTSService:
+    """
+    Speaks text a sentence at a time: each sentence is looked up in the
+    phrase cache and the rest are synthesized concurrently, so the first
+    sentence can be played while later ones are still being synthesized.
+    """
+    def __init__(self, backend: TTSBackend = None, cache: Optional[PhraseCache] = None):
+        """
+        Args:
+            backend (TTSBackend): Defaults to TTS_BACKEND
+            cache (PhraseCache): Defaults to a new cache when TTS_CACHE is on
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend or get_backend()
+        if cache is None and settings.TTS_CACHE:
+            cache = PhraseCache()
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=settings.TTS_CONCURRENCY, thread_name_prefix="tts")
+        self._lock = threading.Lock()
+        self.sentences = 0
+        self.synthesized = 0
+        self.synthesis_seconds = 0.0
+        self.logger.info(f"TTS service initialized with the {self.backend.name} backend")
+
+    @property
+    def media_type(self) -> str:
+        return self.backend.media_type
+
+    def synthesize_sentence(self, sentence: str, lang: str) -> bytes:
+        """
+        Audio for one sentence, from the cache when it has been spoken before
+        Args:
+            sentence (str): Text to speak
+            lang (str): Language code
+        Returns:
+            bytes: Encoded audio in `media_type`
+        """
+        with self._lock:
+            self.sentences += 1
+        cacheable = self.cache is not None and self.cache.cacheable(sentence)
+        if cacheable:
+            key = phrase_key(sentence, lang, self.backend.name)
+            clip = self.cache.get(key)
+            if clip is not None:
+                return clip
+
+        start = time.perf_counter()
+        try:
+            clip = self.backend.synthesize(sentence, lang)
+        except Exception as e:
+            self.logger.error(f"Error in text to speech generation: {str(e)}")
+            raise
+        with self._lock:
+            self.synthesized += 1
+            self.synthesis_seconds += time.perf_counter() - start
+        if cacheable:
+            self.cache.put(key, clip)
+        return clip
+
+    async def synthesize(self, sentence: str, lang: str) -> bytes:
+        """Synthesize one sentence on the TTS thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.synthesize_sentence, sentence, lang)
+
+    async def text_to_speech(self, text: str, lang: str) -> bytes:
+        """
+        Speak a whole text as one audio file
+        Args:
+            text (str): Text to speak
+            lang (str): Language code
+        Returns:
+            bytes: Encoded audio in `media_type`
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return b""
+        distinct = list(dict.fromkeys(sentences))
+        clips = dict(zip(distinct, await asyncio.gather(*(self.synthesize(s, lang) for s in distinct))))
+        return self.backend.join([clips[s] for s in sentences])
+
+    async def stream(self, text: str, lang: str) -> AsyncIterator[bytes]:
+        """
+        Speak a whole text a clip at a time, each as soon as it and the ones
+        before it are ready. Concatenated, the clips form one file only when
+        the backend is `streamable`.
+        """
+        speaker = self.speaker(lang)
+        try:
+            speaker.feed(text)
+            async for clip in speaker.finish():
+                yield clip["audio"]
+        finally:
+            speaker.cancel()
+
+    def speaker(self, lang: str) -> "SentenceSpeaker":
+        """Speak text that is still being generated, see SentenceSpeaker"""
+        return SentenceSpeaker(self, lang)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'backend': self.backend.name,
+                'sentences': self.sentences,
+                'synthesized': self.synthesized,
+                'avg_synthesis_seconds': self.synthesis_seconds / self.synthesized if self.synthesized else 0.0,
+            }
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+class SentenceSpeaker:
+    """
+    Synthesizes streamed text as each sentence completes. Clips come out in
+    sentence order as dicts with `index`, `text`, `media_type` and `audio`.
+    """
+    def __init__(self, tts: TTSService, lang: str):
+        self.tts = tts
+        self.lang = lang
+        self.splitter = SentenceSplitter()
+        self.pending = deque()
+        self.index = 0
+
+    def _schedule(self, sentences: List[str]):
+        for sentence in sentences:
+            self.pending.append((sentence, asyncio.ensure_future(self.tts.synthesize(sentence, self.lang))))
+
+    def _clip(self, sentence: str, audio: bytes) -> dict:
+        clip = {"index": self.index, "text": sentence, "media_type": self.tts.media_type, "audio": audio}
+        self.index += 1
+        return clip
+
+    def feed(self, text: str):
+        """Add generated text; complete sentences start synthesizing right away"""
+        self._schedule(self.splitter.feed(text))
+
+    def ready(self) -> List[dict]:
+        """Clips finished so far, without waiting on the rest"""
+        clips = []
+        while self.pending and self.pending[0][1].done():
+            sentence, task = self.pending.popleft()
+            clips.append(self._clip(sentence, task.result()))
+        return clips
+
+    async def finish(self) -> AsyncIterator[dict]:
+        """Speak the trailing text and yield every remaining clip"""
+        self._schedule(self.splitter.flush())
+        while self.pending:
+            sentence, task = self.pending[0]
+            audio = await task
+            self.pending.popleft()
+            yield self._clip(sentence, audio)
+
+    def cancel(self):
+        for _, task in self.pending:
+            task.cancel()
+        self.pending.clear()
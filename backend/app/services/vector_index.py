@@ -0,0 +1,291 @@
+# app/services/vector_index.py
+from pathlib import Path
+import hashlib
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of `matrix` with every row scaled to unit length"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        norm = np.linalg.norm(matrix)
+        return matrix / norm if norm > 0 else matrix.copy()
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def vector_fingerprint(vectors: np.ndarray, block: int = 65536) -> str:
+    """Content hash of a float32 vector matrix, identifying the corpus an index was built for"""
+    digest = hashlib.sha1()
+    for start in range(0, vectors.shape[0], block):
+        digest.update(np.ascontiguousarray(vectors[start:start + block], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _top_k(scores: np.ndarray, top_k: int):
+    """Indices of the `top_k` highest scores, best first, without a full sort"""
+    top_k = min(top_k, scores.shape[0])
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < scores.shape[0]:
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def _top_k_rows(scores: np.ndarray, top_k: int):
+    """Row-wise `_top_k` for a (queries x rows) score matrix"""
+    top_k = min(top_k, scores.shape[1])
+    if top_k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if top_k < scores.shape[1]:
+        candidates = np.argpartition(scores, -top_k, axis=1)[:, -top_k:]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def search_subset(vectors: np.ndarray, queries: np.ndarray, rows: np.ndarray, top_k: int = 3):
+    """
+    Exact search over only the given rows, e.g. the rows left after metadata filtering
+    Args:
+        vectors (np.ndarray): Unit-length corpus vectors
+        queries (np.ndarray): Unit-length query vectors, one per row
+        rows (np.ndarray): Row ids to score
+        top_k (int): Number of results per query
+    Returns:
+        tuple: (scores, row ids) arrays of shape (queries, top_k), best first
+    """
+    scores = queries @ vectors[rows].T
+    best = _top_k_rows(scores, top_k)
+    return np.take_along_axis(scores, best, axis=1), rows[best]
+
+
+class FlatIndex:
+    """
+    Exact inner-product index over pre-normalized vectors.
+    Scores every row, so results are identical to a cosine similarity scan.
+    """
+    kind = 'flat'
+
+    def __init__(self, vectors: np.ndarray, normalized: bool = False):
+        self.vectors = vectors if normalized else normalize_rows(vectors)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, **kwargs) -> "FlatIndex":
+        return cls(embeddings)
+
+    def search(self, query: np.ndarray, top_k: int = 3):
+        """
+        Args:
+            query (np.ndarray): Unit-length query vector
+            top_k (int): Number of results to return
+        Returns:
+            tuple: (scores, row ids), best first
+        """
+        scores = self.vectors @ query
+        ids = _top_k(scores, top_k)
+        return scores[ids], ids
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 3):
+        """
+        Score many queries with one matrix-matrix product
+        Args:
+            queries (np.ndarray): Unit-length query vectors, one per row
+            top_k (int): Number of results per query
+        Returns:
+            tuple: (scores, row ids) arrays of shape (queries, top_k), best first
+        """
+        scores = queries @ self.vectors.T
+        ids = _top_k_rows(scores, top_k)
+        return np.take_along_axis(scores, ids, axis=1), ids
+
+    def save(self, path, fingerprint: str = ''):
+        np.savez(path, kind=self.kind, fingerprint=fingerprint, vectors=self.vectors)
+
+    @classmethod
+    def from_arrays(cls, arrays, **kwargs) -> "FlatIndex":
+        return cls(arrays['vectors'], normalized=True)
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index.
+    Rows are clustered with spherical k-means; a query only scores the rows
+    stored in the `nprobe` lists whose centroids are closest to it.
+    """
+    kind = 'ivf'
+
+    def __init__(self, centroids, list_offsets, list_ids, list_vectors, nprobe: int = 8):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        # Vectors are stored grouped by list so each probe scores a contiguous block
+        self.list_vectors = list_vectors
+        self.nprobe = nprobe
+
+    def __len__(self):
+        return self.list_ids.shape[0]
+
+    @property
+    def nlist(self):
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, nlist: int = 0, nprobe: int = 8,
+              n_iter: int = 20, seed: int = 0, **kwargs) -> "IVFIndex":
+        """
+        Train centroids and bucket every row into its nearest list.
+        Args:
+            embeddings (np.ndarray): Corpus matrix, one row per chunk
+            nlist (int): Number of lists; 0 picks roughly sqrt(n)
+            nprobe (int): Lists scanned per query
+            n_iter (int): k-means iterations
+            seed (int): Seed for centroid initialisation
+        """
+        vectors = normalize_rows(embeddings)
+        n = vectors.shape[0]
+        if n == 0:
+            # Nothing to cluster; the empty index answers every query with no results
+            return cls(vectors.copy(), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64), vectors,
+                       nprobe=nprobe)
+        if nlist <= 0:
+            nlist = max(1, int(np.sqrt(n)))
+        nlist = min(nlist, n)
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, size=nlist, replace=False)].copy()
+        assignments = np.zeros(n, dtype=np.int64)
+        for _ in range(n_iter):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for list_no in range(nlist):
+                members = vectors[assignments == list_no]
+                if len(members):
+                    centroids[list_no] = members.sum(axis=0)
+                else:
+                    # Re-seed empty lists so no centroid is wasted
+                    centroids[list_no] = vectors[rng.integers(n)]
+            centroids = normalize_rows(centroids)
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+        list_ids = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, list_offsets, list_ids,
+                   np.ascontiguousarray(vectors[list_ids]), nprobe=nprobe)
+
+    def search(self, query: np.ndarray, top_k: int = 3):
+        """
+        Args:
+            query (np.ndarray): Unit-length query vector
+            top_k (int): Number of results to return
+        Returns:
+            tuple: (scores, row ids), best first
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        nprobe = min(self.nprobe, self.nlist)
+        probes = _top_k(self.centroids @ query, nprobe)
+        blocks = [slice(self.list_offsets[p], self.list_offsets[p + 1]) for p in probes]
+        ids = np.concatenate([self.list_ids[b] for b in blocks])
+        scores = np.concatenate([self.list_vectors[b] @ query for b in blocks])
+        best = _top_k(scores, top_k)
+        return scores[best], ids[best]
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 3):
+        """
+        Batched `search`; probes differ per query, so lists are scanned per row
+        Returns:
+            tuple: lists of per-query (scores, row ids), best first
+        """
+        all_scores, all_ids = [], []
+        for query in queries:
+            scores, ids = self.search(query, top_k)
+            all_scores.append(scores)
+            all_ids.append(ids)
+        return all_scores, all_ids
+
+    def save(self, path, fingerprint: str = ''):
+        np.savez(
+            path,
+            kind=self.kind,
+            fingerprint=fingerprint,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_ids=self.list_ids,
+            list_vectors=self.list_vectors,
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, nprobe: int = 8, **kwargs) -> "IVFIndex":
+        return cls(arrays['centroids'], arrays['list_offsets'], arrays['list_ids'],
+                   arrays['list_vectors'], nprobe=nprobe)
+
+
+INDEX_TYPES = {
+    FlatIndex.kind: FlatIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+
+def index_path(embeddings_dir, kind: str) -> Path:
+    """Location of a persisted index, next to embeddings.npy"""
+    return Path(embeddings_dir) / f'index_{kind}.npz'
+
+
+def save_index(index, path, fingerprint: str = ''):
+    """Write an index through a temporary file, so readers never load a partial one"""
+    path = Path(path)
+    tmp_path = path.with_name(f'{path.stem}.tmp-{os.getpid()}.npz')
+    index.save(tmp_path, fingerprint=fingerprint)
+    os.replace(tmp_path, path)
+
+
+def build_index(embeddings: np.ndarray, kind: str = 'flat', **params):
+    """Build an index of the given kind ('flat' or 'ivf') over raw embeddings"""
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {kind}")
+    return INDEX_TYPES[kind].build(embeddings, **params)
+
+
+def load_index(embeddings_dir, kind: str, embeddings: np.ndarray = None, fingerprint: str = None, **params):
+    """
+    Load a persisted index, rebuilding it from `embeddings` when the file is
+    missing or was built for other vectors: a different number of rows or,
+    when `fingerprint` is given, a different `vector_fingerprint`.
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {kind}")
+    path = index_path(embeddings_dir, kind)
+    if path.exists():
+        with np.load(path) as arrays:
+            index = INDEX_TYPES[kind].from_arrays(arrays, **params)
+            saved = str(arrays['fingerprint']) if 'fingerprint' in arrays.files else None
+        fresh = embeddings is None or len(index) == embeddings.shape[0]
+        if fingerprint is not None:
+            # Same row count is not enough: a re-ingest can replace every vector
+            fresh = fresh and saved == fingerprint
+        if fresh:
+            return index
+        logger.warning(f"Index at {path} is stale ({len(index)} rows, fingerprint {saved}), rebuilding")
+    elif embeddings is None:
+        raise FileNotFoundError(f"No {kind} index found at {path}")
+    else:
+        logger.info(f"No {kind} index found at {path}, building it")
+    index = build_index(embeddings, kind, **params)
+    try:
+        # So the next start loads it instead of clustering again
+        save_index(index, path, fingerprint=fingerprint or '')
+    except OSError as e:
+        logger.warning(f"Could not save the rebuilt index to {path}: {e}")
+    return index
@@ -0,0 +1,312 @@
+# app/utils/audio.py
+"""
+In-memory audio decoding for speech recognition.
+
+Audio is turned into 16-bit mono PCM chunks without touching the disk:
+16-bit PCM WAV is read straight from the upload buffer (stereo is mixed down
+with numpy), and anything else (MP3, other WAV encodings) is piped through
+ffmpeg, stdin to stdout, so the recognizer can consume PCM while ffmpeg is
+still decoding. FfmpegStreamDecoder does the same for audio that is still
+being recorded.
+"""
+import io
+import struct
+import subprocess
+import threading
+import wave
+from typing import Iterator, NamedTuple, Optional, Tuple
+import numpy as np
+
+TARGET_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes per 16-bit sample
+CHUNK_FRAMES = 4000
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+def sniff_format(data: bytes) -> str:
+    """
+    Container format from the first bytes
+    Returns:
+        str: 'wav', 'mp3' or 'unknown'
+    """
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return 'wav'
+    # ID3 tag, or an MPEG audio frame sync (11 set bits)
+    if data[:3] == b'ID3' or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return 'unknown'
+
+
+# Containers browsers record to (MediaRecorder) that ffmpeg decodes: (signature, offset, name)
+_CONTAINER_SIGNATURES = (
+    (b'OggS', 0, 'ogg'),
+    (b'\x1a\x45\xdf\xa3', 0, 'webm'),  # EBML header of WebM/Matroska
+    (b'ftyp', 4, 'mp4'),
+    (b'fLaC', 0, 'flac'),
+)
+
+
+def container_format(data: bytes) -> str:
+    """
+    Like sniff_format, but also names the other containers uploads may come in
+    Returns:
+        str: 'wav', 'mp3', 'ogg', 'webm', 'mp4', 'flac' or 'unknown'
+    """
+    kind = sniff_format(data)
+    if kind != 'unknown':
+        return kind
+    for signature, offset, name in _CONTAINER_SIGNATURES:
+        if data[offset:offset + len(signature)] == signature:
+            return name
+    return 'unknown'
+
+
+class WavHeader(NamedTuple):
+    sample_rate: int
+    channels: int
+    sample_width: int
+    format_tag: int  # 1 for integer PCM
+    data_offset: int  # where the samples start
+    data_size: Optional[int]  # None when the writer did not know the length
+
+
+def parse_wav_header(data: bytes) -> Optional[WavHeader]:
+    """
+    Read a WAV header from the first bytes of a file
+    Returns:
+        WavHeader: Or None if `data` ends before the start of the samples
+    Raises:
+        AudioDecodeError: Not a RIFF/WAVE file, or samples before the format chunk
+    """
+    if len(data) >= 12 and (data[:4] != b'RIFF' or data[8:12] != b'WAVE'):
+        raise AudioDecodeError("Not a WAV file")
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], 'little')
+        if chunk_id == b'fmt ':
+            if pos + 24 > len(data):
+                return None
+            fmt = struct.unpack('<HHIIHH', data[pos + 8:pos + 24])
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise AudioDecodeError("WAV samples before the format chunk")
+            format_tag, channels, rate, _, _, bits = fmt
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF
+            data_size = size if 0 < size < 0xFFFFFFFF else None
+            return WavHeader(rate, channels, bits // 8, format_tag, pos + 8, data_size)
+        pos += 8 + size + (size & 1)  # chunks are padded to an even length
+    return None
+
+
+def wav_info(data: bytes) -> Tuple[int, int, int, int]:
+    """(sample rate, channels, sample width, frames) of a WAV buffer"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            return wf.getframerate(), wf.getnchannels(), wf.getsampwidth(), wf.getnframes()
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"Invalid WAV data: {e}") from e
+
+
+def wav_pcm_chunks(data: bytes, chunk_frames: int = CHUNK_FRAMES) -> Iterator[bytes]:
+    """
+    16-bit mono PCM chunks of a 16-bit PCM WAV buffer, read in place
+    Yields:
+        bytes: Up to `chunk_frames` frames each
+    """
+    try:
+        wf = wave.open(io.BytesIO(data), 'rb')
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"Invalid WAV data: {e}") from e
+    with wf:
+        if wf.getsampwidth() != SAMPLE_WIDTH:
+            raise AudioDecodeError(f"Expected 16-bit samples, got {8 * wf.getsampwidth()}-bit")
+        channels = wf.getnchannels()
+        while True:
+            frames = wf.readframes(chunk_frames)
+            if not frames:
+                break
+            if channels > 1:
+                samples = np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+                frames = samples.mean(axis=1).astype('<i2').tobytes()
+            yield frames
+
+
+def ffmpeg_pcm_chunks(data: bytes, sample_rate: int = TARGET_RATE,
+                      chunk_frames: int = CHUNK_FRAMES) -> Iterator[bytes]:
+    """
+    Decode any format ffmpeg understands to 16-bit mono PCM through pipes
+    Args:
+        data (bytes): Encoded audio
+        sample_rate (int): Output sample rate
+    Yields:
+        bytes: PCM chunks as ffmpeg produces them
+    """
+    command = [
+        "ffmpeg", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-ar", str(sample_rate),
+        "-ac", "1",
+        "-f", "s16le",
+        "pipe:1",
+    ]
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg is not installed") from e
+
+    def feed():
+        # Writing from another thread keeps a full stdout pipe from deadlocking the write
+        try:
+            process.stdin.write(data)
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+
+    writer = threading.Thread(target=feed, name='ffmpeg-feed', daemon=True)
+    writer.start()
+    chunk_bytes = chunk_frames * SAMPLE_WIDTH
+    try:
+        while True:
+            chunk = process.stdout.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+        writer.join()
+        if process.wait() != 0:
+            raise AudioDecodeError(f"ffmpeg failed: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def pcm_stream(data: bytes, chunk_frames: int = CHUNK_FRAMES) -> Tuple[int, Iterator[bytes]]:
+    """
+    Pick the cheapest decoder for an upload
+    Returns:
+        Tuple[int, Iterator[bytes]]: Sample rate and 16-bit mono PCM chunks
+    """
+    if sniff_format(data) == 'wav':
+        try:
+            rate, _, width, _ = wav_info(data)
+        except AudioDecodeError:
+            # e.g. float or A-law WAV, which the wave module does not read
+            width = None
+        if width == SAMPLE_WIDTH:
+            return rate, wav_pcm_chunks(data, chunk_frames)
+    return TARGET_RATE, ffmpeg_pcm_chunks(data, TARGET_RATE, chunk_frames)
+
+
+class FfmpegStreamDecoder:
+    """
+    Incremental ffmpeg decoder for audio that arrives in pieces (e.g. WebM/Ogg
+    Opus from a browser's MediaRecorder). A reader thread drains ffmpeg's
+    stdout into a buffer so writes never block on a full pipe.
+    """
+
+    def __init__(self, sample_rate: int = TARGET_RATE):
+        command = [
+            "ffmpeg", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-ar", str(sample_rate),
+            "-ac", "1",
+            "-f", "s16le",
+            "pipe:1",
+        ]
+        try:
+            self.process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
+            )
+        except FileNotFoundError as e:
+            raise AudioDecodeError("ffmpeg is not installed") from e
+        self._pcm = bytearray()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name='ffmpeg-read', daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            chunk = self.process.stdout.read(CHUNK_FRAMES * SAMPLE_WIDTH)
+            if not chunk:
+                break
+            with self._lock:
+                self._pcm += chunk
+
+    def _take(self) -> bytes:
+        with self._lock:
+            # Whole samples only; an odd trailing byte waits for the next read
+            n = len(self._pcm) - len(self._pcm) % SAMPLE_WIDTH
+            pcm = bytes(self._pcm[:n])
+            del self._pcm[:n]
+        return pcm
+
+    def feed(self, data: bytes) -> bytes:
+        """Write encoded audio; returns the PCM decoded so far"""
+        try:
+            self.process.stdin.write(data)
+        except BrokenPipeError as e:
+            raise AudioDecodeError(f"ffmpeg stopped: {self.process.stderr.read().decode(errors='replace').strip()}") from e
+        return self._take()
+
+    def close(self) -> bytes:
+        """End the input and return the remaining PCM"""
+        if not self.process.stdin.closed:
+            self.process.stdin.close()
+        self._reader.join(timeout=10)
+        if self.process.wait(timeout=10) != 0:
+            raise AudioDecodeError(f"ffmpeg failed: {self.process.stderr.read().decode(errors='replace').strip()}")
+        return self._take()
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+class WavStreamDecoder:
+    """
+    16-bit PCM WAV that arrives in pieces: skips the header, mixes stereo down
+    to mono and holds back partial frames until the rest arrives. Same
+    interface as FfmpegStreamDecoder, without a subprocess.
+    """
+
+    def __init__(self, header: WavHeader):
+        if header.format_tag != 1 or header.sample_width != SAMPLE_WIDTH:
+            raise AudioDecodeError("WavStreamDecoder reads 16-bit integer PCM only")
+        self.header = header
+        self.frame_bytes = SAMPLE_WIDTH * header.channels
+        self._received = 0
+        self._pending = b''
+
+    def feed(self, data: bytes) -> bytes:
+        """Add the next bytes of the file; returns the whole frames among them"""
+        start = max(self.header.data_offset - self._received, 0)
+        self._received += len(data)
+        data = data[start:]
+        if self.header.data_size is not None:
+            # Anything after the samples (e.g. a trailing LIST chunk) is not audio
+            remaining = self.header.data_offset + self.header.data_size - (self._received - len(data))
+            data = data[:max(remaining, 0)]
+        data = self._pending + data
+        whole = len(data) - len(data) % self.frame_bytes
+        frames, self._pending = data[:whole], data[whole:]
+        if self.header.channels > 1 and frames:
+            samples = np.frombuffer(frames, dtype='<i2').reshape(-1, self.header.channels)
+            frames = samples.mean(axis=1).astype('<i2').tobytes()
+        return frames
+
+    def close(self) -> bytes:
+        # A trailing partial frame is dropped
+        self._pending = b''
+        return b''
+
+    def kill(self):
+        pass
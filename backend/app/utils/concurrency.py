@@ -0,0 +1,46 @@
+# app/utils/concurrency.py
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared, size-bounded pool for blocking pipeline steps (translation, retrieval)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PIPELINE_THREADS, thread_name_prefix="pipeline"
+                )
+                logger.info(f"Started pipeline thread pool with {settings.PIPELINE_THREADS} threads")
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking call on the pipeline pool so the event loop keeps serving other requests
+    Args:
+        func: Synchronous callable
+        *args, **kwargs: Passed to func
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -22,6 +22,9 @@ def handle_error(func):
     async def wrapper(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
+        except HTTPException:
+            # Deliberate 4xx/503 responses keep their status code
+            raise
         except Exception as e:
             logging.error(f"Error in {func.__name__}: {str(e)}")
             raise HTTPException(
@@ -34,9 +37,10 @@ def timer_decorator(func):
     """Decorator to measure execution time"""
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        start_time = time.time()
+        # perf_counter is monotonic, so clock adjustments cannot skew the result
+        start_time = time.perf_counter()
         result = await func(*args, **kwargs)
-        end_time = time.time()
+        end_time = time.perf_counter()
         logging.info(f"{func.__name__} took {end_time - start_time:.2f} seconds")
         return result
     return wrapper
@@ -0,0 +1,117 @@
+# app/utils/responses.py
+"""
+Content negotiation and multipart bodies for endpoints that can answer in
+more than one representation (e.g. /api/upload: JSON with base64 audio, raw
+audio, or multipart/mixed with a JSON part and an audio part).
+"""
+import json
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """(media range, q) pairs of an Accept header"""
+    ranges = []
+    for item in accept.split(","):
+        params = [p.strip() for p in item.split(";")]
+        media_range = params[0].lower()
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range, q))
+    return ranges
+
+
+def _quality(offer: str, ranges: List[Tuple[str, float]]) -> float:
+    """q of the most specific range matching `offer`, 0 when none does"""
+    kind = offer.split("/")[0]
+    best, specificity = 0.0, -1
+    for media_range, q in ranges:
+        if media_range == offer:
+            rank = 2
+        elif media_range == f"{kind}/*":
+            rank = 1
+        elif media_range == "*/*":
+            rank = 0
+        else:
+            continue
+        if rank > specificity:
+            best, specificity = q, rank
+    return best
+
+
+def negotiate(accept: Optional[str], offers: List[str]) -> str:
+    """
+    Pick the representation the client prefers
+    Args:
+        accept (str): Accept header, may be None
+        offers (List[str]): Media types the endpoint can produce, preferred first
+    Returns:
+        str: The offer with the highest q; ties, a missing header or no match give the earliest offer
+    """
+    if not accept:
+        return offers[0]
+    ranges = _parse_accept(accept)
+    scored = [(_quality(offer, ranges), -i, offer) for i, offer in enumerate(offers)]
+    q, _, offer = max(scored)
+    return offer if q > 0 else offers[0]
+
+
+# Fields short enough for a header. Question and answer text stay in the body:
+# percent-encoded Devanagari is about 9x its length, and a long answer would
+# pass proxy and server header limits (often 4-8 KB)
+HEADER_FIELDS = ("detected_language",)
+
+
+def metadata_headers(metadata: dict, prefix: str = "X-") -> dict:
+    """
+    Metadata as response headers, for bodies that are not JSON. Values are
+    percent-encoded UTF-8, since headers cannot carry Devanagari or Tamil text.
+    """
+    return {
+        prefix + "-".join(part.capitalize() for part in name.split("_")): quote(str(value), safe=" ")
+        for name, value in metadata.items()
+    }
+
+
+def audio_headers(metadata: dict) -> dict:
+    """Headers of a raw audio answer: only the fields in HEADER_FIELDS"""
+    return metadata_headers({name: metadata[name] for name in HEADER_FIELDS if name in metadata})
+
+
+def new_boundary() -> str:
+    return uuid.uuid4().hex
+
+
+async def multipart_stream(metadata: dict, media_type: str, chunks: AsyncIterator[bytes],
+                           boundary: str, filename: str = "answer") -> AsyncIterator[bytes]:
+    """
+    A multipart/mixed body: a JSON part with `metadata`, then one part with the
+    audio, written as its chunks arrive
+    Args:
+        metadata (dict): JSON-serializable fields
+        media_type (str): Content type of the audio part
+        chunks (AsyncIterator[bytes]): The audio, in order
+        boundary (str): Boundary also given in the response's Content-Type
+    Yields:
+        bytes: Pieces of the body
+    """
+    delimiter = f"--{boundary}\r\n".encode()
+    yield delimiter
+    yield b"Content-Type: application/json; charset=utf-8\r\n\r\n"
+    yield json.dumps(metadata, ensure_ascii=False).encode("utf-8") + b"\r\n"
+    yield delimiter
+    extension = media_type.split("/")[-1].replace("mpeg", "mp3")
+    yield (f"Content-Type: {media_type}\r\n"
+           f"Content-Disposition: attachment; filename=\"{filename}.{extension}\"\r\n\r\n").encode()
+    async for chunk in chunks:
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
@@ -0,0 +1,50 @@
+# app/utils/sentences.py
+import re
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a blank line / newline before a list item
+_BOUNDARY = re.compile(r'([.!?।]["\')\]]*)\s+|\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)')
+_ABBREVIATIONS = frozenset(
+    'rs inr mr mrs ms dr no nos st vs etc approx e.g i.e viz incl max min yr yrs p.a'.split()
+)
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter for streamed text: feed fragments as they
+    arrive and get back every sentence that is known to be complete.
+    Decimals ("1.5"), common abbreviations ("Rs. 500") and a terminator at the
+    very end of the buffer (which may continue) do not end a sentence.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+
+    def feed(self, text: str) -> list:
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self.buffer):
+            if match.group(1) and self._is_abbreviation(match.start()):
+                continue
+            sentence = self.buffer[start:match.end(1) if match.group(1) else match.start()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        """The remaining text once the stream has ended"""
+        rest, self.buffer = self.buffer.strip(), ''
+        return [rest] if rest else []
+
+    def _is_abbreviation(self, period: int) -> bool:
+        words = self.buffer[:period].rsplit(None, 1)
+        return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+
+def split_sentences(text: str) -> list:
+    """Split a complete text into sentences"""
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
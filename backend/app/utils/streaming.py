@@ -0,0 +1,43 @@
+# app/utils/streaming.py
+import asyncio
+import json
+from collections import deque
+from .sentences import SentenceSplitter
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def translate_sentences(tokens, translate):
+    """
+    Re-chunk a token stream into translated sentences.
+    Each sentence is handed to `translate` as soon as it is complete, so
+    translation overlaps with generation; results are yielded in order, each
+    after the first prefixed with a space.
+    Args:
+        tokens: Async iterable of text fragments
+        translate: Coroutine function taking and returning a sentence
+    Yields:
+        str: Translated sentences
+    """
+    splitter = SentenceSplitter()
+    pending = deque()
+    first = True
+    try:
+        async for token in tokens:
+            pending.extend(asyncio.ensure_future(translate(s)) for s in splitter.feed(token))
+            # Emit finished translations without waiting on the rest
+            while pending and pending[0].done():
+                text = pending.popleft().result()
+                yield text if first else " " + text
+                first = False
+        pending.extend(asyncio.ensure_future(translate(s)) for s in splitter.flush())
+        while pending:
+            text = await pending.popleft()
+            yield text if first else " " + text
+            first = False
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,219 @@
+# app/utils/tracing.py
+"""
+Per-stage latency tracing.
+
+`stage(name)` times a block with the monotonic clock and adds the duration
+to that stage's histogram and to the current request's trace.
+TracingMiddleware opens a trace per HTTP request. It reports the trace in a
+`Server-Timing` header and records the request's total time per route.
+`render()` writes every histogram in Prometheus text format for
+/api/metrics.
+
+With TRACING off, `stage` returns a shared no-op context manager and the
+middleware passes requests straight through.
+"""
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from app.config import settings
+
+# Seconds; spans a cached lookup (ms) to a long LLM answer (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NOOP = nullcontext()
+_trace: ContextVar[Optional[Dict[str, float]]] = ContextVar('trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative counts per bucket (+Inf last), sum and count"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (0 when empty)"""
+        cumulative, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        index = bisect.bisect_left(cumulative, q * count)
+        return self.buckets[index] if index < len(self.buckets) else float('inf')
+
+
+class _Stage:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.tracer.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            enabled (bool): When False, timing calls do nothing
+            buckets (Tuple[float, ...]): Histogram bucket upper bounds in seconds
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self.stages: Dict[str, Histogram] = {}
+        self.requests: Dict[Tuple[str, str, int], Histogram] = {}  # (method, route, status)
+        self._gauges: List[Callable[[], Dict[str, Tuple[str, float]]]] = []
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name: str, seconds: float):
+        """Record a stage duration measured elsewhere"""
+        if not self.enabled:
+            return
+        self._histogram(self.stages, name).observe(seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+
+    def stage(self, name: str):
+        """
+        Time a block as pipeline stage `name`
+        Example:
+            with tracer.stage("retrieve"):
+                retrieval = await run_blocking(rag_service.retrieve, prompt)
+        """
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, name)
+
+    def register_gauges(self, collect: Callable[[], Dict[str, Tuple[str, float]]]):
+        """
+        Add values read at scrape time
+        Args:
+            collect: Returns {metric name: (help text, value)}
+        """
+        self._gauges.append(collect)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        self._render_histograms(
+            lines, "rag_stage_duration_seconds", "Time spent in each pipeline stage",
+            [({"stage": name}, h) for name, h in sorted(self.stages.items())]
+        )
+        self._render_histograms(
+            lines, "rag_request_duration_seconds", "Time from request to the end of the response",
+            [({"method": m, "route": r, "status": str(s)}, h) for (m, r, s), h in sorted(self.requests.items())]
+        )
+        for collect in self._gauges:
+            for name, (help_text, value) in collect().items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: list, name: str, help_text: str, series: list):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, histogram in series:
+            cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(histogram.buckets + (float('inf'),), cumulative):
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {value}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a trace for each HTTP request, adds a
+    Server-Timing header with the stages finished before the response
+    starts, and records the total once the last body chunk is sent (so a
+    streamed answer counts in full)
+    """
+
+    def __init__(self, app, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace: Dict[str, float] = {}
+        token = _trace.set(trace)
+        start = time.perf_counter()
+        status = 500
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace:
+                    timing = ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in trace.items())
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            _trace.reset(token)
+            # The matched route template keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            key = (scope.get("method", ""), route, status)
+            self.tracer._histogram(self.tracer.requests, key).observe(time.perf_counter() - start)
+
+
+tracer = Tracer(enabled=settings.TRACING)
+
+
+def stage(name: str):
+    """`tracer.stage(name)` on the application's tracer"""
+    return tracer.stage(name)
@@ -0,0 +1,165 @@
+# app/utils/uploads.py
+"""
+Incremental reading of audio uploads.
+
+Starlette's UploadFile only reaches a handler after the whole multipart body
+has been received and spooled. AudioUpload instead reads the request stream
+itself, so an upload can be rejected by its Content-Length or first bytes
+before the rest is read, and its audio can be decoded while it is still
+arriving. The body may be multipart/form-data (audio in the `file` field,
+other fields collected as text) or the raw audio, with fields in the query
+string.
+"""
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+FIELD_MAX_BYTES = 1024  # text form fields (user_id, session_id) longer than this are cut
+
+
+class UploadError(Exception):
+    """The upload is rejected; `status_code` is the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MultipartStream:
+    """
+    Incremental multipart/form-data parser: feed body chunks and get back
+    the part data they contain as (field name, filename, data) pieces
+    """
+
+    def __init__(self, boundary: bytes):
+        self._pieces: List[Tuple[str, Optional[str], bytes]] = []
+        self._header_field = b''
+        self._header_value = b''
+        self._name = ''
+        self._filename = None
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_part_data': self._on_part_data,
+        })
+
+    def _on_part_begin(self):
+        self._name, self._filename = '', None
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_field.lower() == b'content-disposition':
+            _, options = parse_options_header(self._header_value)
+            self._name = options.get(b'name', b'').decode('utf-8', errors='replace')
+            filename = options.get(b'filename')
+            self._filename = filename.decode('utf-8', errors='replace') if filename is not None else None
+        self._header_field, self._header_value = b'', b''
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        self._pieces.append((self._name, self._filename, data[start:end]))
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Optional[str], bytes]]:
+        self._parser.write(chunk)
+        pieces, self._pieces = self._pieces, []
+        return pieces
+
+    def close(self):
+        self._parser.finalize()
+
+
+class AudioUpload:
+    def __init__(self, request: Request, max_bytes: int, field: str = "file", chunk_bytes: int = 32 * 1024):
+        """
+        Args:
+            request (Request): Request whose body has not been read
+            max_bytes (int): Largest audio file accepted
+            field (str): Form field holding the audio
+            chunk_bytes (int): Audio is handed on in pieces of at least this size (except the last)
+        """
+        self.request = request
+        self.max_bytes = max_bytes
+        self.field = field
+        self.chunk_bytes = chunk_bytes
+        self.size = 0
+        self.filename = None
+        self._body = self._audio()
+        self._head = b''
+        self._fields: Dict[str, bytes] = {}
+
+        content_type, options = parse_options_header(request.headers.get('content-type', ''))
+        self._boundary = options.get(b'boundary') if content_type == b'multipart/form-data' else None
+
+    @property
+    def fields(self) -> Dict[str, str]:
+        """Text fields; complete once the body has been read, since they may follow the file"""
+        if self._boundary is None:
+            return dict(self.request.query_params)
+        return {name: value.decode('utf-8', errors='replace') for name, value in self._fields.items()}
+
+    def check_length(self):
+        """
+        Reject on the declared body size alone, before anything is read
+        Raises:
+            UploadError: 413 when Content-Length is over the limit
+        """
+        length = self.request.headers.get('content-length')
+        # Multipart framing and the other fields take a few hundred bytes
+        allowance = 16 * 1024 if self._boundary else 0
+        if length and length.isdigit() and int(length) > self.max_bytes + allowance:
+            raise UploadError(413, f"File size too large. Maximum size is {self.max_bytes // (1024 * 1024)}MB.")
+
+    async def _audio(self) -> AsyncIterator[bytes]:
+        parser = MultipartStream(self._boundary) if self._boundary else None
+        async for chunk in self.request.stream():
+            if parser is None:
+                pieces = [(self.field, None, chunk)]
+            else:
+                pieces = parser.feed(chunk)
+            for name, filename, data in pieces:
+                if name != self.field:
+                    self._fields[name] = (self._fields.get(name, b'') + data)[:FIELD_MAX_BYTES]
+                    continue
+                self.filename = filename
+                self.size += len(data)
+                if self.size > self.max_bytes:
+                    raise UploadError(
+                        413, f"File size too large. Maximum size is {self.max_bytes // (1024 * 1024)}MB."
+                    )
+                if data:
+                    yield data
+        if parser is not None:
+            parser.close()
+
+    async def head(self, size: int) -> bytes:
+        """
+        At least the first `size` bytes of the audio (fewer only if the file is
+        shorter), read without consuming them from `chunks`
+        """
+        async for data in self._body:
+            self._head += data
+            if len(self._head) >= size:
+                break
+        return self._head
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        The audio as it arrives, in pieces of at least `chunk_bytes`
+        Raises:
+            UploadError: 413 once the file grows past `max_bytes`
+        """
+        buffer, self._head = self._head, b''
+        async for data in self._body:
+            buffer += data
+            if len(buffer) >= self.chunk_bytes:
+                yield buffer
+                buffer = b''
+        if buffer:
+            yield buffer
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Standalone performance scripts, run from the backend directory with
+# `python -m benchmarks.<name>`.
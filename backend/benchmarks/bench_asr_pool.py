@@ -0,0 +1,137 @@
+# benchmarks/bench_asr_pool.py
+"""
+Concurrent uploads through speech recognition: the previous path (a new
+KaldiRecognizer per request on the loop's default to_thread pool, no limit)
+against RecognizerPool in thread and process mode. Audio is synthetic WAV.
+
+Without the Vosk model, `--fake` swaps in a recognizer that hashes each chunk
+(CPU work that releases the GIL, like Kaldi) and pays a fixed construction
+cost, so the pool's reuse and admission behaviour can still be measured.
+
+    python -m benchmarks.bench_asr_pool --fake --requests 64 --concurrency 32
+    python -m benchmarks.bench_asr_pool --workers 4 --max-queue 8   # real Vosk model
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import numpy as np
+from app.config import settings
+from app.services.recognizer_pool import PoolSaturated, RecognizerCache, RecognizerPool, VoskRecognizerFactory, transcribe_audio
+from benchmarks.bench_speech_decoding import synthetic_wav
+from benchmarks.load_test import heartbeat
+
+
+class HashingRecognizer:
+    """Stand-in for KaldiRecognizer: construction cost plus per-chunk hashing"""
+
+    def __init__(self, build_seconds: float, rounds: int):
+        time.sleep(build_seconds)
+        self.rounds = rounds
+        self.chunks = 0
+
+    def AcceptWaveform(self, data):
+        hashlib.pbkdf2_hmac('sha256', data[:64], b'asr', self.rounds)
+        self.chunks += 1
+        return False
+
+    def FinalResult(self):
+        return json.dumps({'text': f'{self.chunks} chunks'})
+
+    def Reset(self):
+        self.chunks = 0
+
+
+class HashingFactory:
+    def __init__(self, build_seconds: float = 0.05, rounds: int = 2000):
+        self.build_seconds = build_seconds
+        self.rounds = rounds
+
+    def __call__(self, sample_rate):
+        return HashingRecognizer(self.build_seconds, self.rounds)
+
+
+def make_before(factory):
+    """SpeechService before the pool: fresh recognizer per call on the default executor"""
+    async def call(audio):
+        cache = RecognizerCache(factory, limit=0)
+        return await asyncio.to_thread(transcribe_audio, audio, cache)
+    return call
+
+
+async def drive(call, audio: bytes, total: int, concurrency: int) -> dict:
+    latencies, rejected = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    stalls, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(0.01, stalls, stop))
+
+    async def one():
+        nonlocal rejected
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(audio)
+            except PoolSaturated:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    ms = np.array(latencies or [0.0]) * 1000
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': np.percentile(ms, 50),
+        'p95': np.percentile(ms, 95),
+        'rejected': rejected,
+        'stall': max(stalls, default=0.0) * 1000,
+    }
+
+
+async def run(args):
+    if args.fake:
+        factory = HashingFactory()
+    else:
+        from vosk import Model
+        factory = VoskRecognizerFactory(settings.VOSK_MODEL_PATH, Model(settings.VOSK_MODEL_PATH))
+    audio = synthetic_wav(args.seconds)
+
+    print(f"{args.requests} requests of {args.seconds:.0f}s audio, {args.concurrency} concurrent, "
+          f"{args.workers} workers, queue {args.max_queue}\n")
+    print(f"{'path':<10}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}{'rejected':>10}{'max queue':>11}"
+          f"{'recognizers':>13}{'stall ms':>10}")
+
+    result = await drive(make_before(factory), audio, args.requests, args.concurrency)
+    print(f"{'before':<10}{result['throughput']:>8.1f}{result['p50']:>10.0f}{result['p95']:>10.0f}"
+          f"{result['rejected']:>10}{'-':>11}{args.requests:>13}{result['stall']:>10.1f}")
+
+    for mode in ('thread', 'process'):
+        pool = RecognizerPool(factory, workers=args.workers, max_queue=args.max_queue, mode=mode)
+        # Start the worker processes before timing
+        await asyncio.gather(*(pool.transcribe(audio) for _ in range(args.workers)))
+        result = await drive(pool.transcribe, audio, args.requests, args.concurrency)
+        stats = pool.stats()
+        # Process workers keep their own recognizers, which the parent cannot count
+        created = stats['recognizers_created'] if mode == 'thread' else '-'
+        print(f"{mode:<10}{result['throughput']:>8.1f}{result['p50']:>10.0f}{result['p95']:>10.0f}"
+              f"{result['rejected']:>10}{stats['max_queue_depth']:>11}{created:>13}{result['stall']:>10.1f}")
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent speech recognition.")
+    parser.add_argument("--fake", action="store_true", help="Use a hashing recognizer instead of the Vosk model")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5, help="Seconds of audio per request")
+    parser.add_argument("--workers", type=int, default=settings.ASR_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=settings.ASR_MAX_QUEUE)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_audio_response.py
+"""
+Size and serialization cost of a spoken /api/upload answer in each
+representation: JSON with base64 audio (the response_model path: base64,
+AudioResponse validation, JSON rendering), raw audio, and multipart/mixed
+with a JSON part. Audio is random bytes at gTTS's 32 kbit/s, so no network
+is needed.
+
+    python -m benchmarks.bench_audio_response --seconds 10 30 60 120 --repeat 50
+"""
+import argparse
+import asyncio
+import base64
+import os
+import time
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+from app.models.schemas import AudioResponse
+from app.utils.responses import audio_headers, multipart_stream
+
+BYTES_PER_SECOND = 32000 // 8  # gTTS writes 32 kbit/s mono MP3
+
+METADATA = {
+    "question": "मेरी पॉलिसी की परिपक्वता राशि कितनी है?",
+    "llm_response": "आपकी पॉलिसी की परिपक्वता राशि बीमा राशि और बोनस के बराबर है। " * 8,
+    "detected_language": "hi",
+}
+
+
+def as_json(audio: bytes) -> bytes:
+    encoded = base64.b64encode(audio).decode("utf-8")
+    model = AudioResponse(audio_content=encoded, **METADATA)
+    return JSONResponse(model.model_dump(mode="json")).body
+
+
+def as_raw(audio: bytes) -> bytes:
+    response = Response(audio, media_type="audio/mpeg", headers=audio_headers(METADATA))
+    return response.body + b"".join(k + b": " + v for k, v in response.raw_headers)
+
+
+async def as_multipart(audio: bytes) -> bytes:
+    async def clips():
+        yield audio
+    return b"".join([part async for part in multipart_stream(METADATA, "audio/mpeg", clips(), "x" * 32)])
+
+
+async def measure(serialize, audio, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = serialize(audio)
+        if asyncio.iscoroutine(body):
+            body = await body
+        timings.append(time.perf_counter() - start)
+    return len(body), np.median(timings) * 1000
+
+
+async def run(args):
+    print(f"{'audio s':>8}{'mp3 KB':>9}{'representation':>16}{'payload KB':>12}{'overhead':>10}{'median ms':>11}")
+    for seconds in args.seconds:
+        audio = os.urandom(int(seconds * BYTES_PER_SECOND))
+        for name, serialize in (('json+base64', as_json), ('raw', as_raw), ('multipart', as_multipart)):
+            size, ms = await measure(serialize, audio, args.repeat)
+            print(f"{seconds:>8.0f}{len(audio) / 1024:>9.0f}{name:>16}{size / 1024:>12.1f}"
+                  f"{f'{100 * (size / len(audio) - 1):+.1f}%':>10}{ms:>11.3f}")
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio response representations.")
+    parser.add_argument("--seconds", type=float, nargs='+', default=[10, 30, 60, 120], help="Seconds of speech")
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
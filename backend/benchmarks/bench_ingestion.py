@@ -0,0 +1,39 @@
+# benchmarks/bench_ingestion.py
+"""
+PDF extraction + chunking throughput of the ingestion pipeline, serial vs
+the process pool, against backend/data/Hackathon. Embedding is skipped so the
+numbers isolate the stage that runs in parallel.
+
+    python -m benchmarks.bench_ingestion --workers 1 4 8
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from app.services.ingestion import IngestionPipeline, discover_pdfs
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'Hackathon'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF extraction throughput.")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    sources = discover_pdfs(args.data_dir)
+    print(f"{len(sources)} PDFs under {args.data_dir}\n")
+    print(f"{'workers':<10}{'pages':>8}{'chunks':>8}{'seconds':>10}{'pages/s':>10}")
+    for workers in args.workers:
+        pipeline = IngestionPipeline(args.data_dir, workers=workers, model=object())
+        pages = chunks = 0
+        start = time.perf_counter()
+        for _, result in pipeline.extract(sources):
+            pages += result['pages']
+            chunks += len(result['chunks'])
+        elapsed = time.perf_counter() - start
+        print(f"{workers:<10}{pages:>8}{chunks:>8}{elapsed:>10.2f}{pages / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_language_detection.py
+"""
+Per-call latency, accuracy and repeatability of language detection: the
+script-range LanguageDetector against the previous `langdetect.detect` call
+(unsupported results mapped to English).
+
+    python -m benchmarks.bench_language_detection --rounds 200
+"""
+import argparse
+import time
+import numpy as np
+from langdetect import detect
+from app.services.language_detector import LanguageDetector
+
+SAMPLES = {
+    'en': [
+        "What are the health insurance benefits?",
+        "Tell me about LIC pension plans",
+        "How do I file a claim for my policy?",
+    ],
+    'hi': [
+        "मेरी पॉलिसी की परिपक्वता राशि कितनी है?",
+        "जीवन बीमा का प्रीमियम कैसे भरें?",
+        "LIC जीवन उमंग योजना के लाभ बताइए",
+    ],
+    'mr': [
+        "माझ्या पॉलिसीची मुदतपूर्ती रक्कम किती आहे?",
+        "विमा हप्ता कसा भरायचा ते सांगा",
+        "मला आरोग्य विम्याबद्दल माहिती हवी आहे",
+    ],
+    'ta': ["என் பாலிசியின் முதிர்வு தொகை எவ்வளவு?", "காப்பீட்டு பிரீமியத்தை எப்படி செலுத்துவது?"],
+    'te': ["నా పాలసీ మెచ్యూరిటీ మొత్తం ఎంత?", "బీమా ప్రీమియం ఎలా చెల్లించాలి?"],
+    'kn': ["ನನ್ನ ಪಾಲಿಸಿಯ ಮುಕ್ತಾಯ ಮೊತ್ತ ಎಷ್ಟು?", "ವಿಮೆ ಪ್ರೀಮಿಯಂ ಹೇಗೆ ಪಾವತಿಸುವುದು?"],
+    'gu': ["મારી પોલિસીની પાકતી રકમ કેટલી છે?", "વીમાનું પ્રીમિયમ કેવી રીતે ભરવું?"],
+    'ml': ["എന്റെ പോളിസിയുടെ കാലാവധി തുക എത്രയാണ്?", "ഇൻഷുറൻസ് പ്രീമിയം എങ്ങനെ അടയ്ക്കാം?"],
+    'bn': ["আমার পলিসির মেয়াদপূর্তির পরিমাণ কত?", "বীমার প্রিমিয়াম কীভাবে দেব?"],
+    'or': ["ମୋ ପଲିସିର ପରିପକ୍ୱତା ରାଶି କେତେ?", "ବୀମା ପ୍ରିମିୟମ କିପରି ଦେବି?"],
+}
+
+
+def baseline(text, supported):
+    """TranslationService.detect_language before the script fast path"""
+    try:
+        lang = detect(text)
+        return lang if lang in supported else 'en'
+    except Exception:
+        return 'en'
+
+
+def measure(detect_fn, labelled, rounds):
+    start = time.perf_counter()
+    detect_fn(labelled[0][1])
+    first_call = time.perf_counter() - start
+
+    latencies, answers = [], {}
+    for _ in range(rounds):
+        for _, text in labelled:
+            start = time.perf_counter()
+            answer = detect_fn(text)
+            latencies.append(time.perf_counter() - start)
+            answers.setdefault(text, set()).add(answer)
+
+    correct = sum(lang in answers[text] and len(answers[text]) == 1 for lang, text in labelled)
+    unstable = sum(len(a) > 1 for a in answers.values())
+    us = np.array(latencies) * 1e6
+    return first_call * 1000, np.percentile(us, 50), np.percentile(us, 99), correct, unstable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark language detection.")
+    parser.add_argument("--rounds", type=int, default=200, help="Passes over the labelled samples")
+    args = parser.parse_args()
+
+    labelled = [(lang, text) for lang, texts in SAMPLES.items() for text in texts]
+    supported = set(SAMPLES)
+    detector = LanguageDetector(supported)
+
+    print(f"{len(labelled)} labelled texts in {len(SAMPLES)} languages, {args.rounds} rounds\n")
+    print(f"{'detector':<10}{'first ms':>10}{'p50 us':>10}{'p99 us':>10}{'correct':>10}{'unstable':>10}")
+    for name, fn in (('before', lambda t: baseline(t, supported)), ('after', detector.detect)):
+        first, p50, p99, correct, unstable = measure(fn, labelled, args.rounds)
+        print(f"{name:<10}{first:>10.1f}{p50:>10.1f}{p99:>10.1f}{f'{correct}/{len(labelled)}':>10}{unstable:>10}")
+    print(f"\nafter: {detector.stats()['by_script']} calls settled by script, "
+          f"{detector.stats()['by_model']} by the Hindi/Marathi model")
+
+
+if __name__ == "__main__":
+    main()
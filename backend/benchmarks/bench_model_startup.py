@@ -0,0 +1,82 @@
+# benchmarks/bench_model_startup.py
+"""
+Startup time and memory of the full FastText model vs a reduced model.
+
+Starts --workers processes per model (like uvicorn workers), each loading
+the model and embedding one sentence, then reports per-process load time
+and RSS split into anonymous (private heap) and file-backed (shareable,
+memory-mapped) pages, plus the total PSS across all workers.
+
+    python -m app.services.model_provider --output app/models/cc.en.300.reduced
+    python -m benchmarks.bench_model_startup --reduced app/models/cc.en.300.reduced --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from app.config import settings
+
+
+def _status_kb(path, field):
+    with open(path) as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def child(model_path):
+    from app.services.model_provider import load_embedding_model
+    start = time.perf_counter()
+    model = load_embedding_model(model_path)
+    model.get_sentence_vector("What are the maturity benefits of the pension plan?")
+    print(json.dumps({
+        'load_s': time.perf_counter() - start,
+        'rss_anon_mb': _status_kb('/proc/self/status', 'RssAnon') / 1024,
+        'rss_file_mb': _status_kb('/proc/self/status', 'RssFile') / 1024,
+    }), flush=True)
+    # Stay alive until the parent has measured every worker
+    sys.stdin.read()
+
+
+def run_workers(model_path, workers):
+    procs = [
+        subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_model_startup', '--child', str(model_path)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    stats = [json.loads(p.stdout.readline()) for p in procs]
+    pss_mb = sum(_status_kb(f'/proc/{p.pid}/smaps_rollup', 'Pss') for p in procs) / 1024
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return stats, pss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding model startup time and RSS.")
+    parser.add_argument("--full", default=str(settings.FASTTEXT_MODEL_PATH))
+    parser.add_argument("--reduced", help="Reduced model directory")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'model':<10}{'load s':>10}{'anon MB':>10}{'file MB':>10}{'total PSS MB':>15}")
+    for name, path in (('full', args.full), ('reduced', args.reduced)):
+        if not path:
+            continue
+        stats, pss_mb = run_workers(path, args.workers)
+        load_s = max(s['load_s'] for s in stats)
+        anon = sum(s['rss_anon_mb'] for s in stats) / len(stats)
+        file_backed = sum(s['rss_file_mb'] for s in stats) / len(stats)
+        print(f"{name:<10}{load_s:>10.2f}{anon:>10.1f}{file_backed:>10.1f}{pss_mb:>15.1f}")
+    print(f"\n{args.workers} workers per model; anon/file are per-worker averages")
+
+
+if __name__ == "__main__":
+    main()
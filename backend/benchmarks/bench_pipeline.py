@@ -0,0 +1,308 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end benchmark of /api/query and /api/upload against local stand-ins.
+
+The app runs in process with the stub LLM (benchmarks.stub_llm), the stub
+translation backend and the offline TTS backend, each with configurable
+latency. Retrieval (FastText, the corpus in embeddings_output) and speech
+recognition (Vosk) are the real ones. Sessions and translation caches go to
+a temporary directory, so every run starts cold. A query corpus is replayed
+at fixed concurrency in a fixed order. Per-stage timings are read from each
+response's Server-Timing header, and the benchmark reports throughput and
+p50/p95/p99 per stage.
+
+    python -m benchmarks.bench_pipeline run --requests 200 --concurrency 16 --output before.json
+    python -m benchmarks.bench_pipeline run --requests 200 --concurrency 16 --baseline before.json
+
+With --baseline, the run exits with status 1 when a stage's p95 is worse
+than the baseline by more than --tolerance (and --slack-ms).
+/api/upload replays the corpus entries that have a recording in
+--audio-dir. Record them once with gTTS (needs network), or use your own
+WAV/MP3 files named <id>.wav or <id>.mp3:
+
+    python -m benchmarks.bench_pipeline prepare-audio --lang en
+
+--url drives an already running server instead. Its stand-ins are then
+up to whoever started it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import httpx
+from .stub_llm import serve_in_thread
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+PIPELINES = ("query", "upload")
+
+
+def load_corpus(path: Path) -> List[dict]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def recordings(corpus: List[dict], audio_dir: Path) -> Dict[str, Path]:
+    """Corpus id -> recording, for the entries that have one"""
+    found = {}
+    for entry in corpus:
+        for suffix in ('.wav', '.mp3'):
+            path = audio_dir / f"{entry['id']}{suffix}"
+            if path.exists():
+                found[entry['id']] = path
+                break
+    return found
+
+
+def configure_stand_ins(args, workdir: str):
+    """Point the app at the stand-ins; must run before anything imports app.config"""
+    os.environ.update({
+        'OLLAMA_URL': f"http://127.0.0.1:{args.llm_port}",
+        'TRANSLATION_BACKEND': 'stub',
+        'TRANSLATION_CACHE_DB_URL': f"sqlite:///{workdir}/translations.db",
+        'SESSION_DB_URL': f"sqlite:///{workdir}/sessions.db",
+        'TTS_BACKEND': 'offline',
+        'RESPONSE_CACHE': 'true' if args.response_cache else 'false',
+        'HOT_RELOAD': 'false',
+        'TRACING': 'true',
+        'LOG_LEVEL': 'WARNING',
+    })
+
+
+def load_app(args):
+    """Import the app with the stand-ins configured and give them their latency"""
+    from app import main
+    from app.services.translation_backends import StubBackend
+    from app.services.tts_backends import OfflineBackend
+    main.translation_service.backend = StubBackend(latency=args.translation_latency)
+    main.speech_service.tts.backend = OfflineBackend(latency=args.tts_latency)
+    return main
+
+
+def server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Stage -> milliseconds from a Server-Timing header"""
+    stages = {}
+    for metric in (header or "").split(","):
+        name, _, params = metric.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                stages[name] = float(value)
+    return stages
+
+
+async def replay(send, items: list, total: int, concurrency: int) -> dict:
+    """
+    Issue `total` requests, cycling through `items`, with `concurrency` in flight
+    Args:
+        send: Coroutine function taking an item and returning an httpx.Response
+    Returns:
+        dict: throughput, errors (by status), and millisecond samples per stage plus "total"
+    """
+    samples: Dict[str, List[float]] = {"total": []}
+    errors: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await send(items[i % len(items)])
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                return
+            samples["total"].append((time.perf_counter() - start) * 1000)
+            for name, ms in server_timing(response.headers.get("server-timing")).items():
+                samples.setdefault(name, []).append(ms)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': total,
+        'throughput': len(samples["total"]) / elapsed,
+        'errors': errors,
+        'samples': samples,
+    }
+
+
+def summarize(result: dict) -> dict:
+    stages = {}
+    for name, values in result['samples'].items():
+        if not values:
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        stages[name] = {'n': len(values), 'p50': p50, 'p95': p95, 'p99': p99}
+    return {
+        'requests': result['requests'],
+        'throughput': result['throughput'],
+        'errors': result['errors'],
+        'stages': stages,
+    }
+
+
+def report(pipeline: str, summary: dict, concurrency: int):
+    errors = sum(summary['errors'].values())
+    print(f"\n{pipeline}: {summary['requests']} requests, {concurrency} concurrent, "
+          f"{summary['throughput']:.1f} req/s, {errors} errors {summary['errors'] or ''}")
+    print(f"{'stage':<24}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    # Total first, then stages slowest first
+    order = sorted(summary['stages'].items(), key=lambda item: (item[0] != 'total', -item[1]['p50']))
+    for name, s in order:
+        print(f"{name:<24}{s['n']:>6}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float, slack_ms: float) -> List[str]:
+    """Stages whose p95 got worse than the baseline's by more than tolerance and slack"""
+    regressions = []
+    for pipeline, summary in results.items():
+        before = baseline.get(pipeline, {}).get('stages', {})
+        for name, stage in summary['stages'].items():
+            if name not in before:
+                continue
+            limit = before[name]['p95'] * (1 + tolerance) + slack_ms
+            if stage['p95'] > limit:
+                regressions.append(
+                    f"{pipeline}/{name}: p95 {stage['p95']:.1f} ms vs {before[name]['p95']:.1f} ms in the baseline"
+                )
+        if summary['throughput'] < baseline.get(pipeline, {}).get('throughput', 0) * (1 - tolerance):
+            regressions.append(
+                f"{pipeline}: {summary['throughput']:.1f} req/s vs {baseline[pipeline]['throughput']:.1f} in the baseline"
+            )
+    return regressions
+
+
+async def run(args, main=None) -> dict:
+    corpus = load_corpus(args.corpus)
+    rng = random.Random(args.seed)
+    queries = list(corpus)
+    rng.shuffle(queries)
+    audio = recordings(corpus, args.audio_dir)
+    uploads = [(entry['id'], audio[entry['id']].read_bytes(), audio[entry['id']].suffix)
+               for entry in queries if entry['id'] in audio]
+
+    if main is not None:
+        transport = httpx.ASGITransport(app=main.app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout)
+    else:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+
+    async def query(entry):
+        return await client.post('/api/query', json={
+            'prompt': entry['prompt'], 'user_id': 'bench', 'session_id': entry['id']
+        })
+
+    async def upload(item):
+        entry_id, data, suffix = item
+        content_type = 'audio/wav' if suffix == '.wav' else 'audio/mpeg'
+        return await client.post(
+            '/api/upload',
+            files={'file': (f"{entry_id}{suffix}", data, content_type)},
+            data={'user_id': 'bench', 'session_id': entry_id}
+        )
+
+    results = {}
+    async with client:
+        for pipeline in args.pipelines:
+            send, items = (query, queries) if pipeline == 'query' else (upload, uploads)
+            if not items:
+                print(f"\n{pipeline}: skipped, no recordings in {args.audio_dir} (see prepare-audio)")
+                continue
+            if args.warmup:
+                await replay(send, items, args.warmup, args.concurrency)
+            results[pipeline] = summarize(await replay(send, items, args.requests, args.concurrency))
+            report(pipeline, results[pipeline], args.concurrency)
+    return results
+
+
+def run_in_process(args) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_stand_ins(args, workdir)
+        server = serve_in_thread(
+            args.llm_port, latency=args.llm_latency, tokens=args.llm_tokens, token_interval=args.token_interval
+        )
+        try:
+            main = load_app(args)
+
+            async def scenario():
+                try:
+                    return await run(args, main)
+                finally:
+                    # Flush sessions and close caches, as on server shutdown
+                    await main.stop_index_watcher()
+            return asyncio.run(scenario())
+        finally:
+            server.should_exit = True
+
+
+def prepare_audio(args):
+    """Synthesize corpus prompts with gTTS (online) as upload recordings"""
+    from gtts import gTTS
+    args.audio_dir.mkdir(parents=True, exist_ok=True)
+    for entry in load_corpus(args.corpus):
+        if args.lang and entry['lang'] not in args.lang:
+            continue
+        path = args.audio_dir / f"{entry['id']}.mp3"
+        if not path.exists():
+            gTTS(text=entry['prompt'], lang=entry['lang']).save(str(path))
+            print(f"Wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against local stand-ins.")
+    parser.add_argument("mode", choices=['run', 'prepare-audio'])
+    parser.add_argument("--corpus", type=Path, default=DATA_DIR / "queries.json")
+    parser.add_argument("--audio-dir", type=Path, default=DATA_DIR / "audio")
+    parser.add_argument("--pipelines", nargs='+', choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per pipeline")
+    parser.add_argument("--warmup", type=int, default=8, help="Unmeasured requests per pipeline first")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0, help="Order in which the corpus is replayed")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--url", help="Benchmark a running server instead of an in-process app")
+    parser.add_argument("--llm-port", type=int, default=11500)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Stub LLM seconds before the first token")
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--token-interval", type=float, default=0.0, help="Stub LLM seconds between tokens")
+    parser.add_argument("--translation-latency", type=float, default=0.05, help="Seconds per translation request")
+    parser.add_argument("--tts-latency", type=float, default=0.1, help="Seconds per synthesized sentence")
+    parser.add_argument("--response-cache", action="store_true", help="Keep the semantic response cache on")
+    parser.add_argument("--lang", nargs='+', help="prepare-audio: only these corpus languages")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p95 / throughput regression")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="Allowed absolute p95 regression")
+    args = parser.parse_args()
+
+    if args.mode == 'prepare-audio':
+        prepare_audio(args)
+        return
+
+    results = asyncio.run(run(args)) if args.url else run_in_process(args)
+    if args.output:
+        settings = {k: v for k, v in vars(args).items() if isinstance(v, (int, float, str, list)) or v is None}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': settings, 'results': results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        print()
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_search_latency.py
+"""
+Per-query latency of EmbeddingSearcher on the shipped embeddings_output,
+compared with the original cosine_similarity + argsort + iloc implementation.
+
+    python -m benchmarks.bench_search_latency --queries 2000 --top-k 5
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+from app.services.embedding_service import EmbeddingSearcher
+
+EMBEDDINGS_DIR = Path(__file__).resolve().parent.parent / 'embeddings_output'
+
+
+class BaselineSearcher:
+    """The searcher as it was before pre-normalization and columnar metadata"""
+
+    def __init__(self, embeddings_dir):
+        self.embeddings = np.load(embeddings_dir / 'embeddings.npy')
+        self.metadata = pd.read_csv(embeddings_dir / 'metadata.csv')
+
+    def search_by_vector(self, query_embedding, top_k):
+        similarities = cosine_similarity(query_embedding.reshape(1, -1), self.embeddings)[0]
+        top_indices = np.argsort(similarities)[-top_k:][::-1]
+        return [{
+            'similarity': float(similarities[idx]),
+            'text': self.metadata.iloc[idx]['text'],
+            'company': self.metadata.iloc[idx]['company'],
+            'category': self.metadata.iloc[idx]['category'],
+            'file_name': self.metadata.iloc[idx]['file_name']
+        } for idx in top_indices]
+
+
+def measure(searcher, queries, top_k):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        searcher.search_by_vector(q, top_k)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-query search latency.")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    baseline = BaselineSearcher(EMBEDDINGS_DIR)
+    # Search by vector only, so the FastText model is not needed
+    searcher = EmbeddingSearcher(EMBEDDINGS_DIR, model=object())
+
+    corpus = baseline.embeddings
+    picks = rng.choice(corpus.shape[0], size=args.queries)
+    queries = (corpus[picks] + rng.normal(0, 0.01, (args.queries, corpus.shape[1]))).astype(np.float32)
+
+    # Both implementations must agree on the ranking
+    for q in queries[:50]:
+        before = [r['text'] for r in baseline.search_by_vector(q, args.top_k)]
+        after = [r['text'] for r in searcher.search_by_vector(q, args.top_k)]
+        assert before == after, "rankings differ"
+
+    print(f"Corpus: {corpus.shape[0]} chunks, {args.queries} queries, top_k={args.top_k}\n")
+    print(f"{'searcher':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, impl in (('before', baseline), ('after', searcher)):
+        ms = measure(impl, queries, args.top_k)
+        print(f"{name:<10}{np.percentile(ms, 50):>10.3f}{np.percentile(ms, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_speech_decoding.py
+"""
+Time to turn an upload into recognizer-ready PCM, per audio duration: the
+previous path (temp .mp3, ffmpeg to a temp .wav, re-read with `wave`)
+against the in-memory one (WAV read from the buffer, MP3 through an ffmpeg
+pipe). Audio is synthetic, so no recordings are needed; ffmpeg paths are
+skipped when ffmpeg is not installed.
+
+    python -m benchmarks.bench_speech_decoding --durations 2 5 10 30 --repeat 5
+    python -m benchmarks.bench_speech_decoding --recognize   # include Vosk, needs the model
+"""
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+import numpy as np
+from app.utils.audio import TARGET_RATE, pcm_stream
+
+
+def synthetic_wav(seconds: float, rate: int = TARGET_RATE) -> bytes:
+    """Amplitude-modulated noise with voice-like loudness changes"""
+    rng = np.random.default_rng(0)
+    n = int(seconds * rate)
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * np.arange(n) / rate)
+    samples = (rng.normal(0, 3000, n) * envelope).clip(-32768, 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def encode_mp3(wav: bytes) -> bytes:
+    return subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-f", "mp3", "pipe:1"],
+        input=wav, stdout=subprocess.PIPE, check=True
+    ).stdout
+
+
+def before(audio: bytes):
+    """The previous SpeechService.speech_to_text decode path"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_mp3:
+        temp_mp3.write(audio)
+        mp3_path = temp_mp3.name
+    wav_path = mp3_path.rsplit(".", 1)[0] + ".wav"
+    try:
+        subprocess.run(["ffmpeg", "-y", "-i", mp3_path, "-ar", "16000", "-ac", "1", "-f", "wav", wav_path],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with wave.open(wav_path, "rb") as wf:
+            rate = wf.getframerate()
+            chunks = iter(lambda: wf.readframes(4000), b'')
+            yield from ((rate, c) for c in chunks)
+    finally:
+        for path in (mp3_path, wav_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def after(audio: bytes):
+    rate, chunks = pcm_stream(audio)
+    yield from ((rate, c) for c in chunks)
+
+
+def make_consumer(recognize: bool):
+    if not recognize:
+        return lambda rate, chunk: None
+    from app.services.speech_service import SpeechService
+    from vosk import KaldiRecognizer
+    model = SpeechService().model
+    state = {}
+
+    def consume(rate, chunk):
+        if state.get('rate') != rate:
+            state['rec'], state['rate'] = KaldiRecognizer(model, rate), rate
+        state['rec'].AcceptWaveform(chunk)
+    return consume
+
+
+def measure(path, audio, consume, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for rate, chunk in path(audio):
+            consume(rate, chunk)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speech decoding paths.")
+    parser.add_argument("--durations", type=float, nargs='+', default=[2, 5, 10, 30], help="Seconds of audio")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--recognize", action="store_true", help="Feed the PCM to Vosk as well")
+    args = parser.parse_args()
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("ffmpeg not found: only the in-memory WAV path is measured\n")
+    consume = make_consumer(args.recognize)
+
+    print(f"{'audio s':>8}{'input':>7}{'path':>14}{'median ms':>12}{'ms per audio s':>16}")
+    for seconds in args.durations:
+        wav = synthetic_wav(seconds)
+        inputs = [('wav', wav)] + ([('mp3', encode_mp3(wav))] if has_ffmpeg else [])
+        for kind, audio in inputs:
+            # In memory, WAV is read from the buffer and MP3 goes through the ffmpeg pipe
+            paths = ([('temp files', before)] if has_ffmpeg else []) + [('in-memory', after)]
+            for name, path in paths:
+                ms = measure(path, audio, consume, args.repeat)
+                print(f"{seconds:>8.0f}{kind:>7}{name:>14}{ms:>12.1f}{ms / seconds:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
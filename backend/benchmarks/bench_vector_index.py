@@ -0,0 +1,79 @@
+# benchmarks/bench_vector_index.py
+"""
+Recall-vs-latency benchmark for the vector index layer.
+
+Queries are corpus rows with gaussian noise added, so no FastText model is
+needed. Use --scale to tile the shipped corpus into a larger synthetic one.
+
+    python -m benchmarks.bench_vector_index --scale 20 --top-k 5
+"""
+import argparse
+import time
+from pathlib import Path
+import numpy as np
+from app.services.vector_index import FlatIndex, IVFIndex, normalize_rows
+
+EMBEDDINGS_PATH = Path(__file__).resolve().parent.parent / 'embeddings_output' / 'embeddings.npy'
+
+
+def make_corpus(scale: int, noise: float, rng) -> np.ndarray:
+    base = np.load(EMBEDDINGS_PATH).astype(np.float32)
+    if scale <= 1:
+        return base
+    copies = [base] + [base + rng.normal(0, noise, base.shape).astype(np.float32)
+                       for _ in range(scale - 1)]
+    return np.concatenate(copies)
+
+
+def time_queries(index, queries, top_k):
+    latencies = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q, top_k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids)
+    return np.array(latencies) * 1000, results
+
+
+def recall(truth, found, top_k):
+    hits = sum(len(np.intersect1d(t, f)) for t, f in zip(truth, found))
+    return hits / (len(truth) * top_k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flat vs IVF vector search.")
+    parser.add_argument("--scale", type=int, default=1, help="Tile the corpus this many times")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--noise", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = make_corpus(args.scale, args.noise, rng)
+    picks = rng.choice(corpus.shape[0], size=args.queries)
+    queries = normalize_rows(corpus[picks] + rng.normal(0, args.noise, (args.queries, corpus.shape[1])))
+    print(f"Corpus: {corpus.shape[0]} x {corpus.shape[1]}, {args.queries} queries, top_k={args.top_k}")
+
+    flat = FlatIndex.build(corpus)
+    flat_ms, truth = time_queries(flat, queries, args.top_k)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(corpus, nlist=args.nlist)
+    build_s = time.perf_counter() - start
+    print(f"IVF build: nlist={ivf.nlist} in {build_s:.2f}s\n")
+
+    print(f"{'index':<14}{'recall':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'flat':<14}{1.0:>8.3f}{np.percentile(flat_ms, 50):>10.3f}{np.percentile(flat_ms, 99):>10.3f}")
+    for nprobe in (1, 2, 4, 8, 16, 32):
+        if nprobe > ivf.nlist:
+            break
+        ivf.nprobe = nprobe
+        ivf_ms, found = time_queries(ivf, queries, args.top_k)
+        print(f"{'ivf/' + str(nprobe):<14}{recall(truth, found, args.top_k):>8.3f}"
+              f"{np.percentile(ivf_ms, 50):>10.3f}{np.percentile(ivf_ms, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/eval_retrieval.py
+"""
+Retrieval quality and latency for the vector, BM25 and hybrid modes of
+EmbeddingSearcher on the shipped embeddings_output.
+
+The query set is the one in tests/test_rag.py plus plan-identifier (UIN)
+lookups taken from the corpus, which pure embedding search tends to miss.
+A result counts as relevant when it is in the expected category (if any)
+and its text contains every expected keyword.
+
+    python -m benchmarks.eval_retrieval --top-k 5
+    python -m benchmarks.eval_retrieval --modes bm25   # no FastText model needed
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+import numpy as np
+from app.services.corpus_store import open_corpus
+from app.services.embedding_service import EmbeddingSearcher
+
+EMBEDDINGS_DIR = Path(__file__).resolve().parent.parent / 'embeddings_output'
+MODES = ('vector', 'bm25', 'hybrid')
+
+# (query, expected category or None, keywords every relevant chunk contains)
+RAG_QUERIES = [
+    ("What are the health insurance benefits?", 'Health Plans', ['benefit']),
+    ("Tell me about pension plans", 'Pension Plans', ['pension']),
+    ("What is the premium payment process?", None, ['premium', 'pay']),
+    ("How do I file a claim?", None, ['claim']),
+    ("What are the maturity benefits?", None, ['maturity']),
+]
+UIN = re.compile(r'\b512[NL]\d{3}V\d{2}\b')
+
+
+class ZeroModel:
+    """Stands in for FastText in BM25-only runs; reported similarities are 0"""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def get_sentence_vector(self, text):
+        return np.zeros(self.dim, dtype=np.float32)
+
+
+def uin_queries(searcher, limit: int) -> list:
+    """One lookup query per distinct plan UIN found in the corpus"""
+    seen = []
+    for idx in range(len(searcher)):
+        for uin in UIN.findall(searcher.store.text(idx)):
+            if uin not in seen:
+                seen.append(uin)
+        if len(seen) >= limit:
+            break
+    return [(f"Which plan has UIN {uin}?", None, [uin.lower()]) for uin in seen[:limit]]
+
+
+def is_relevant(result: dict, category, keywords) -> bool:
+    if category is not None and result['category'] != category:
+        return False
+    text = result['text'].lower()
+    return all(k in text for k in keywords)
+
+
+def evaluate(searcher, queries, mode: str, top_k: int, repeats: int) -> dict:
+    latencies, hits, precisions, reciprocal_ranks = [], [], [], []
+    for query, category, keywords in queries:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = searcher.search(query, top_k=top_k, mode=mode)
+            latencies.append(time.perf_counter() - start)
+        relevant = [is_relevant(r, category, keywords) for r in results]
+        hits.append(any(relevant))
+        precisions.append(sum(relevant) / top_k)
+        reciprocal_ranks.append(1 / (relevant.index(True) + 1) if any(relevant) else 0.0)
+    latencies = np.array(latencies) * 1000
+    return {
+        'hit': np.mean(hits),
+        'precision': np.mean(precisions),
+        'mrr': np.mean(reciprocal_ranks),
+        'p50': np.percentile(latencies, 50),
+        'p95': np.percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency per mode.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--uin-queries", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--modes", nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    # BM25 ranks on text alone, so the FastText model is only loaded for the other modes
+    needs_model = any(mode != 'bm25' for mode in args.modes)
+    model = None if needs_model else ZeroModel(open_corpus(EMBEDDINGS_DIR).dim)
+    searcher = EmbeddingSearcher(EMBEDDINGS_DIR, model=model)
+    query_sets = {'rag': RAG_QUERIES, 'uin': uin_queries(searcher, args.uin_queries)}
+
+    print(f"{len(searcher)} chunks, top_k={args.top_k}")
+    print(f"{'queries':<8}{'mode':<8}{'hit@k':>8}{'P@k':>8}{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, queries in query_sets.items():
+        for mode in args.modes:
+            r = evaluate(searcher, queries, mode, args.top_k, args.repeats)
+            print(f"{name:<8}{mode:<8}{r['hit']:>8.2f}{r['precision']:>8.2f}{r['mrr']:>8.2f}"
+                  f"{r['p50']:>10.3f}{r['p95']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/load_test.py
+"""
+Throughput under concurrent clients, against a stub LLM.
+
+`llm` mode (no API or models needed) runs LlamaService on its async Ollama
+client next to the previous pattern, a blocking `ollama.chat` inside an
+async function, and reports throughput plus the worst event-loop stall seen
+by a heartbeat task:
+
+    python -m benchmarks.load_test llm --concurrency 32 --requests 128 --latency 0.5
+
+`api` mode drives a running server's /api/query; start the stub with
+`python -m benchmarks.stub_llm` and the API with OLLAMA_URL pointing at it:
+
+    python -m benchmarks.load_test api --url http://localhost:8000 --concurrency 32 --requests 256
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import numpy as np
+import httpx
+from ollama import Client
+from .stub_llm import serve_in_thread
+
+PROMPTS = [
+    "What are the health insurance benefits?",
+    "Tell me about pension plans",
+    "What is the premium payment process?",
+    "How do I file a claim?",
+    "What are the maturity benefits?",
+]
+
+
+class BlockingLlama:
+    """The previous LlamaService call path: sync ollama chat inside an async def"""
+
+    def __init__(self, host, model):
+        self.client = Client(host=host)
+        self.model = model
+
+    async def generate_response(self, question: str, context: str) -> str:
+        response = self.client.chat(model=self.model, messages=[{'role': 'user', 'content': question}])
+        return response['message']['content']
+
+
+async def heartbeat(interval: float, stalls: list, stop: asyncio.Event):
+    """Record how late each tick wakes up; large values mean the loop was blocked"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def drive(call, total: int, concurrency: int) -> dict:
+    """Issue `total` calls with at most `concurrency` in flight"""
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    stalls, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(0.01, stalls, stop))
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(PROMPTS[i % len(PROMPTS)])
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+
+    latencies = np.array(latencies or [0.0]) * 1000
+    return {
+        'throughput': (total - errors) / elapsed,
+        'p50': np.percentile(latencies, 50),
+        'p95': np.percentile(latencies, 95),
+        'p99': np.percentile(latencies, 99),
+        'max_stall': max(stalls, default=0.0) * 1000,
+        'errors': errors,
+    }
+
+
+def report(name: str, r: dict):
+    print(f"{name:<12}{r['throughput']:>10.1f}{r['p50']:>10.0f}{r['p95']:>10.0f}{r['p99']:>10.0f}"
+          f"{r['max_stall']:>12.0f}{r['errors']:>8}")
+
+
+def header():
+    print(f"{'':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'stall ms':>12}{'errors':>8}")
+
+
+async def run_llm(args, sessions_dir):
+    from app.services.llm_service import LlamaService
+    from app.services.session_store import SessionStore
+
+    host = f"http://127.0.0.1:{args.port}"
+    services = {
+        'blocking': BlockingLlama(host, 'stub'),
+        'async': LlamaService(host=host, model='stub',
+                              sessions=SessionStore(f"sqlite:///{sessions_dir}/sessions.db")),
+    }
+    header()
+    for name, service in services.items():
+        r = await drive(lambda q: service.generate_response(q, ''), args.requests, args.concurrency)
+        report(name, r)
+
+
+async def run_api(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=300) as client:
+        async def query(prompt):
+            response = await client.post('/api/query', json={'prompt': prompt})
+            response.raise_for_status()
+
+        header()
+        report('api', await drive(query, args.requests, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the query pipeline against a stub LLM.")
+    parser.add_argument("mode", choices=['llm', 'api'])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL (api mode)")
+    parser.add_argument("--port", type=int, default=11500, help="Stub LLM port (llm mode)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub LLM seconds per answer (llm mode)")
+    args = parser.parse_args()
+
+    if args.mode == 'llm':
+        server = serve_in_thread(args.port, latency=args.latency)
+        try:
+            with tempfile.TemporaryDirectory() as sessions_dir:
+                asyncio.run(run_llm(args, sessions_dir))
+        finally:
+            server.should_exit = True
+    else:
+        asyncio.run(run_api(args))
+
+
+if __name__ == "__main__":
+    main()
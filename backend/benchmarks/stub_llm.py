@@ -0,0 +1,96 @@
+# benchmarks/stub_llm.py
+"""
+Local stand-in for the Ollama chat API with configurable latency, so load
+tests measure our pipeline rather than the model.
+
+    python -m benchmarks.stub_llm --port 11500 --latency 0.5 --tokens 40
+    OLLAMA_URL=http://localhost:11500 uvicorn app.main:app
+
+Supports POST /api/chat with "stream": false (one JSON body) or true
+(NDJSON chunks, one token each), like Ollama.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+ANSWER = (
+    "The policy pays the sum assured on maturity. Premiums can be paid yearly, half-yearly or monthly. "
+    "Claims are settled once the claim form and documents are received."
+)
+
+
+def create_app(latency: float = 0.5, tokens: int = 40, token_interval: float = 0.0) -> FastAPI:
+    """
+    Args:
+        latency (float): Seconds before the first token
+        tokens (int): Words in each answer
+        token_interval (float): Seconds between streamed tokens
+    """
+    app = FastAPI(title="Stub LLM")
+    words = (ANSWER.split() * (tokens // len(ANSWER.split()) + 1))[:tokens]
+
+    def chunk(model, content, done):
+        body = {
+            'model': model,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'message': {'role': 'assistant', 'content': content},
+            'done': done,
+        }
+        if done:
+            body.update(done_reason='stop', prompt_eval_count=0, eval_count=len(words))
+        return body
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        payload = await request.json()
+        model = payload.get('model', 'stub')
+        await asyncio.sleep(latency)
+        if not payload.get('stream', False):
+            await asyncio.sleep(token_interval * len(words))
+            return chunk(model, ' '.join(words), True)
+
+        async def stream():
+            for i, word in enumerate(words):
+                yield json.dumps(chunk(model, word if i == 0 else ' ' + word, False)) + '\n'
+                await asyncio.sleep(token_interval)
+            yield json.dumps(chunk(model, '', True)) + '\n'
+
+        return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+    return app
+
+
+def serve_in_thread(port: int = 11500, **params) -> uvicorn.Server:
+    """Start the stub in a daemon thread and wait until it accepts connections"""
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(**params), host='127.0.0.1', port=port, log_level='warning'
+    ))
+    threading.Thread(target=server.run, name='stub-llm', daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub Ollama chat server.")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.latency, args.tokens, args.token_interval),
+        host='127.0.0.1', port=args.port, log_level='warning'
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# test_api.py
+import importlib
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.services.corpus_store import CorpusStore, CorpusWriter, corpus_path
+from app.services.ingestion import build_search_indexes
+from benchmarks.stub_llm import serve_in_thread
+
+VOSK_MODEL = Path(__file__).resolve().parent.parent / 'app' / 'models' / 'audioModel' / 'vosk-model-en-us-0.22-lgraph'
+LLM_PORT = 11563
+
+CHUNKS = [
+    'The premium is paid yearly or monthly.',
+    'Maturity benefits are paid at the end of the term.',
+    'A claim is settled once the claim form is received.',
+]
+
+
+def write_model(path, words, dim=8):
+    """A reduced FastText model with random vectors for `words`"""
+    path.mkdir()
+    rng = np.random.default_rng(0)
+    np.save(path / 'word_vectors.npy', rng.normal(size=(len(words), dim)).astype(np.float32))
+    (path / 'words.txt').write_text(''.join(f'{w}\n' for w in words), encoding='utf-8')
+    (path / 'meta.json').write_text(json.dumps({'dim': dim, 'minn': 3, 'maxn': 6, 'bucket': 0}))
+
+
+def write_corpus(embeddings_dir, model):
+    records = [{'company': 'LIC', 'category': 'Pension Plans', 'file_name': 'plan.pdf', 'chunk_idx': i, 'text': text}
+               for i, text in enumerate(CHUNKS)]
+    vectors = np.stack([model.get_sentence_vector(text) for text in CHUNKS])
+    with CorpusWriter(corpus_path(embeddings_dir), dim=vectors.shape[1]) as writer:
+        writer.append_many(vectors, records)
+    build_search_indexes(CorpusStore.open(corpus_path(embeddings_dir)), embeddings_dir)
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    """
+    app.main on a three-chunk corpus, a stub LLM and the offline translation
+    and TTS backends, with a client that keeps one event loop for all requests
+    """
+    if not (VOSK_MODEL / 'am' / 'final.mdl').exists():
+        pytest.skip('Vosk model not installed')
+    from app.services.model_provider import ReducedFastText
+
+    workdir = tmp_path_factory.mktemp('api')
+    words = sorted({w for text in CHUNKS for w in text.split()} | {'How', 'do', 'I', 'pay', 'the', 'premium?'})
+    write_model(workdir / 'model', words)
+    write_corpus(workdir / 'embeddings', ReducedFastText(workdir / 'model'))
+
+    server = serve_in_thread(LLM_PORT, latency=0.0, tokens=12)
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in {
+            'EMBEDDINGS_DIR': workdir / 'embeddings',
+            'FASTTEXT_MODEL_PATH': workdir / 'model',
+            'OLLAMA_URL': f'http://127.0.0.1:{LLM_PORT}',
+            'SESSION_DB_URL': f'sqlite:///{workdir}/sessions.db',
+            'TRANSLATION_BACKEND': 'stub',
+            'TRANSLATION_CACHE_DB_URL': f'sqlite:///{workdir}/translations.db',
+            'TTS_BACKEND': 'offline',
+            'RESPONSE_CACHE': True,
+            'RESPONSE_CACHE_THRESHOLD': 0.95,
+            'HOT_RELOAD': False,
+        }.items():
+            patch.setattr(settings, name, value)
+        module = importlib.import_module('app.main')
+        with TestClient(module.app) as client:
+            yield module, client
+    server.should_exit = True
+
+
+def test_repeated_anonymous_question_is_answered_from_the_cache(api):
+    main, client = api
+    body = {'prompt': 'How do I pay the premium?'}
+
+    first = client.post('/api/query', json=body)
+    assert first.status_code == 200
+    assert main.response_cache.stats()['hits'] == 0
+
+    second = client.post('/api/query', json=body)
+    assert second.json() == first.json()
+    assert main.response_cache.stats()['hits'] == 1
+    # Requests without ids share nothing else either
+    assert not main.llm_service.sessions.has_history(main.session_key())
+
+
+def test_speech_stream_is_refused_when_the_recognizer_pool_is_full(api):
+    main, client = api
+    pool = main.speech_service.pool
+    for _ in range(pool.workers + pool.max_queue):
+        pool.admit()
+    try:
+        with client.websocket_connect('/api/speech/stream') as websocket:
+            websocket.send_bytes(b'\x00\x00' * 1600)
+            message = websocket.receive()
+        assert (message['type'], message['code']) == ('websocket.close', 1013)
+    finally:
+        for _ in range(pool.workers + pool.max_queue):
+            pool.leave(None)
+
+
+@pytest.mark.parametrize('control', [
+    '{"type": "start", "format": "pcm16", "sample_rate": 0}',
+    '{"type": "start", "format": "flac"}',
+    '{"type": "start", "sample_rate": "fast"}',
+    'not json',
+    '[]',
+])
+def test_speech_stream_rejects_invalid_start_messages(api, control):
+    main, client = api
+    with client.websocket_connect('/api/speech/stream') as websocket:
+        websocket.send_text(control)
+        message = websocket.receive()
+    assert (message['type'], message['code']) == ('websocket.close', 1003)
+    assert main.speech_service.pool.stats()['recognizers_in_use'] == 0
@@ -0,0 +1,73 @@
+# test_audio.py
+import io
+import shutil
+import wave
+import numpy as np
+import pytest
+from app.utils.audio import (
+    AudioDecodeError, FfmpegStreamDecoder, WavStreamDecoder, container_format, ffmpeg_pcm_chunks, parse_wav_header,
+    pcm_stream, sniff_format
+)
+
+
+def make_wav(samples, rate=16000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
+
+
+def test_formats_are_sniffed():
+    assert sniff_format(make_wav([0] * 10)) == 'wav'
+    assert sniff_format(b'ID3\x04\x00' + b'\x00' * 20) == 'mp3'
+    assert sniff_format(b'\xff\xfb\x90\x00') == 'mp3'
+    assert sniff_format(b'OggS\x00') == 'unknown'
+
+
+def test_wav_is_read_from_memory_in_chunks():
+    samples = np.arange(10000) % 2000
+    rate, chunks = pcm_stream(make_wav(samples, rate=8000), chunk_frames=4000)
+    chunks = list(chunks)
+    assert rate == 8000
+    assert [len(c) for c in chunks] == [8000, 8000, 4000]
+    assert np.array_equal(np.frombuffer(b''.join(chunks), dtype='<i2'), samples)
+
+    # Stereo is mixed down to mono
+    stereo = np.column_stack([np.full(100, 1000), np.full(100, 3000)]).ravel()
+    _, chunks = pcm_stream(make_wav(stereo, channels=2))
+    assert np.all(np.frombuffer(b''.join(chunks), dtype='<i2') == 2000)
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+def test_ffmpeg_pipe_decodes_and_reports_errors():
+    pcm = b''.join(ffmpeg_pcm_chunks(make_wav(np.zeros(16000), rate=44100)))
+    assert abs(len(pcm) // 2 - 16000 * 16000 // 44100) < 400
+    with pytest.raises(AudioDecodeError):
+        list(ffmpeg_pcm_chunks(b'not audio at all'))
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+def test_stream_decoder_accepts_audio_in_pieces():
+    wav = make_wav(np.zeros(32000))
+    decoder = FfmpegStreamDecoder()
+    pcm = b''.join(decoder.feed(wav[i:i + 4096]) for i in range(0, len(wav), 4096))
+    pcm += decoder.close()
+    assert abs(len(pcm) // 2 - 32000) < 400
+
+
+def test_wav_is_decoded_as_it_arrives():
+    stereo = np.column_stack([np.full(1000, 100), np.full(1000, 300)]).ravel()
+    data = make_wav(stereo, rate=8000, channels=2) + b'LIST\x04\x00\x00\x00info'
+    assert parse_wav_header(data[:30]) is None
+    header = parse_wav_header(data)
+    assert (header.sample_rate, header.channels, header.data_offset, header.data_size) == (8000, 2, 44, 4000)
+
+    decoder = WavStreamDecoder(header)
+    # Pieces that split the header and individual frames
+    pcm = b''.join(decoder.feed(data[i:i + 7]) for i in range(0, len(data), 7)) + decoder.close()
+    assert np.array_equal(np.frombuffer(pcm, dtype='<i2'), np.full(1000, 200))
+    assert container_format(b'\x1a\x45\xdf\xa3\x01') == 'webm'
+    assert container_format(b'OggS\x00') == 'ogg'
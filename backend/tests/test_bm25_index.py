@@ -0,0 +1,81 @@
+# test_bm25_index.py
+import numpy as np
+from app.services.bm25_index import BM25Index, load_bm25, bm25_path, reciprocal_rank_fusion, tokenize
+from app.services.corpus_store import CorpusStore, CorpusWriter, corpus_path
+from app.services.embedding_service import EmbeddingSearcher
+
+TEXTS = [
+    'Jeevan Arogya UIN 512N266V02 is a health insurance plan',
+    'The maturity benefit is paid at the end of the policy term',
+    'Premium can be paid yearly half yearly or monthly',
+    'Claims are settled after the death benefit claim form is received',
+]
+
+
+class FixedModel:
+    """Embeds every query to the same vector, closest to the premium chunk"""
+
+    def get_sentence_vector(self, text):
+        return np.array([0.0, 0.0, 1.0, 0.1], dtype=np.float32)
+
+
+def _write_corpus(embeddings_dir):
+    with CorpusWriter(corpus_path(embeddings_dir), dim=4) as writer:
+        writer.append_many(np.eye(4), [{
+            'company': 'LIC', 'category': 'Health Plans', 'file_name': f'{i}.pdf',
+            'chunk_idx': 0, 'text': text
+        } for i, text in enumerate(TEXTS)])
+
+
+def test_identifiers_stay_single_tokens():
+    assert tokenize('What is plan 512N266V02?') == ['plan', '512n266v02']
+
+
+def test_exact_term_ranks_first_and_survives_round_trip(tmp_path):
+    index = BM25Index.build(TEXTS)
+    scores, ids = index.search('UIN 512N266V02', top_k=2)
+    assert list(ids) == [0]
+
+    index.save(tmp_path / 'bm25.npz')
+    loaded = BM25Index.load(tmp_path / 'bm25.npz')
+    assert loaded.vocabulary == index.vocabulary
+    np.testing.assert_allclose(loaded.search('maturity benefit', 3)[0], index.search('maturity benefit', 3)[0])
+    assert len(loaded.search('unknown words only', 3)[1]) == 0
+
+
+def test_rrf_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]])
+    assert max(fused, key=fused.get) == 1
+    assert fused[3] > fused[2]
+
+
+def test_hybrid_search_recovers_lexical_match(tmp_path):
+    _write_corpus(tmp_path)
+    searcher = EmbeddingSearcher(tmp_path, model=FixedModel())
+
+    assert searcher.search('plan 512N266V02', top_k=1, mode='vector')[0]['file_name'] == '2.pdf'
+    hybrid = searcher.search('plan 512N266V02', top_k=2, mode='hybrid')
+    assert {r['file_name'] for r in hybrid} == {'0.pdf', '2.pdf'}
+    assert all('score' in r for r in hybrid)
+    assert searcher.search_batch(['plan 512N266V02'], top_k=2, mode='hybrid') == [hybrid]
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    _write_corpus(tmp_path)
+    store = CorpusStore.open(corpus_path(tmp_path))
+    BM25Index.build(TEXTS[:2]).save(bm25_path(store.path))
+    assert len(load_bm25(store)) == len(TEXTS)
+
+
+def test_index_from_another_corpus_of_the_same_size_is_rebuilt(tmp_path):
+    from app.services.bm25_index import build_bm25
+    _write_corpus(tmp_path)
+    store = CorpusStore.open(corpus_path(tmp_path))
+    # A re-ingest that kept the chunk count but changed the texts
+    BM25Index.build(reversed(TEXTS), fingerprint='previous corpus').save(bm25_path(store.path))
+    index = load_bm25(store)
+    assert index.fingerprint == store.fingerprint
+    assert list(index.search('512N266V02', top_k=1)[1]) == [0]
+
+    build_bm25(store).save(bm25_path(store.path))
+    assert load_bm25(store).fingerprint == store.fingerprint
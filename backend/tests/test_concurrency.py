@@ -0,0 +1,67 @@
+# test_concurrency.py
+import asyncio
+import threading
+import time
+from app.utils.concurrency import run_blocking
+from benchmarks.stub_llm import serve_in_thread
+
+
+def test_blocking_calls_leave_the_event_loop_free():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        thread_name = await run_blocking(lambda: time.sleep(0.3) or threading.current_thread().name)
+        task.cancel()
+        return thread_name, ticks
+
+    thread_name, ticks = asyncio.run(scenario())
+    assert thread_name.startswith('pipeline')
+    assert ticks >= 10
+
+
+def test_llm_requests_run_concurrently(tmp_path):
+    from app.services.llm_service import LlamaService
+    from app.services.session_store import SessionStore
+
+    server = serve_in_thread(11561, latency=0.3, tokens=5)
+    try:
+        service = LlamaService(host='http://127.0.0.1:11561', model='stub',
+                               sessions=SessionStore(f'sqlite:///{tmp_path}/sessions.db'))
+
+        async def scenario():
+            start = time.perf_counter()
+            answers = await asyncio.gather(*(service.generate_response(f'q{i}', '') for i in range(8)))
+            return answers, time.perf_counter() - start
+
+        answers, elapsed = asyncio.run(scenario())
+        assert all(len(a.split()) == 5 for a in answers)
+        # Eight 0.3s calls overlap instead of taking 2.4s back to back
+        assert elapsed < 1.5
+    finally:
+        server.should_exit = True
+
+
+def test_session_writes_run_off_the_event_loop(tmp_path):
+    from app.services.llm_service import LlamaService
+    from app.services.session_store import SessionStore, session_key
+
+    sessions = SessionStore(f'sqlite:///{tmp_path}/sessions.db', flush_interval=60)
+    service = LlamaService(host='http://127.0.0.1:1', model='stub', sessions=sessions)
+    threads = []
+    save_exchange = sessions.save_exchange
+    sessions.save_exchange = lambda *args: threads.append(threading.current_thread().name) or save_exchange(*args)
+
+    async def scenario():
+        await service.remember('q', 'a', session_key('carol', 's1'))
+
+    asyncio.run(scenario())
+    assert threads and threads[0].startswith('pipeline')
+    assert [m.content for m in sessions.history(session_key('carol', 's1'), 2)] == ['q', 'a']
+    sessions.close()
@@ -0,0 +1,89 @@
+# test_corpus_store.py
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.corpus_store import CorpusStore, CorpusWriter, convert_legacy, corpus_path, corpus_versions, open_corpus
+from app.services.vector_index import vector_fingerprint
+
+
+def _records(n):
+    return [{
+        'company': ['LIC', 'Maxlife'][i % 2],
+        'category': 'Pension Plans',
+        'file_name': f'plan_{i % 3}.pdf',
+        'chunk_idx': i,
+        'text': f'chunk {i} — बीमा',
+    } for i in range(n)]
+
+
+def test_writer_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(10, 8)).astype(np.float32)
+    records = _records(10)
+    with CorpusWriter(tmp_path / 'corpus', dim=8) as writer:
+        writer.append_many(vectors[:4], records[:4])
+        for vector, record in zip(vectors[4:], records[4:]):
+            writer.append(vector, record)
+
+    store = CorpusStore.open(tmp_path / 'corpus')
+    assert len(store) == 10
+    assert np.allclose(np.linalg.norm(store.vectors, axis=1), 1.0, atol=1e-5)
+    assert [store.record(i) for i in range(10)] == records
+    assert store.fingerprint == vector_fingerprint(np.array(store.vectors))
+
+
+def test_failed_write_keeps_previous_corpus(tmp_path):
+    with CorpusWriter(tmp_path / 'corpus', dim=4) as writer:
+        writer.append_many(np.ones((2, 4)), _records(2))
+    try:
+        with CorpusWriter(tmp_path / 'corpus', dim=4) as writer:
+            writer.append_many(np.ones((1, 4)), _records(1))
+            raise RuntimeError("ingestion failed")
+    except RuntimeError:
+        pass
+    assert len(CorpusStore.open(tmp_path / 'corpus')) == 2
+    assert not [p.name for p in tmp_path.iterdir() if '.tmp-' in p.name]
+    assert len(corpus_versions(tmp_path / 'corpus')) == 1
+
+
+def test_rewrite_swaps_the_symlink_and_keeps_open_readers_working(tmp_path):
+    path = tmp_path / 'corpus'
+    # A corpus directory from before versioned writes is migrated on the first swap
+    with CorpusWriter(path.with_name('plain'), dim=4) as writer:
+        writer.append_many(np.ones((2, 4)), _records(2))
+    os.rename(os.path.realpath(path.with_name('plain')), path)
+    old = CorpusStore.open(path)
+
+    with CorpusWriter(path, dim=4) as writer:
+        writer.append_many(np.ones((3, 4)), _records(3))
+    assert path.is_symlink()
+    assert len(CorpusStore.open(path)) == 3
+    assert corpus_versions(path) == [path.resolve()]
+    # Memory maps of the removed version stay readable
+    assert old.text(1) == 'chunk 1 — बीमा'
+
+
+def test_incomplete_corpus_does_not_fall_back_to_legacy_files(tmp_path):
+    np.save(tmp_path / 'embeddings.npy', np.ones((3, 4), dtype=np.float32))
+    pd.DataFrame(_records(3)).to_csv(tmp_path / 'metadata.csv', index=False)
+    with CorpusWriter(corpus_path(tmp_path), dim=4) as writer:
+        writer.append_many(np.ones((1, 4)), _records(1))
+
+    os.unlink(corpus_path(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        open_corpus(tmp_path)
+
+
+def test_convert_legacy_embeddings_dir(tmp_path):
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4) + 1
+    np.save(tmp_path / 'embeddings.npy', vectors)
+    pd.DataFrame(_records(3)).to_csv(tmp_path / 'metadata.csv', index=False)
+
+    assert open_corpus(tmp_path).path == tmp_path
+    convert_legacy(tmp_path)
+    store = open_corpus(tmp_path)
+    assert store.path == corpus_path(tmp_path).resolve()
+    assert store.text(2) == 'chunk 2 — बीमा'
+    assert store.field('company', 1) == 'Maxlife'
+    assert np.allclose(store.vectors[0], vectors[0] / np.linalg.norm(vectors[0]))
@@ -0,0 +1,57 @@
+# test_facets.py
+import numpy as np
+from app.services.corpus_store import CorpusStore, CorpusWriter, corpus_path
+from app.services.embedding_service import EmbeddingSearcher
+from app.services.facets import FacetIndex
+from app.services.query_intent import QueryIntentExtractor
+
+ROWS = [
+    ('LIC', 'Pension Plans', 'LIC_Saral Pension_Sales Brochure.pdf'),
+    ('LIC', 'Health Plans', 'LIC_Jeevan-Arogya-Brochure.pdf'),
+    ('Maxlife', 'Pension Plans', 'SWAG Pension - Prospectus.pdf'),
+    ('LIC', 'Insurance Plans', '955-512N350V02NewJeevanAmar.pdf'),
+    ('LIC', 'Pension Plans', 'LIC_Saral Pension_Sales Brochure.pdf'),
+]
+
+
+class FixedModel:
+    def get_sentence_vector(self, text):
+        return np.ones(4, dtype=np.float32)
+
+
+def _write_corpus(embeddings_dir):
+    with CorpusWriter(corpus_path(embeddings_dir), dim=4) as writer:
+        writer.append_many(np.random.default_rng(0).normal(size=(len(ROWS), 4)), [{
+            'company': company, 'category': category, 'file_name': file_name,
+            'chunk_idx': i, 'text': f'annuity options for plan {i}'
+        } for i, (company, category, file_name) in enumerate(ROWS)])
+    return CorpusStore.open(corpus_path(embeddings_dir))
+
+
+def test_filters_combine_and_ignore_case(tmp_path):
+    facets = FacetIndex(_write_corpus(tmp_path))
+    assert facets.rows(None) is None
+    assert list(facets.rows({'company': 'lic', 'category': 'Pension Plans'})) == [0, 4]
+    assert list(facets.rows({'category': ['Health Plans', 'Insurance Plans']})) == [1, 3]
+    assert len(facets.rows({'company': 'Unknown'})) == 0
+
+
+def test_filtered_search_only_returns_matching_rows(tmp_path):
+    _write_corpus(tmp_path)
+    searcher = EmbeddingSearcher(tmp_path, model=FixedModel())
+    for mode in ('vector', 'bm25', 'hybrid'):
+        results = searcher.search('annuity options', top_k=5, mode=mode, filters={'company': 'Maxlife'})
+        assert [r['file_name'] for r in results] == ['SWAG Pension - Prospectus.pdf']
+    batch = searcher.search_batch(['annuity', 'options'], top_k=5, filters={'category': 'Health Plans'})
+    assert all(len(results) == 1 and results[0]['category'] == 'Health Plans' for results in batch)
+    assert searcher.search('annuity', filters={'company': 'Unknown'}) == []
+    assert searcher.search_batch(['annuity', 'options'], filters={'company': 'Unknown'}) == [[], []]
+
+
+def test_intent_extraction(tmp_path):
+    intent = QueryIntentExtractor(_write_corpus(tmp_path).values)
+    assert intent.extract('LIC pension plans') == {'company': ['LIC'], 'category': ['Pension Plans']}
+    assert intent.extract('Max Life retirement options') == {'company': ['Maxlife'], 'category': ['Pension Plans']}
+    assert intent.extract('Tell me about Jeevan Arogya') == {'file_name': ['LIC_Jeevan-Arogya-Brochure.pdf']}
+    assert intent.extract('What is 512N350V02?') == {'file_name': ['955-512N350V02NewJeevanAmar.pdf']}
+    assert intent.extract('How do I file a claim?') == {}
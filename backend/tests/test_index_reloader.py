@@ -0,0 +1,59 @@
+# test_index_reloader.py
+import time
+import numpy as np
+from app.services.corpus_store import CorpusWriter, corpus_path
+from app.services.embedding_service import EmbeddingSearcher
+from app.services.index_reloader import IndexReloader
+
+
+class StubRAG:
+    def __init__(self, searcher):
+        self.searcher = searcher
+        self.generation = 0
+
+    def swap_searcher(self, searcher):
+        self.searcher = searcher
+        self.generation += 1
+
+
+def _write_corpus(embeddings_dir, n):
+    with CorpusWriter(corpus_path(embeddings_dir), dim=4) as writer:
+        writer.append_many(np.random.default_rng(n).normal(size=(n, 4)), [{
+            'company': 'LIC', 'category': 'Health Plans', 'file_name': 'a.pdf',
+            'chunk_idx': i, 'text': f'chunk {i}'
+        } for i in range(n)])
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_corpus_rewrite_is_swapped_in(tmp_path):
+    _write_corpus(tmp_path, 3)
+    rag = StubRAG(EmbeddingSearcher(tmp_path, model=object()))
+    reloader = IndexReloader(rag, tmp_path, debounce=0.1)
+    reloader.start()
+    try:
+        old_searcher = rag.searcher
+        _write_corpus(tmp_path, 7)
+        assert _wait_for(lambda: len(rag.searcher) == 7)
+        # The previous searcher stays usable for requests already holding it
+        assert len(old_searcher.search_by_vector(np.ones(4), top_k=2)) == 2
+        assert reloader.status()['last_error'] is None
+    finally:
+        reloader.stop()
+
+
+def test_failed_reload_keeps_serving_previous_index(tmp_path):
+    _write_corpus(tmp_path, 3)
+    rag = StubRAG(EmbeddingSearcher(tmp_path, model=object()))
+    reloader = IndexReloader(rag, tmp_path / 'missing', debounce=0.1)
+
+    assert reloader.request_reload()
+    assert _wait_for(lambda: reloader.status()['last_error'] is not None)
+    assert rag.generation == 0 and len(rag.searcher) == 3
@@ -0,0 +1,116 @@
+# test_ingestion.py
+import tracemalloc
+import zlib
+import numpy as np
+from app.services.corpus_store import CorpusStore, CorpusWriter, corpus_path
+from app.services.ingestion import IngestionPipeline, embed_in_batches, write_batches
+
+DIM = 300
+
+
+class HashModel:
+    """Deterministic stand-in for FastText"""
+
+    def get_dimension(self):
+        return DIM
+
+    def get_sentence_vector(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode())).normal(size=DIM).astype(np.float32)
+
+
+def _synthetic_records(n):
+    for i in range(n):
+        yield {
+            'company': ['LIC', 'Maxlife'][i % 2],
+            'category': 'Insurance Plans',
+            'file_name': f'brochure_{i % 50}.pdf',
+            'chunk_idx': i,
+            'text': f'chunk {i} ' + 'premium benefit sum assured ' * 15,
+        }
+
+
+def _peak_ingest_bytes(path, n):
+    tracemalloc.start()
+    with CorpusWriter(path, DIM) as writer:
+        write_batches(embed_in_batches(_synthetic_records(n), HashModel(), batch_size=256), writer)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_streaming_ingestion_peak_memory_is_flat(tmp_path):
+    small = _peak_ingest_bytes(tmp_path / 'small', 2000)
+    large = _peak_ingest_bytes(tmp_path / 'large', 20000)
+
+    assert len(CorpusStore.open(tmp_path / 'large')) == 20000
+    # 20k rows of 300 float32 is 24 MB of vectors alone; peak must not track corpus size
+    assert large < 20000 * DIM * 4 / 4
+    assert large < small * 1.5
+
+
+def test_incremental_run_only_reprocesses_changed_pdfs(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'data'
+    folder = data_dir / 'LIC' / 'Pension Plans'
+    folder.mkdir(parents=True)
+    (folder / 'a.pdf').write_bytes(b'first')
+    (folder / 'b.pdf').write_bytes(b'second')
+
+    extracted = []
+
+    def fake_extract(self, sources):
+        for source in sources:
+            extracted.append(source.path.name)
+            content = source.path.read_bytes().decode()
+            yield source, {'pages': 1, 'chunks': [f'{content} one.', f'{content} two.']}
+
+    monkeypatch.setattr(IngestionPipeline, 'extract', fake_extract)
+    pipeline = IngestionPipeline(data_dir, tmp_path / 'out', model=HashModel())
+
+    assert pipeline.run()['processed'] == 2
+    assert pipeline.run()['processed'] == 0
+
+    (folder / 'b.pdf').write_bytes(b'changed')
+    stats = pipeline.run()
+    assert (stats['processed'], stats['kept']) == (1, 1)
+    assert extracted == ['a.pdf', 'b.pdf', 'b.pdf']
+
+    store = CorpusStore.open(corpus_path(tmp_path / 'out'))
+    assert sorted(store.text(i) for i in range(len(store))) == [
+        'changed one.', 'changed two.', 'first one.', 'first two.'
+    ]
+
+
+def test_incremental_run_keys_rows_on_the_pdf_path(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'data'
+    # The same company, category and file name under two different directories
+    first = data_dir / '2023' / 'LIC' / 'Pension Plans'
+    second = data_dir / '2024' / 'LIC' / 'Pension Plans'
+    for folder in (first, second):
+        folder.mkdir(parents=True)
+    (first / 'brochure.pdf').write_bytes(b'2023')
+    (second / 'brochure.pdf').write_bytes(b'2024')
+    (second / 'old.pdf').write_bytes(b'old')
+
+    def fake_extract(self, sources):
+        for source in sources:
+            content = source.path.read_bytes().decode()
+            yield source, {'pages': 1, 'chunks': [f'{content} one.', f'{content} two.']}
+
+    monkeypatch.setattr(IngestionPipeline, 'extract', fake_extract)
+    pipeline = IngestionPipeline(data_dir, tmp_path / 'out', model=HashModel())
+    assert pipeline.run()['processed'] == 3
+
+    # 2023 brochure unchanged, 2024 brochure modified, old.pdf deleted
+    (second / 'brochure.pdf').write_bytes(b'2024 v2')
+    (second / 'old.pdf').unlink()
+    stats = pipeline.run()
+    assert (stats['processed'], stats['kept'], stats['removed']) == (1, 1, 1)
+
+    store = CorpusStore.open(corpus_path(tmp_path / 'out'))
+    rows = sorted((store.source(i), store.text(i)) for i in range(len(store)))
+    assert rows == [
+        ('2023/LIC/Pension Plans/brochure.pdf', '2023 one.'),
+        ('2023/LIC/Pension Plans/brochure.pdf', '2023 two.'),
+        ('2024/LIC/Pension Plans/brochure.pdf', '2024 v2 one.'),
+        ('2024/LIC/Pension Plans/brochure.pdf', '2024 v2 two.'),
+    ]
@@ -0,0 +1,30 @@
+# test_language_detector.py
+from app.services.language_detector import LanguageDetector, dominant_script
+
+SUPPORTED = ['en', 'hi', 'mr', 'ta', 'te', 'kn', 'gu', 'ml', 'bn', 'or']
+
+
+def test_distinct_scripts_skip_the_model():
+    detector = LanguageDetector(SUPPORTED)
+    assert detector.detect("What is the maturity benefit?") == 'en'
+    assert detector.detect("என் பாலிசியின் முதிர்வு தொகை எவ்வளவு?") == 'ta'
+    assert detector.detect("ನನ್ನ ಪಾಲಿಸಿಯ ಮುಕ್ತಾಯ ಮೊತ್ತ ಎಷ್ಟು?") == 'kn'
+    # Plan names typed in Latin do not outvote the sentence's own script
+    assert detector.detect("LIC Jeevan Umang policy ਦੀ ਜਾਣਕਾਰੀ") == 'en'  # Gurmukhi is unsupported
+    assert detector.detect("LIC Jeevan Umang policy বিষয়ে বলুন") == 'bn'
+    assert detector.detect("12345 ?") == 'en'
+    assert detector.stats() == {'by_script': 6, 'by_model': 0}
+    assert dominant_script("मेरी policy") == 'devanagari'
+
+
+def test_devanagari_fallback_is_deterministic():
+    texts = {
+        "मेरी पॉलिसी की परिपक्वता राशि कितनी है?": 'hi',
+        "माझ्या पॉलिसीची मुदतपूर्ती रक्कम किती आहे?": 'mr',
+    }
+    answers = [
+        {text: LanguageDetector(SUPPORTED).detect(text) for text in texts}
+        for _ in range(5)
+    ]
+    assert all(a == texts for a in answers)
+    assert LanguageDetector(['en', 'hi']).detect("माझ्या पॉलिसीची रक्कम किती आहे?") == 'hi'
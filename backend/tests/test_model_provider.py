@@ -0,0 +1,42 @@
+# test_model_provider.py
+import fasttext
+import numpy as np
+from app.services.model_provider import ReducedFastText, build_reduced_model, subword_buckets
+
+
+def _tiny_model(tmp_path):
+    words = ['policy', 'premium', 'pension', 'maturity', 'benefit', 'बीमा', 'plan', 'the', 'of']
+    rng = np.random.default_rng(0)
+    lines = [' '.join(rng.choice(words, size=12)) for _ in range(300)]
+    corpus = tmp_path / 'corpus.txt'
+    corpus.write_text('\n'.join(lines), encoding='utf-8')
+    return fasttext.train_unsupervised(str(corpus), dim=8, minn=2, maxn=4, bucket=1000,
+                                       epoch=1, minCount=1, thread=1, verbose=0)
+
+
+def test_subword_buckets_match_fasttext(tmp_path):
+    model = _tiny_model(tmp_path)
+    args = model.f.getArgs()
+    nwords = len(model.words)
+    for word in ['pension', 'unseenword', 'बीमा', 'a']:
+        _, ids = model.get_subwords(word)
+        expected = sorted(i - nwords for i in ids if i >= nwords)
+        assert sorted(subword_buckets(word, args.minn, args.maxn, args.bucket)) == expected
+
+
+def test_reduced_model_reproduces_sentence_vectors(tmp_path):
+    model = _tiny_model(tmp_path)
+    build_reduced_model(model, ['policy', 'plan'], tmp_path / 'reduced', bucket_dtype=np.float32)
+    reduced = ReducedFastText(tmp_path / 'reduced')
+
+    # Kept words are exact; unseen words outside the model vocabulary come from buckets
+    for text in ['policy plan', 'policy  xyzzy\tplan', '']:
+        assert np.allclose(reduced.get_sentence_vector(text), model.get_sentence_vector(text), atol=1e-5)
+
+
+def test_reduced_model_without_buckets_skips_unknown_words(tmp_path):
+    model = _tiny_model(tmp_path)
+    build_reduced_model(model, ['policy'], tmp_path / 'reduced', keep_buckets=False)
+    reduced = ReducedFastText(tmp_path / 'reduced')
+    assert reduced.buckets is None
+    assert np.allclose(reduced.get_sentence_vector('policy xyzzy'), reduced.get_sentence_vector('policy'))
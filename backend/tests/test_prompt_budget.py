@@ -0,0 +1,66 @@
+# test_prompt_budget.py
+import asyncio
+from app.services.prompt_budget import PromptBudget, count_tokens, truncate_tokens
+from app.services.session_store import Message, SessionStore, session_key
+from benchmarks.stub_llm import serve_in_thread
+
+
+def words(n, word='premium'):
+    return ' '.join([word] * n)
+
+
+def test_token_helpers():
+    assert count_tokens("What's the sum assured?") == 7
+    assert truncate_tokens('one, two three', 2) == 'one,'
+    assert truncate_tokens('one two', 5) == 'one two'
+
+
+def test_context_keeps_rank_order_and_history_keeps_newest():
+    budget = PromptBudget(total_tokens=300, history_share=0.25)
+    chunks = [words(100, 'a'), words(100, 'b'), words(100, 'c')]
+    messages = [Message('human', words(40, 'old')), Message('ai', words(40, 'new'))]
+
+    allocation = budget.allocate(50, chunks, '', messages)
+    # 250 tokens left: history may take 62, so context gets 188 (one chunk and most of the next)
+    assert allocation.chunks[0] == chunks[0] and count_tokens(allocation.chunks[1]) == 88
+    assert len(allocation.chunks) == 2
+    assert [m.content for m in allocation.messages] == [messages[1].content]
+    assert allocation.tokens <= 250
+
+    # Without history to keep, context may use the whole remaining budget
+    allocation = budget.allocate(50, chunks, '', [])
+    assert len(allocation.chunks) == 3 and allocation.tokens == 250
+    assert budget.allocate(50, chunks[:1], '', messages).chunks == chunks[:1]
+    stats = budget.stats()
+    assert (stats['trimmed_prompts'], stats['dropped_chunks']) == (2, 1)
+
+
+def test_older_turns_are_summarized_after_the_reply(tmp_path, monkeypatch):
+    from app.config import settings
+    from app.services.llm_service import LlamaService
+
+    monkeypatch.setattr(settings, 'HISTORY_RECENT_MESSAGES', 2)
+    monkeypatch.setattr(settings, 'SESSION_HISTORY_MESSAGES', 5)
+    server = serve_in_thread(11563, latency=0.01, tokens=60)
+    try:
+        service = LlamaService(host='http://127.0.0.1:11563', model='stub',
+                               sessions=SessionStore(f'sqlite:///{tmp_path}/sessions.db'))
+        key = session_key('frank', 's1')
+
+        async def scenario():
+            for question in ['What is the premium?', 'What is the term?', 'Can I pay monthly?']:
+                await service.generate_response(question, 'Premiums are paid yearly.', key)
+                await asyncio.gather(*service._summarizing.values())
+            return service._prepare('And the bonus?', 'Premiums are paid yearly.', key)
+
+        prompt = asyncio.run(scenario())
+        summary, _, messages = service.sessions.snapshot(key)
+        assert summary and 'Summary of earlier conversation' in prompt
+        # The first exchanges are only in the summary; the last one stays verbatim
+        assert 'What is the premium?' not in prompt and 'Can I pay monthly?' in prompt
+        stats = service.prompt_stats()
+        # Only the third reply pushed history past SESSION_HISTORY_MESSAGES
+        assert (stats['summary_calls'], stats['summaries'], stats['summaries_skipped']) == (1, 1, 2)
+        assert stats['tokens_saved'] > 0
+    finally:
+        server.should_exit = True
@@ -0,0 +1,158 @@
+# test_recognizer_pool.py
+import asyncio
+import io
+import json
+import time
+import wave
+import pytest
+from app.services.recognizer_pool import PoolSaturated, RecognizerPool
+
+
+class EchoRecognizer:
+    """Reports how many samples it heard; sleeps per chunk to simulate work"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.samples = 0
+
+    def AcceptWaveform(self, data):
+        time.sleep(self.delay)
+        self.samples += len(data) // 2
+        return False
+
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+
+    def FinalResult(self):
+        return json.dumps({'text': f'{self.samples} samples'})
+
+    def Reset(self):
+        self.samples = 0
+
+
+class EchoFactory:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def __call__(self, sample_rate):
+        return EchoRecognizer(self.delay)
+
+
+def wav(frames=8000, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x00' * frames)
+    return buffer.getvalue()
+
+
+def test_recognizers_are_reset_and_reused():
+    pool = RecognizerPool(EchoFactory(), workers=2, max_queue=2)
+
+    async def scenario():
+        return [await pool.transcribe(wav(8000)) for _ in range(3)]
+
+    results = asyncio.run(scenario())
+    assert [r['text'] for r in results] == ['8000 samples'] * 3
+    assert results[0]['audio_seconds'] == 0.5
+    stats = pool.stats()
+    assert (stats['completed'], stats['recognizers_created']) == (3, 1)
+    pool.shutdown()
+
+
+def test_admission_control_rejects_beyond_the_queue():
+    pool = RecognizerPool(EchoFactory(delay=0.2), workers=1, max_queue=1)
+
+    async def scenario():
+        return await asyncio.gather(*(pool.transcribe(wav(4000)) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(r, PoolSaturated) for r in results) == 1
+    stats = pool.stats()
+    assert (stats['completed'], stats['rejected'], stats['max_queue_depth']) == (2, 1, 1)
+    assert stats['avg_wait_seconds'] > 0.05 and stats['in_flight'] == 0
+    pool.shutdown()
+
+
+def test_process_mode():
+    pool = RecognizerPool(EchoFactory(), workers=2, max_queue=0, mode='process')
+
+    async def scenario():
+        return await asyncio.gather(pool.transcribe(wav(1600)), pool.transcribe(wav(3200)))
+
+    assert [r['text'] for r in asyncio.run(scenario())] == ['1600 samples', '3200 samples']
+    pool.shutdown()
+    with pytest.raises(ValueError):
+        RecognizerPool(EchoFactory(), workers=1, max_queue=0, mode='fibers')
+
+
+def test_uploads_follow_process_mode():
+    import logging
+    from app.services.speech_service import SpeechService
+
+    service = SpeechService.__new__(SpeechService)
+    service.logger = logging.getLogger(__name__)
+    service.pool = RecognizerPool(EchoFactory(), workers=1, max_queue=0, mode='process')
+    audio = wav(3200)
+
+    async def chunks():
+        for start in range(0, len(audio), 1000):
+            yield audio[start:start + 1000]
+
+    assert asyncio.run(service.transcribe_upload(chunks())) == '3200 samples'
+    stats = service.pool.stats()
+    # Transcribed on the worker process, not on a thread-side recognizer
+    assert (stats['completed'], stats['recognizers_created']) == (1, 0)
+
+    # A full pool refuses the upload before its body is read
+    read = []
+
+    async def recorded():
+        for start in range(0, len(audio), 1000):
+            read.append(start)
+            yield audio[start:start + 1000]
+
+    service.pool.admit()
+    with pytest.raises(PoolSaturated):
+        asyncio.run(service.transcribe_upload(recorded()))
+    service.pool.leave(None)
+    assert read == [] and service.pool.stats()['rejected'] == 1
+    service.pool.shutdown()
+
+
+def test_live_streams_are_admitted_and_capped():
+    import logging
+    from app.services.recognizer_pool import RecognizerCache
+    from app.services.speech_service import SpeechService
+
+    service = SpeechService.__new__(SpeechService)
+    service.logger = logging.getLogger(__name__)
+    service.pool = RecognizerPool(EchoFactory(), workers=1, max_queue=1)
+
+    streams = [service.open_stream('pcm16', 16000) for _ in range(2)]
+    with pytest.raises(PoolSaturated):
+        service.open_stream('pcm16', 16000)
+    stats = service.pool.stats()
+    assert (stats['in_flight'], stats['recognizers_in_use'], stats['rejected']) == (2, 2, 1)
+
+    async def finish(stream):
+        await stream.feed(b'\x00\x00' * 800)
+        return await stream.finish()
+
+    assert asyncio.run(finish(streams[0])) == '800 samples'
+    for stream in streams:
+        stream.close()
+    stats = service.pool.stats()
+    assert (stats['in_flight'], stats['recognizers_in_use']) == (0, 0)
+    assert (stats['completed'], stats['failed']) == (1, 1)
+    service.pool.shutdown()
+
+    # The cache itself never hands out more than max_live recognizers
+    cache = RecognizerCache(EchoFactory(), limit=1, max_live=1)
+    recognizer = cache.acquire(16000)
+    with pytest.raises(PoolSaturated):
+        cache.acquire(8000)
+    cache.release(16000, recognizer)
+    assert cache.acquire(16000) is recognizer
@@ -0,0 +1,73 @@
+# test_response_cache.py
+import numpy as np
+from app.services.response_cache import SemanticResponseCache, calibrate_threshold
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_near_duplicates_hit_within_scope():
+    cache = SemanticResponseCache(dim=3, threshold=0.95)
+    cache.put(unit(1, 0, 0), 'maturity answer', generation=0)
+
+    assert cache.get(unit(1, 0.1, 0), generation=0) == 'maturity answer'
+    assert cache.get(unit(1, 1, 0), generation=0) is None
+    assert cache.get(unit(1, 0, 0), scope=cache.scope(filters={'company': 'LIC'}), generation=0) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert abs(stats['hit_rate'] - 1 / 3) < 1e-9
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = SemanticResponseCache(dim=3, max_entries=2, ttl=10, threshold=0.99, clock=clock)
+    cache.put(unit(1, 0, 0), 'a')
+    cache.put(unit(0, 1, 0), 'b')
+    assert cache.get(unit(1, 0, 0)) == 'a'  # 'b' is now least recently used
+    cache.put(unit(0, 0, 1), 'c')
+    assert len(cache) == 2 and cache.get(unit(0, 1, 0)) is None
+    assert cache.stats()['evictions'] == 1
+
+    clock.now = 11
+    assert cache.get(unit(1, 0, 0)) is None
+    assert len(cache) == 0 and cache.stats()['expirations'] == 2
+
+
+def test_corpus_change_invalidates():
+    cache = SemanticResponseCache(dim=3)
+    cache.put(unit(1, 0, 0), 'old answer', generation=0)
+    assert cache.get(unit(1, 0, 0), generation=1) is None
+    assert len(cache) == 0 and cache.stats()['invalidations'] == 1
+
+
+def test_threshold_calibration_keeps_near_misses_apart():
+    vectors = {
+        'umang maturity': unit(1, 0, 0),
+        'maturity of umang': unit(1, 0.05, 0),
+        'utsav maturity': unit(1, 0.2, 0),
+        'entry age': unit(0, 1, 0),
+    }
+    pairs = [
+        {'a': 'umang maturity', 'b': 'maturity of umang', 'duplicate': True},
+        {'a': 'umang maturity', 'b': 'utsav maturity', 'duplicate': False},
+        {'a': 'umang maturity', 'b': 'entry age', 'duplicate': False},
+    ]
+    threshold, report = calibrate_threshold(pairs, vectors.__getitem__, margin=0.001)
+
+    closest = float(unit(1, 0, 0) @ unit(1, 0.2, 0))
+    assert abs(threshold - (closest + 0.001)) < 1e-6
+    assert report['duplicate_recall'] == 1.0
+    cache = SemanticResponseCache(dim=3, threshold=threshold)
+    cache.put(vectors['umang maturity'], 'umang answer')
+    assert cache.get(vectors['maturity of umang']) == 'umang answer'
+    assert cache.get(vectors['utsav maturity']) is None
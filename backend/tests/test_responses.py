@@ -0,0 +1,55 @@
+# test_responses.py
+import asyncio
+import email
+import json
+from urllib.parse import unquote
+from app.utils.responses import audio_headers, metadata_headers, multipart_stream, negotiate
+
+OFFERS = ["application/json", "audio/mpeg", "multipart/mixed"]
+
+
+def test_accept_negotiation():
+    assert negotiate(None, OFFERS) == "application/json"
+    assert negotiate("*/*", OFFERS) == "application/json"
+    assert negotiate("audio/mpeg", OFFERS) == "audio/mpeg"
+    assert negotiate("audio/*", OFFERS) == "audio/mpeg"
+    assert negotiate("application/json;q=0.5, multipart/mixed", OFFERS) == "multipart/mixed"
+    # The most specific range sets the quality
+    assert negotiate("audio/*;q=0.9, audio/mpeg;q=0.1, application/json;q=0.5", OFFERS) == "application/json"
+    assert negotiate("image/png", OFFERS) == "application/json"
+
+
+def test_multipart_body_and_headers():
+    metadata = {"question": "मेरी पॉलिसी?", "llm_response": "Line one.\nLine two.", "detected_language": "hi"}
+
+    async def body():
+        async def clips():
+            yield b"\xff\xfbclip-one"
+            yield b"\xff\xfbclip-two"
+        return b"".join([part async for part in multipart_stream(metadata, "audio/mpeg", clips(), "b0undary")])
+
+    raw = asyncio.run(body())
+    message = email.message_from_bytes(b"Content-Type: multipart/mixed; boundary=b0undary\r\n\r\n" + raw)
+    json_part, audio_part = message.get_payload()
+    assert json.loads(json_part.get_payload(decode=True)) == metadata
+    assert audio_part.get_content_type() == "audio/mpeg"
+    assert audio_part.get_filename() == "answer.mp3"
+    assert audio_part.get_payload(decode=True) == b"\xff\xfbclip-one\xff\xfbclip-two"
+
+    headers = metadata_headers(metadata)
+    assert set(headers) == {"X-Question", "X-Llm-Response", "X-Detected-Language"}
+    assert all(value.isascii() and "\n" not in value for value in headers.values())
+    assert unquote(headers["X-Question"]) == metadata["question"]
+
+
+def test_raw_audio_headers_leave_long_text_in_the_body():
+    metadata = {
+        "question": "मेरी पॉलिसी की परिपक्वता राशि कितनी है?",
+        "llm_response": "आपकी पॉलिसी की परिपक्वता राशि बीमा राशि और बोनस के बराबर है। " * 40,
+        "detected_language": "hi",
+    }
+    # Percent-encoded, the answer alone would be far past an 8 KB header limit
+    assert len(metadata_headers(metadata)["X-Llm-Response"]) > 8 * 1024
+
+    headers = audio_headers(metadata)
+    assert headers == {"X-Detected-Language": "hi"}
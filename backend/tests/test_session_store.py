@@ -0,0 +1,61 @@
+# test_session_store.py
+from app.services.session_store import SessionStore, session_key
+
+
+def make_store(tmp_path, **kwargs):
+    # A long interval keeps the background writer out of the way; tests flush explicitly
+    kwargs.setdefault('flush_interval', 60)
+    return SessionStore(f'sqlite:///{tmp_path}/sessions.db', **kwargs)
+
+
+def test_ring_buffer_keeps_latest_messages(tmp_path):
+    store = make_store(tmp_path, max_messages=4)
+    key = session_key('alice', 's1')
+    for i in range(5):
+        store.save_exchange(key, f'q{i}', f'a{i}')
+
+    assert [m.content for m in store.history(key, 10)] == ['q3', 'a3', 'q4', 'a4']
+    assert [m.type for m in store.history(key, 2)] == ['human', 'ai']
+    assert store.history(session_key(), 5) == []
+    assert store.has_history(key) and not store.has_history(session_key('nobody', 's1'))
+    store.close()
+
+
+def test_writes_are_batched_and_survive_restart(tmp_path):
+    store = make_store(tmp_path)
+    key = session_key('bob', 's1')
+    store.save_exchange(key, 'What is the premium?', 'Rs. 500 a month.')
+    store.save_exchange(key, 'And the term?', '20 years.')
+    assert store.stats()['pending_writes'] == 4
+    store.close()
+    assert (store.flushed, store.flushes) == (4, 1)
+
+    reopened = make_store(tmp_path)
+    assert [m.content for m in reopened.history(key, 2)] == ['And the term?', '20 years.']
+    reopened.close()
+
+
+def test_evicted_sessions_reload_with_unflushed_messages(tmp_path):
+    store = make_store(tmp_path, max_sessions=2)
+    first = session_key('carol', 'a')
+    store.save_exchange(first, 'q', 'a')
+    store.get(session_key('dave', 'b'))
+    store.get(session_key('erin', 'c'))
+
+    stats = store.stats()
+    assert (stats['sessions_in_memory'], stats['evictions']) == (2, 1)
+    # The messages were still queued when the session was evicted
+    assert [m.content for m in store.history(first, 5)] == ['q', 'a']
+    store.close()
+
+
+def test_requests_without_ids_keep_no_history(tmp_path):
+    store = make_store(tmp_path)
+    store.save_exchange(session_key(), 'My name is Ravi', 'Hello Ravi.')
+    store.set_summary(session_key(), 'The user is Ravi.', 1.0)
+    store.save_exchange(session_key(session_id='tab-1'), 'q', 'a')
+
+    assert not store.has_history(session_key())
+    assert store.has_history(session_key(session_id='tab-1'))
+    assert store.flush() == 2
+    store.close()
@@ -0,0 +1,93 @@
+# test_speech_streaming.py
+import asyncio
+import json
+from app.services.speech_service import StreamingRecognition
+
+
+class ScriptedRecognizer:
+    """Recognizes one word per non-silent chunk; a silent chunk ends the utterance"""
+
+    def __init__(self):
+        self.words = []
+
+    def AcceptWaveform(self, data):
+        if not any(data):
+            return True
+        self.words.append(data.decode())
+        return False
+
+    def Result(self):
+        text, self.words = ' '.join(self.words), []
+        return json.dumps({'text': text})
+
+    def PartialResult(self):
+        return json.dumps({'partial': ' '.join(self.words)})
+
+    def FinalResult(self):
+        return self.Result()
+
+
+def test_partials_segments_and_final_transcript():
+    recognition = StreamingRecognition(ScriptedRecognizer(), sample_rate=16000)
+
+    async def scenario():
+        events = []
+        for chunk in [b'premium', b'amount', b'\x00\x00', b'', b'maturity']:
+            events += await recognition.feed(chunk)
+        return events, await recognition.finish()
+
+    events, transcript = asyncio.run(scenario())
+    assert events == [
+        {'type': 'partial', 'text': 'premium'},
+        {'type': 'partial', 'text': 'premium amount'},
+        {'type': 'segment', 'text': 'premium amount'},
+        {'type': 'partial', 'text': 'maturity'},
+    ]
+    assert transcript == 'premium amount maturity'
+    assert recognition.audio_seconds == (7 + 6 + 2 + 8) / 32000
+
+
+def test_close_during_a_cancelled_feed_releases_after_the_feed():
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+
+    started, resume = threading.Event(), threading.Event()
+    released = []
+
+    class SlowRecognizer(ScriptedRecognizer):
+        def AcceptWaveform(self, data):
+            started.set()
+            resume.wait(5)
+            return super().AcceptWaveform(data)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    recognition = StreamingRecognition(
+        SlowRecognizer(), sample_rate=16000, executor=executor, release=released.append
+    )
+
+    async def scenario():
+        feed = asyncio.ensure_future(recognition.feed(b'premium'))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        feed.cancel()
+        recognition.close()
+        # The recognizer is still decoding, so it must not be back in the pool
+        assert released == []
+
+    asyncio.run(scenario())
+    resume.set()
+    executor.shutdown(wait=True)
+    assert len(released) == 1
+    assert recognition.recognizer is None
+
+
+def test_stream_start_message_is_validated():
+    import pytest
+    from pydantic import ValidationError
+    from app.models.schemas import SpeechStreamStart
+
+    config = SpeechStreamStart.model_validate({'type': 'start', 'format': 'webm', 'sample_rate': 48000})
+    assert (config.format, config.sample_rate, config.speak) == ('webm', 48000, False)
+    for bad in ({'sample_rate': 0}, {'sample_rate': 22050}, {'sample_rate': 'fast'},
+                {'format': 'flac'}, {'user_id': 'u' * 129}):
+        with pytest.raises(ValidationError):
+            SpeechStreamStart.model_validate({'type': 'start', **bad})
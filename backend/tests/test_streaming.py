@@ -0,0 +1,62 @@
+# test_streaming.py
+import asyncio
+import time
+from app.utils.sentences import SentenceSplitter, split_sentences
+from app.utils.streaming import sse_event, translate_sentences
+from benchmarks.stub_llm import serve_in_thread
+
+
+def test_sentence_splitting():
+    assert split_sentences('The premium is Rs. 500. Interest is 7.5% a year! Is it paid yearly? Yes') == [
+        'The premium is Rs. 500.', 'Interest is 7.5% a year!', 'Is it paid yearly?', 'Yes'
+    ]
+    splitter = SentenceSplitter()
+    # A terminator at the end of the buffer may still continue ("7." -> "7.5")
+    assert splitter.feed('Interest is 7.') == []
+    assert splitter.feed('5% a year. Bonus') == ['Interest is 7.5% a year.']
+    assert splitter.flush() == ['Bonus']
+
+
+def test_sse_event_formatting():
+    assert sse_event('delta', {'text': 'नमस्ते'}) == 'event: delta\ndata: {"text": "नमस्ते"}\n\n'
+
+
+def test_translation_overlaps_generation_and_keeps_order():
+    async def tokens():
+        for token in ['One two.', ' Three four.', ' Five']:
+            await asyncio.sleep(0.1)
+            yield token
+
+    async def translate(sentence):
+        # Earlier sentences take longer, so completion order differs from input order
+        await asyncio.sleep(0.25 if sentence.startswith('One') else 0.05)
+        return sentence.upper()
+
+    async def scenario():
+        start = time.perf_counter()
+        pieces = [piece async for piece in translate_sentences(tokens(), translate)]
+        return pieces, time.perf_counter() - start
+
+    pieces, elapsed = asyncio.run(scenario())
+    assert pieces == ['ONE TWO.', ' THREE FOUR.', ' FIVE']
+    # Sequential translation after generation would take 0.3 + 0.35 s
+    assert elapsed < 0.55
+
+
+def test_llm_tokens_are_streamed(tmp_path):
+    from app.services.llm_service import LlamaService
+    from app.services.session_store import SessionStore
+
+    server = serve_in_thread(11562, latency=0.05, tokens=6, token_interval=0.01)
+    try:
+        service = LlamaService(host='http://127.0.0.1:11562', model='stub',
+                               sessions=SessionStore(f'sqlite:///{tmp_path}/sessions.db'))
+
+        async def scenario():
+            return [token async for token in service.stream_response('What is covered?', '')]
+
+        tokens = asyncio.run(scenario())
+        assert len(tokens) == 6
+        assert len(''.join(tokens).split()) == 6
+    finally:
+        server.should_exit = True
@@ -0,0 +1,62 @@
+# test_tracing.py
+import asyncio
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.utils.tracing import Tracer, TracingMiddleware
+
+
+def test_histograms_render_as_prometheus_text():
+    tracer = Tracer(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        tracer.observe("retrieve", seconds)
+    with tracer.stage("generate"):
+        pass
+    tracer.register_gauges(lambda: {"rag_asr_queue_depth": ("Waiting uploads", 2)})
+
+    text = tracer.render()
+    assert '# TYPE rag_stage_duration_seconds histogram' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieve",le="0.1"} 1' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieve",le="1.0"} 3' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieve",le="+Inf"} 4' in text
+    assert 'rag_stage_duration_seconds_sum{stage="retrieve"} 4.05' in text
+    assert 'rag_stage_duration_seconds_count{stage="generate"} 1' in text
+    assert 'rag_asr_queue_depth 2' in text
+    assert tracer.stages["retrieve"].quantile(0.5) == 1.0
+
+    disabled = Tracer(enabled=False)
+    with disabled.stage("retrieve"):
+        disabled.observe("generate", 1.0)
+    assert disabled.stages == {}
+
+
+def test_middleware_traces_requests_by_route():
+    tracer = Tracer()
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with tracer.stage("lookup"):
+            await asyncio.sleep(0.01)
+        return {"id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            await asyncio.sleep(0.05)
+            yield b"done"
+        return StreamingResponse(body())
+
+    client = TestClient(app)
+    response = client.get("/items/7")
+    name, duration = response.headers["server-timing"].split(";dur=")
+    assert name == "lookup" and float(duration) >= 10
+    client.get("/items/8")
+    client.get("/stream")
+    client.get("/missing")
+
+    assert tracer.requests[("GET", "/items/{item_id}", 200)].count == 2
+    assert tracer.requests[("GET", "unmatched", 404)].count == 1
+    # A streamed response is timed to its last chunk
+    assert tracer.requests[("GET", "/stream", 200)].sum >= 0.05
@@ -0,0 +1,77 @@
+# test_translation_service.py
+import time
+from app.services.translation_backends import StubBackend, TranslationBackend
+from app.services.translation_cache import TranslationCache, cache_key
+from app.services.translation_service import TranslationService
+
+
+def make_service(tmp_path, backend=None, **cache_kwargs):
+    cache = TranslationCache(f'sqlite:///{tmp_path}/translations.db', **cache_kwargs)
+    return TranslationService(backend=backend or StubBackend(), cache=cache)
+
+
+def test_cached_sentences_are_reused(tmp_path):
+    service = make_service(tmp_path)
+    first = service.translate_from_english('The premium is Rs. 500. It is paid yearly.\nClaims take a week.', 'hi')
+    assert first == '[hi] The premium is Rs. 500. [hi] It is paid yearly.\n[hi] Claims take a week.'
+    assert service.backend.sentences == 3
+
+    # Only the sentence not seen before reaches the backend
+    second = service.translate_from_english('It is paid yearly. Bonus is extra.', 'hi')
+    assert second == '[hi] It is paid yearly. [hi] Bonus is extra.'
+    assert (service.backend.calls, service.backend.sentences) == (2, 4)
+    assert service.translate_to_english('Hello', 'en') == 'Hello'
+    service.close()
+
+    # A new process finds the translations on disk
+    restarted = make_service(tmp_path)
+    assert restarted.translate_from_english('Claims take a week.', 'hi') == '[hi] Claims take a week.'
+    assert restarted.backend.calls == 0
+    assert restarted.stats()['cache']['disk_hits'] == 1
+    restarted.close()
+
+
+def test_uncached_batches_are_sent_concurrently(tmp_path, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, 'TRANSLATION_BATCH_CHARS', 30)
+    service = make_service(tmp_path, backend=StubBackend(latency=0.2))
+    text = ' '.join(f'Sentence number {i} is here.' for i in range(4))
+
+    start = time.perf_counter()
+    translated = service.translate(text, 'en', 'ta')
+    elapsed = time.perf_counter() - start
+    assert translated == ' '.join(f'[ta] Sentence number {i} is here.' for i in range(4))
+    assert service.backend.calls == 4
+    # Four 0.2 s requests back to back would take 0.8 s
+    assert elapsed < 0.6
+    service.close()
+
+
+def test_failures_pass_text_through_uncached(tmp_path):
+    class FailingBackend(TranslationBackend):
+        name = 'failing'
+
+        def translate_batch(self, texts, source, target):
+            raise ConnectionError('offline')
+
+    service = make_service(tmp_path, backend=FailingBackend())
+    assert service.translate_from_english('Claims take a week.', 'hi') == 'Claims take a week.'
+    assert service.cache.get_many([cache_key('Claims take a week.', 'en', 'hi')]) == {}
+    service.close()
+
+
+def test_cache_bounds(tmp_path):
+    cache = TranslationCache(f'sqlite:///{tmp_path}/translations.db', max_entries=2, max_rows=10)
+    cache.put_many({cache_key(f'text {i}', 'en', 'hi'): f'anuvad {i}' for i in range(12)})
+    assert cache.stats()['entries_in_memory'] == 2
+    assert cache.stats()['rows_on_disk'] <= 10
+    cache.close()
+
+
+def test_rewritten_translations_are_not_counted_twice(tmp_path):
+    cache = TranslationCache(f'sqlite:///{tmp_path}/translations.db', max_rows=10)
+    for attempt in range(5):
+        cache.put_many({cache_key(f'text {i}', 'en', 'hi'): f'anuvad {i}.{attempt}' for i in range(3)})
+    assert cache.stats()['rows_on_disk'] == 3
+    cache.close()
@@ -0,0 +1,58 @@
+# test_tts_service.py
+import asyncio
+import io
+import time
+import wave
+from app.services.tts_backends import OfflineBackend
+from app.services.tts_cache import PhraseCache
+from app.services.tts_service import TTSService
+
+
+def frames(clip):
+    with wave.open(io.BytesIO(clip), 'rb') as wf:
+        return wf.getnframes()
+
+
+def test_sentences_are_joined_and_short_ones_cached():
+    backend = OfflineBackend()
+    tts = TTSService(backend, PhraseCache(max_bytes=1 << 20, max_chars=40))
+    long_sentence = "Your policy matures after twenty years of premium payments."
+    text = f"Namaste! Your booking is confirmed. {long_sentence} Namaste!"
+
+    audio = asyncio.run(tts.text_to_speech(text, 'en'))
+    # One clip per sentence, repeats included, under a single WAV header
+    assert frames(audio) == sum(int(words * 0.3 * 16000) for words in (1, 4, 9, 1))
+    assert backend.calls == 3  # the repeated greeting is synthesized once
+
+    asyncio.run(tts.text_to_speech(text, 'en'))
+    # The long sentence is not cached and is synthesized again
+    assert backend.calls == 4
+    stats = tts.stats()
+    assert stats['cache']['entries'] == 2 and stats['cache']['hits'] == 2
+    assert asyncio.run(tts.text_to_speech("  ", 'en')) == b""
+    tts.close()
+
+
+def test_speaker_synthesizes_while_text_streams():
+    tts = TTSService(OfflineBackend(latency=0.2), PhraseCache())
+    tokens = ["Premiums are ", "due yearly. ", "Claims take ", "ten days. ", "Call ", "us"]
+
+    async def scenario():
+        speaker = tts.speaker('en')
+        clips = []
+        start = time.perf_counter()
+        for token in tokens:
+            speaker.feed(token)
+            clips += speaker.ready()
+            await asyncio.sleep(0.05)
+        clips += [clip async for clip in speaker.finish()]
+        return clips, time.perf_counter() - start
+
+    clips, elapsed = asyncio.run(scenario())
+    assert [(c['index'], c['text']) for c in clips] == [
+        (0, "Premiums are due yearly."), (1, "Claims take ten days."), (2, "Call us")
+    ]
+    assert all(c['media_type'] == 'audio/wav' and frames(c['audio']) > 0 for c in clips)
+    # Sentences overlap with the stream and each other, not 3 x 0.2s after it
+    assert elapsed < 0.3 + 0.45
+    tts.close()
@@ -0,0 +1,75 @@
+# test_uploads.py
+import asyncio
+import pytest
+from starlette.requests import Request
+from app.utils.uploads import AudioUpload, UploadError
+
+BOUNDARY = "----form7MA4YWxkTrZu0gW"
+
+
+def form_body(audio: bytes, **fields) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="recording.mp3"\r\n'
+        f'Content-Type: audio/mp3\r\n\r\n'.encode() + audio + b'\r\n'
+    ]
+    for name, value in fields.items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode()
+
+
+def request(body: bytes, content_type: str, piece: int = 1000, query: bytes = b'', declared: int = None):
+    pieces = [body[i:i + piece] for i in range(0, len(body), piece)]
+    received = []
+
+    async def receive():
+        chunk = pieces.pop(0) if pieces else b''
+        received.append(len(chunk))
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(pieces)}
+
+    headers = [(b'content-type', content_type.encode()),
+               (b'content-length', str(declared or len(body)).encode())]
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/upload', 'headers': headers, 'query_string': query}
+    return Request(scope, receive), received
+
+
+def test_multipart_audio_is_read_incrementally():
+    audio = b'ID3' + bytes(range(256)) * 40
+    body = form_body(audio, user_id='u-1', session_id='मेरा सत्र')
+    req, received = request(body, f'multipart/form-data; boundary={BOUNDARY}')
+    upload = AudioUpload(req, max_bytes=20000, chunk_bytes=4096)
+
+    async def scenario():
+        upload.check_length()
+        head = await upload.head(16)
+        reads_for_head = len(received)
+        chunks = [chunk async for chunk in upload.chunks()]
+        return head, reads_for_head, chunks
+
+    head, reads_for_head, chunks = asyncio.run(scenario())
+    assert head.startswith(b'ID3') and reads_for_head == 1
+    assert b''.join(chunks) == audio
+    assert all(len(c) >= 4096 for c in chunks[:-1])
+    assert upload.filename == 'recording.mp3' and upload.size == len(audio)
+    assert upload.fields == {'user_id': 'u-1', 'session_id': 'मेरा सत्र'}
+
+
+def test_oversized_uploads_are_rejected_early():
+    audio = b'RIFF' + b'\x00' * 30000
+    req, _ = request(audio, 'audio/wav', declared=len(audio))
+    with pytest.raises(UploadError) as declared:
+        AudioUpload(req, max_bytes=20000).check_length()
+    assert declared.value.status_code == 413
+
+    # Without a usable Content-Length the limit is enforced while reading
+    req, received = request(form_body(audio), f'multipart/form-data; boundary={BOUNDARY}', declared=1)
+    upload = AudioUpload(req, max_bytes=20000)
+
+    async def drain():
+        return [chunk async for chunk in upload.chunks()]
+
+    with pytest.raises(UploadError):
+        asyncio.run(drain())
+    assert len(received) <= 21  # stops within a piece of the limit
+
+    req, _ = request(b'RIFF0000WAVE', 'audio/wav', query=b'user_id=u-2')
+    assert AudioUpload(req, max_bytes=100).fields == {'user_id': 'u-2'}
@@ -0,0 +1,81 @@
+# test_vector_index.py
+import numpy as np
+from app.services.vector_index import FlatIndex, IVFIndex, build_index, load_index, normalize_rows, vector_fingerprint
+
+
+def _corpus(n=400, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def test_flat_index_matches_brute_force_cosine():
+    corpus = _corpus()
+    query = normalize_rows(corpus[7] + 0.1)
+    scores, ids = FlatIndex.build(corpus).search(query, top_k=5)
+
+    cosine = normalize_rows(corpus) @ query
+    expected = np.argsort(cosine)[::-1][:5]
+    assert list(ids) == list(expected)
+    assert np.allclose(scores, cosine[expected], atol=1e-6)
+
+
+def test_ivf_index_with_all_lists_probed_is_exact():
+    corpus = _corpus()
+    index = IVFIndex.build(corpus, nlist=10, nprobe=10)
+    query = normalize_rows(corpus[42])
+    _, exact = FlatIndex.build(corpus).search(query, top_k=5)
+    _, approx = index.search(query, top_k=5)
+    assert list(approx) == list(exact)
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    corpus = _corpus()
+    index = build_index(corpus, 'ivf', nlist=8, nprobe=3)
+    index.save(tmp_path / 'index_ivf.npz')
+
+    loaded = load_index(tmp_path, 'ivf', embeddings=corpus, nprobe=3)
+    query = normalize_rows(corpus[3])
+    assert list(loaded.search(query, 4)[1]) == list(index.search(query, 4)[1])
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    build_index(_corpus(n=50), 'flat').save(tmp_path / 'index_flat.npz')
+    loaded = load_index(tmp_path, 'flat', embeddings=_corpus(n=60))
+    assert len(loaded) == 60
+
+
+def test_index_for_other_vectors_with_same_row_count_is_rebuilt(tmp_path):
+    old, new = normalize_rows(_corpus(seed=0)), normalize_rows(_corpus(seed=1))
+    build_index(old, 'ivf', nlist=8).save(tmp_path / 'index_ivf.npz', fingerprint=vector_fingerprint(old))
+
+    reused = load_index(tmp_path, 'ivf', embeddings=old, fingerprint=vector_fingerprint(old), nprobe=8)
+    assert np.array_equal(reused.list_vectors, np.load(tmp_path / 'index_ivf.npz')['list_vectors'])
+    rebuilt = load_index(tmp_path, 'ivf', embeddings=new, fingerprint=vector_fingerprint(new), nprobe=8)
+    _, ids = rebuilt.search(new[5], top_k=1)
+    assert ids[0] == 5
+    # The rebuilt index replaces the stale file, so the next start loads it
+    with np.load(tmp_path / 'index_ivf.npz') as arrays:
+        assert str(arrays['fingerprint']) == vector_fingerprint(new)
+        assert np.array_equal(arrays['list_vectors'], rebuilt.list_vectors)
+    assert not list(tmp_path.glob('*.tmp-*'))
+
+
+def test_ivf_index_over_an_empty_corpus(tmp_path):
+    empty = np.empty((0, 32), dtype=np.float32)
+    index = load_index(tmp_path, 'ivf', embeddings=empty, fingerprint=vector_fingerprint(empty))
+    assert len(index) == 0
+    scores, ids = index.search(normalize_rows(_corpus(n=1)[0]), top_k=3)
+    assert len(scores) == len(ids) == 0
+    assert len(index.search_batch(normalize_rows(_corpus(n=2)), top_k=3)[1]) == 2
+    assert len(load_index(tmp_path, 'ivf', embeddings=empty, fingerprint=vector_fingerprint(empty))) == 0
+
+
+def test_batch_search_matches_single_queries():
+    corpus = _corpus()
+    queries = normalize_rows(corpus[[1, 50, 99]] + 0.05)
+    for index in (FlatIndex.build(corpus), IVFIndex.build(corpus, nlist=6, nprobe=2)):
+        scores, ids = index.search_batch(queries, top_k=4)
+        for query, row_scores, row_ids in zip(queries, scores, ids):
+            single_scores, single_ids = index.search(query, top_k=4)
+            assert list(row_ids) == list(single_ids)
+            assert np.allclose(row_scores, single_scores, atol=1e-5)